@@ -5,6 +5,7 @@ from django.shortcuts import redirect
 
 from accounts.forms.admin_forms import TeamAdminForm
 from accounts.models import User, Team
+from ctf.services import RankingService
 
 
 @admin.register(User)
@@ -64,23 +65,27 @@ class TeamAdmin(admin.ModelAdmin):
     def set_all_teams_in_game_view(self, request):
         """View to set all teams as in game"""
         updated = self.model.objects.update(is_in_game=True)
+        RankingService.rebuild()
         self.message_user(request, f"All teams ({updated}) were successfully set as in game.")
         return redirect("admin:accounts_team_changelist")
 
     def set_all_teams_not_in_game_view(self, request):
         """View to set all teams as not in game"""
         updated = self.model.objects.update(is_in_game=False)
+        RankingService.rebuild()
         self.message_user(request, f"All teams ({updated}) were successfully set as not in game.")
         return redirect("admin:accounts_team_changelist")
 
     def set_teams_in_game(self, request, queryset):
         updated = queryset.update(is_in_game=True)
+        RankingService.rebuild()
         self.message_user(request, f"{updated} teams were successfully set as in game.")
 
     set_teams_in_game.short_description = "Set selected teams as in game"
 
     def set_teams_not_in_game(self, request, queryset):
         updated = queryset.update(is_in_game=False)
+        RankingService.rebuild()
         self.message_user(request, f"{updated} teams were successfully set as not in game.")
 
     set_teams_not_in_game.short_description = "Set selected teams as not in game"
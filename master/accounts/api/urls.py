@@ -1,7 +1,8 @@
 from django.urls import path
 
-from accounts.api.views import team_score_history
+from accounts.api.views import scoreboard_snapshot, team_score_history
 
 urlpatterns = [
     path('team-score-history/', team_score_history, name='team_score_history'),
+    path('scoreboard/', scoreboard_snapshot, name='scoreboard_snapshot'),
 ]
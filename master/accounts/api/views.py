@@ -1,14 +1,12 @@
 import logging
-from datetime import timedelta
 
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Prefetch
 from django.http import JsonResponse
-from django.utils import timezone
 from django.views.decorators.http import require_GET
 
-from accounts.models import Team, TeamScoreHistory
+from accounts.models import Team, TeamScoreRollup
+from ctf.services import ScoreboardService
 
 logger = logging.getLogger(__name__)
 
@@ -36,24 +34,7 @@ def team_score_history(request):
         if team_uuid:
             teams_query = teams_query.filter(uuid=team_uuid)
 
-        history_queryset = TeamScoreHistory.objects.order_by('timestamp')
-
-        if days_param != 'all':
-            try:
-                days = int(days_param)
-                since_date = timezone.now() - timedelta(days=days)
-                history_queryset = history_queryset.filter(timestamp__gte=since_date)
-            except ValueError:
-                since_date = timezone.now() - timedelta(days=7)
-                history_queryset = history_queryset.filter(timestamp__gte=since_date)
-
-        teams = teams_query.prefetch_related(
-            Prefetch(
-                'score_history',
-                queryset=history_queryset,
-                to_attr='filtered_history'
-            )
-        ).order_by('-score', 'name')
+        teams = teams_query.order_by('-score', 'name')
 
         if team_uuid is None:
             paginator = Paginator(teams, page_size)
@@ -70,20 +51,15 @@ def team_score_history(request):
         else:
             pagination_info = None
 
+        teams = list(teams)
+        resolution, series = TeamScoreRollup.get_series([team.pk for team in teams], days_param)
+        empty_series = {'timestamps': [], 'scores': [], 'blue_points': [], 'red_points': []}
+
         result = {}
         for team in teams:
-            history = team.filtered_history
-
-            team_uuid_str = str(team.uuid)
-            result[team_uuid_str] = {
-                'name': team.name,
-                'timestamps': [entry.timestamp.isoformat() for entry in history],
-                'scores': [entry.score for entry in history],
-                'blue_points': [entry.blue_points for entry in history],
-                'red_points': [entry.red_points for entry in history],
-            }
+            result[str(team.uuid)] = {'name': team.name, **series.get(team.pk, empty_series)}
 
-        response_data = {'teams': result}
+        response_data = {'teams': result, 'resolution': TeamScoreRollup.RESOLUTION_SECONDS[resolution]}
         if pagination_info:
             response_data['pagination'] = pagination_info
 
@@ -91,3 +67,14 @@ def team_score_history(request):
     except Exception as e:
         logger.exception("Error generating team score history: %s", str(e))
         return JsonResponse({'error': str(e)}, status=500)
+
+
+@require_GET
+@login_required
+def scoreboard_snapshot(request):
+    """API endpoint to get the scoreboard snapshot the live scoreboard stream resumes from"""
+    try:
+        return JsonResponse(ScoreboardService.get_snapshot(request.GET.get('days', '7')))
+    except Exception as e:
+        logger.exception("Error generating scoreboard snapshot: %s", str(e))
+        return JsonResponse({'error': str(e)}, status=500)
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:20
+
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+RESOLUTION_SECONDS = {'minute': 60, 'hour': 60 * 60, 'day': 24 * 60 * 60}
+
+
+def build_rollups(apps, schema_editor):
+    """Roll up existing score history, the last entry of every bucket wins"""
+    TeamScoreHistory = apps.get_model('accounts', 'TeamScoreHistory')
+    TeamScoreRollup = apps.get_model('accounts', 'TeamScoreRollup')
+
+    rollups = {}
+    history = TeamScoreHistory.objects.order_by('timestamp', 'id').values_list(
+        'team_id', 'timestamp', 'score', 'blue_points', 'red_points')
+    for team_id, timestamp, score, blue_points, red_points in history.iterator():
+        for resolution, seconds in RESOLUTION_SECONDS.items():
+            bucket = datetime.fromtimestamp(int(timestamp.timestamp()) // seconds * seconds, tz=timezone.utc)
+            rollups[(team_id, resolution, bucket)] = (score, blue_points, red_points)
+
+    TeamScoreRollup.objects.bulk_create(
+        [
+            TeamScoreRollup(team_id=team_id, resolution=resolution, bucket=bucket,
+                            score=score, blue_points=blue_points, red_points=red_points)
+            for (team_id, resolution, bucket), (score, blue_points, red_points) in rollups.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_alter_user_team'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamScoreRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour'), ('day', 'Day')], max_length=10)),
+                ('bucket', models.DateTimeField(help_text='Start of the bucket in UTC')),
+                ('score', models.IntegerField(default=0)),
+                ('blue_points', models.IntegerField(default=0)),
+                ('red_points', models.IntegerField(default=0)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_rollups', to='accounts.team')),
+            ],
+            options={
+                'verbose_name': 'Team Score Rollup',
+                'verbose_name_plural': 'Team Score Rollups',
+                'ordering': ['bucket'],
+                'constraints': [models.UniqueConstraint(fields=('team', 'resolution', 'bucket'), name='unique_team_score_rollup')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_teamscorerollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='team',
+            name='blue_points',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='red_points',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='score',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -1,8 +1,9 @@
-from .team import Team, TeamScoreHistory
+from .team import Team, TeamScoreHistory, TeamScoreRollup
 from .user import User
 
 __all__ = [
     'Team',
     'TeamScoreHistory',
+    'TeamScoreRollup',
     'User',
 ]
\ No newline at end of file
@@ -1,21 +1,22 @@
 import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
 
+from django.conf import settings
 from django.core.exceptions import ValidationError, PermissionDenied
-from django.db import models
-from django.db.models.signals import post_save, pre_save
+from django.db import models, transaction
+from django.db.models import F, Min
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
-from ctf.models import Badge
-
 
 class Team(models.Model):
     name = models.CharField(max_length=128)
     join_key = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
-    score = models.IntegerField(default=0)
-    red_points = models.IntegerField(default=0)
-    blue_points = models.IntegerField(default=0)
+    score = models.IntegerField(default=0, db_index=True)
+    red_points = models.IntegerField(default=0, db_index=True)
+    blue_points = models.IntegerField(default=0, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, related_name='created_teams')
     is_in_game = models.BooleanField(default=False)
@@ -37,11 +38,25 @@ class Team(models.Model):
         """Get all flags owned by the team using reverse relation"""
         return self.owned_flags.all()
 
-    def update_score(self):
-        """Update team's score"""
-        self.score = self.blue_points + self.red_points
-        self.save()
-        TeamScoreHistory.record_score(self)
+    def add_points(self, blue_points=0, red_points=0):
+        """Add points in a single UPDATE so concurrent awards are never lost and refresh the point fields
+
+        Save signals are skipped, rankings and badges are updated directly.
+        """
+        from ctf.services import BadgeService, RankingService
+
+        teams = Team.objects.filter(pk=self.pk)
+        teams.update(
+            blue_points=F('blue_points') + blue_points,
+            red_points=F('red_points') + red_points,
+            score=F('blue_points') + F('red_points') + blue_points + red_points,
+        )
+        self.blue_points, self.red_points, self.score = teams.values_list('blue_points', 'red_points', 'score').get()
+
+        if self.is_in_game:
+            team_id = self.pk
+            transaction.on_commit(lambda: RankingService.update_team(team_id))
+            BadgeService.schedule_update()
 
     def can_join(self):
         """Check if team can accept new members"""
@@ -117,43 +132,30 @@ def track_points_changes(sender, instance, **kwargs):
 
 
 @receiver(post_save, sender=Team)
-def update_team_badges(sender, instance, **kwargs):
-    if not instance.is_in_game:
-        return
+def update_team_ranking(sender, instance, **kwargs):
+    from ctf.services import BadgeService, RankingService
+
+    team_id = instance.pk
+    transaction.on_commit(lambda: RankingService.update_team(team_id))
 
     old_score = getattr(instance, '_old_score', None)
     old_blue = getattr(instance, '_old_blue_points', None)
     old_red = getattr(instance, '_old_red_points', None)
 
-    if (old_score is not None and old_score != instance.score) or \
-            (old_blue is not None and old_blue != instance.blue_points) or \
-            (old_red is not None and old_red != instance.red_points):
-
-        Badge.update_team_badges(instance)
-
-        if old_score is not None and old_score != instance.score:
-            teams_to_check = Team.objects.filter(
-                is_in_game=True,
-                score__gte=min(old_score, instance.score),
-                score__lte=max(old_score, instance.score)
-            ).exclude(id=instance.id)
-        elif old_blue is not None and old_blue != instance.blue_points:
-            teams_to_check = Team.objects.filter(
-                is_in_game=True,
-                blue_points__gte=min(old_blue, instance.blue_points),
-                blue_points__lte=max(old_blue, instance.blue_points)
-            ).exclude(id=instance.id)
-        elif old_red is not None and old_red != instance.red_points:
-            teams_to_check = Team.objects.filter(
-                is_in_game=True,
-                red_points__gte=min(old_red, instance.red_points),
-                red_points__lte=max(old_red, instance.red_points)
-            ).exclude(id=instance.id)
-        else:
-            teams_to_check = Team.objects.none()
+    if instance.is_in_game and (
+            (old_score is not None and old_score != instance.score) or
+            (old_blue is not None and old_blue != instance.blue_points) or
+            (old_red is not None and old_red != instance.red_points)):
+        # Badges are read from the rankings, which are updated once the points are committed
+        BadgeService.schedule_update()
 
-        for team in teams_to_check:
-            Badge.update_team_badges(team)
+
+@receiver(post_delete, sender=Team)
+def remove_team_ranking(sender, instance, **kwargs):
+    from ctf.services import RankingService
+
+    team_id = instance.pk
+    transaction.on_commit(lambda: RankingService.remove_team(team_id))
 
 
 class TeamScoreHistory(models.Model):
@@ -196,7 +198,9 @@ class TeamScoreHistory(models.Model):
     @classmethod
     def record_score(cls, team, event_type=EventType.SCORE_UPDATE, description="", flag=None):
         """Create a new history record for the current team score."""
-        return cls.objects.create(
+        from ctf.services import ScoreboardService
+
+        entry = cls.objects.create(
             team=team,
             score=team.score,
             blue_points=team.blue_points,
@@ -205,6 +209,9 @@ class TeamScoreHistory(models.Model):
             description=description,
             flag=flag
         )
+        TeamScoreRollup.record(entry)
+        ScoreboardService.publish_history_entry(entry)
+        return entry
 
     @classmethod
     def record_flag_capture(cls, team, flag):
@@ -224,3 +231,109 @@ class TeamScoreHistory(models.Model):
             event_type=cls.EventType.BLUE_POINTS,
             description=description
         )
+
+
+class TeamScoreRollup(models.Model):
+    """Team score at the end of a minute, hour or day bucket, kept up to date on every score event"""
+
+    class Resolution(models.TextChoices):
+        MINUTE = 'minute', 'Minute'
+        HOUR = 'hour', 'Hour'
+        DAY = 'day', 'Day'
+
+    RESOLUTION_SECONDS = {
+        Resolution.MINUTE: 60,
+        Resolution.HOUR: 60 * 60,
+        Resolution.DAY: 24 * 60 * 60,
+    }
+
+    team = models.ForeignKey(
+        'accounts.Team',
+        related_name='score_rollups',
+        on_delete=models.CASCADE
+    )
+    resolution = models.CharField(max_length=10, choices=Resolution.choices)
+    bucket = models.DateTimeField(help_text="Start of the bucket in UTC")
+    score = models.IntegerField(default=0)
+    blue_points = models.IntegerField(default=0)
+    red_points = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['bucket']
+        constraints = [
+            models.UniqueConstraint(fields=['team', 'resolution', 'bucket'], name='unique_team_score_rollup'),
+        ]
+        verbose_name = "Team Score Rollup"
+        verbose_name_plural = "Team Score Rollups"
+
+    def __str__(self):
+        return f"{self.team.name} - {self.resolution} {self.bucket.strftime('%Y-%m-%d %H:%M')} - {self.score}"
+
+    @classmethod
+    def get_bucket(cls, timestamp, resolution) -> datetime:
+        """Get the start of the bucket the timestamp falls into"""
+        seconds = cls.RESOLUTION_SECONDS[resolution]
+        epoch = int(timestamp.timestamp()) // seconds * seconds
+        return datetime.fromtimestamp(epoch, tz=dt_timezone.utc)
+
+    @classmethod
+    def record(cls, entry):
+        """Store the score of a history entry as the latest value of its bucket at every resolution"""
+        cls.objects.bulk_create(
+            [
+                cls(team_id=entry.team_id, resolution=resolution, bucket=cls.get_bucket(entry.timestamp, resolution),
+                    score=entry.score, blue_points=entry.blue_points, red_points=entry.red_points)
+                for resolution in cls.Resolution
+            ],
+            update_conflicts=True,
+            unique_fields=['team', 'resolution', 'bucket'],
+            update_fields=['score', 'blue_points', 'red_points'],
+        )
+
+    @classmethod
+    def get_resolution(cls, days: int):
+        """Get the finest resolution that keeps a series of the time window within SCORE_HISTORY_MAX_POINTS"""
+        for resolution in cls.Resolution:
+            if days * cls.RESOLUTION_SECONDS[cls.Resolution.DAY] / cls.RESOLUTION_SECONDS[resolution] \
+                    <= settings.SCORE_HISTORY_MAX_POINTS:
+                return resolution
+        return cls.Resolution.DAY
+
+    @classmethod
+    def get_series(cls, team_ids, days_param: str = "7") -> tuple:
+        """Get chart series of the teams at a resolution matching the time window
+
+        Returns:
+            tuple: (resolution, {team ID: {"timestamps", "scores", "blue_points", "red_points"}})
+        """
+        rollups = cls.objects.filter(team_id__in=team_ids)
+        now = timezone.now()
+
+        if days_param == 'all':
+            first_bucket = rollups.filter(resolution=cls.Resolution.DAY).aggregate(first=Min('bucket'))['first']
+            days = (now - first_bucket).days + 1 if first_bucket else 1
+            since_date = None
+        else:
+            try:
+                days = int(days_param)
+            except ValueError:
+                days = 7
+            since_date = now - timedelta(days=days)
+
+        resolution = cls.get_resolution(days)
+        rollups = rollups.filter(resolution=resolution)
+        if since_date:
+            rollups = rollups.filter(bucket__gte=cls.get_bucket(since_date, resolution))
+
+        series = {}
+        for rollup in rollups.order_by('bucket').values_list('team_id', 'bucket', 'score', 'blue_points',
+                                                             'red_points'):
+            team_id, bucket, score, blue_points, red_points = rollup
+            team_series = series.setdefault(team_id, {'timestamps': [], 'scores': [], 'blue_points': [],
+                                                      'red_points': []})
+            team_series['timestamps'].append(bucket.isoformat())
+            team_series['scores'].append(score)
+            team_series['blue_points'].append(blue_points)
+            team_series['red_points'].append(red_points)
+
+        return resolution, series
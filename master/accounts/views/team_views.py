@@ -1,17 +1,14 @@
 import json
 import uuid
-from datetime import timedelta
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError, PermissionDenied
 from django.db import transaction
-from django.db.models import Prefetch
 from django.shortcuts import render, get_object_or_404, redirect
-from django.utils import timezone
 
 from accounts.forms.team_forms import JoinTeamForm, CreateTeamForm
-from accounts.models import Team, TeamScoreHistory, User
+from accounts.models import Team, TeamScoreHistory, TeamScoreRollup, User
 
 
 def teams_view(request):
@@ -24,43 +21,16 @@ def team_detail_view(request, team_uuid):
     """Display detailed information about a specific team"""
     days_param = request.GET.get('days', '7')
 
-    team_query = Team.objects
-
-    history_queryset = TeamScoreHistory.objects.order_by('timestamp')
-
-    if days_param != 'all':
-        try:
-            days = int(days_param)
-            since_date = timezone.now() - timedelta(days=days)
-            history_queryset = history_queryset.filter(timestamp__gte=since_date)
-        except ValueError:
-            since_date = timezone.now() - timedelta(days=7)
-            history_queryset = history_queryset.filter(timestamp__gte=since_date)
-
-    team = get_object_or_404(
-        team_query.prefetch_related(
-            Prefetch(
-                'score_history',
-                queryset=history_queryset,
-                to_attr='filtered_history'
-            )
-        ),
-        uuid=team_uuid
-    )
+    team = get_object_or_404(Team, uuid=team_uuid)
 
     non_score_update_events = team.score_history.exclude(
         event_type=TeamScoreHistory.EventType.SCORE_UPDATE
     ).order_by('-timestamp')[:10]
 
+    _, series = TeamScoreRollup.get_series([team.pk], days_param)
     score_history = {}
-    if team.filtered_history:
-        score_history[str(team.uuid)] = {
-            'name': team.name,
-            'timestamps': [entry.timestamp.isoformat() for entry in team.filtered_history],
-            'scores': [entry.score for entry in team.filtered_history],
-            'blue_points': [entry.blue_points for entry in team.filtered_history],
-            'red_points': [entry.red_points for entry in team.filtered_history],
-        }
+    if team.pk in series:
+        score_history[str(team.uuid)] = {'name': team.name, **series[team.pk]}
 
     context = {
         "team": team,
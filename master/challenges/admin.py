@@ -8,8 +8,8 @@ from django.utils.safestring import mark_safe
 
 from challenges.forms.admin_forms import ChallengeTemplateForm, ChallengeContainerForm
 from challenges.models import ChallengeTemplate, ChallengeContainer, DeploymentAccess, ChallengeDeployment, \
-    ChallengeNetworkConfig
-from challenges.models.enums import ContainerStatus
+    ChallengeNetworkConfig, DeploymentAccessTotal
+from challenges.models.enums import ContainerOperation, ContainerStatus
 from ctf.admin import FlagInline
 from ctf.utils.admin_utils import handle_action_redirect
 
@@ -197,37 +197,23 @@ class ChallengeContainerAdmin(admin.ModelAdmin):
         return redirect("admin:challenges_challengecontainer_changelist")
 
     def stop_all_view(self, request):
-        """View to stop all containers"""
-        stopped = 0
-        failed = 0
-        for game_container in self.model.objects.all():
-            if self.container_service.stop_container(game_container):
-                stopped += 1
-            else:
-                failed += 1
-
-        if failed:
-            self.message_user(request, f"Stopped {stopped} containers. Failed to stop {failed} containers.",
-                              level="WARNING")
-        else:
-            self.message_user(request, f"Successfully stopped all {stopped} containers.")
-        return redirect("admin:challenges_challengecontainer_changelist")
+        """View to queue stopping of all containers"""
+        return self._queue_container_operation(request, ContainerOperation.STOP)
 
     def start_all_view(self, request):
-        """View to start all containers"""
-        started = 0
-        failed = 0
-        for game_container in self.model.objects.all():
-            if self.container_service.start_container(game_container):
-                started += 1
-            else:
-                failed += 1
+        """View to queue starting of all containers"""
+        return self._queue_container_operation(request, ContainerOperation.START)
 
-        if failed:
-            self.message_user(request, f"Started {started} containers. Failed to start {failed} containers.",
-                              level="WARNING")
-        else:
-            self.message_user(request, f"Successfully started all {started} containers.")
+    def _queue_container_operation(self, request, operation):
+        from challenges.tasks import run_container_operation
+
+        container_ids = list(self.model.objects.values_list("pk", flat=True))
+        try:
+            run_container_operation.delay(container_ids, operation)
+            self.message_user(request, f"Queued {operation} of {len(container_ids)} containers.")
+        except Exception as e:
+            logger.error(f"Failed to queue {operation} of containers: {e}")
+            self.message_user(request, f"Failed to queue {operation} of containers: {str(e)}", level="ERROR")
         return redirect("admin:challenges_challengecontainer_changelist")
 
     def delete_model(self, request, obj):
@@ -328,11 +314,19 @@ class DeploymentAccessAdmin(admin.ModelAdmin):
     duration_display.short_description = "Duration"
 
 
+@admin.register(DeploymentAccessTotal)
+class DeploymentAccessTotalAdmin(admin.ModelAdmin):
+    list_display = ('id', 'deployment', 'team', 'total', 'open_sessions', 'open_since')
+    list_filter = ('team',)
+    search_fields = ('deployment__id', 'team__name')
+    readonly_fields = ('total', 'open_sessions', 'open_since')
+
+
 @admin.register(ChallengeDeployment)
 class ChallengeDeploymentAdmin(admin.ModelAdmin):
     list_display = ('template', 'blue_team', 'red_team', 'last_activity', 'total_blue_access_time',
                     'total_red_access_time', 'has_active_connections', 'deployment_actions')
-    list_filter = ('has_active_connections',)
+    list_filter = ('has_active_connections', 'is_pooled')
     actions = ['start_containers', 'stop_containers', 'sync_container_status']
     change_list_template = "admin/challengedeployment/change_list.html"
 
@@ -430,37 +424,21 @@ class ChallengeDeploymentAdmin(admin.ModelAdmin):
         return handle_action_redirect(request, deployment_id)
 
     def start_all_view(self, request):
-        started = 0
-        failed = 0
-        for deployment in self.model.objects.all():
-            if deployment.start_containers():
-                started += 1
-            else:
-                failed += 1
-
-        if failed:
-            self.message_user(request,
-                              f"Started containers for {started} deployments. Failed to start containers for {failed} deployments.",
-                              level="WARNING")
-        else:
-            self.message_user(request, f"Successfully started containers for {started} deployments.")
-        return redirect("admin:challenges_challengedeployment_changelist")
+        return self._queue_deployment_operation(request, ContainerOperation.START)
 
     def stop_all_view(self, request):
-        stopped = 0
-        failed = 0
-        for deployment in self.model.objects.all():
-            if deployment.stop_containers():
-                stopped += 1
-            else:
-                failed += 1
+        return self._queue_deployment_operation(request, ContainerOperation.STOP)
 
-        if failed:
-            self.message_user(request,
-                              f"Stopped containers for {stopped} deployments. Failed to stop containers for {failed} deployments.",
-                              level="WARNING")
-        else:
-            self.message_user(request, f"Successfully stopped containers for {stopped} deployments.")
+    def _queue_deployment_operation(self, request, operation):
+        from challenges.tasks import run_deployment_operation
+
+        deployment_ids = list(self.model.objects.values_list("pk", flat=True))
+        try:
+            run_deployment_operation.delay(deployment_ids, operation)
+            self.message_user(request, f"Queued {operation} of containers for {len(deployment_ids)} deployments.")
+        except Exception as e:
+            logger.error(f"Failed to queue {operation} of deployments: {e}")
+            self.message_user(request, f"Failed to queue {operation} of deployments: {str(e)}", level="ERROR")
         return redirect("admin:challenges_challengedeployment_changelist")
 
     def sync_all_view(self, request):
@@ -481,34 +459,23 @@ class ChallengeDeploymentAdmin(admin.ModelAdmin):
         return redirect("admin:challenges_challengedeployment_changelist")
 
     def start_containers(self, request, queryset):
-        started = 0
-        failed = 0
-        for deployment in queryset:
-            if deployment.start_containers():
-                started += 1
-            else:
-                failed += 1
-        if failed:
-            self.message_user(request,
-                              f"Started containers for {started} deployments. Failed to start containers for {failed} deployments.",
-                              level="WARNING")
-        else:
-            self.message_user(request, f"Successfully started containers for {started} deployments.")
+        from challenges.services import DeploymentService
+        results = DeploymentService().start_deployments(queryset)
+        self._message_bulk_results(request, results, "started")
 
     def stop_containers(self, request, queryset):
-        stopped = 0
-        failed = 0
-        for deployment in queryset:
-            if deployment.stop_containers():
-                stopped += 1
-            else:
-                failed += 1
-        if failed:
+        from challenges.services import DeploymentService
+        results = DeploymentService().stop_deployments(queryset)
+        self._message_bulk_results(request, results, "stopped")
+
+    def _message_bulk_results(self, request, results, action):
+        done = len(results["succeeded"]) + len(results["skipped"])
+        if results["failed"]:
             self.message_user(request,
-                              f"Stopped containers for {stopped} deployments. Failed to stop containers for {failed} deployments.",
+                              f"{action.capitalize()} {done} containers. Failed for {len(results['failed'])} containers.",
                               level="WARNING")
         else:
-            self.message_user(request, f"Successfully stopped containers for {stopped} deployments.")
+            self.message_user(request, f"Successfully {action} {done} containers.")
 
     def sync_container_status(self, request, queryset):
         synced = 0
@@ -11,8 +11,8 @@ from challenges.models import ChallengeTemplate, ChallengeContainer
 class ChallengeTemplateForm(ModelForm):
     class Meta:
         model = ChallengeTemplate
-        fields = ['template_file', 'name', 'title', 'description', 'docker_compose', 'containers_config',
-                  'networks_config']
+        fields = ['template_file', 'name', 'title', 'description', 'build_mode', 'warm_pool_size', 'docker_compose',
+                  'containers_config', 'networks_config']
         widgets = {
             'docker_compose': Textarea(attrs={'rows': 10}),
             'containers_config': Textarea(attrs={'rows': 10}),
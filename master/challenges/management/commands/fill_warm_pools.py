@@ -0,0 +1,15 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from challenges.tasks import fill_warm_pools
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Manually trigger filling warm pools of pre-provisioned deployments"
+
+    def handle(self, *args, **options):
+        fill_warm_pools.apply()
+        logger.info("Finished fill_warm_pools command")
@@ -0,0 +1,20 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from challenges.services import DockerEventService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Listen to the Docker event stream and keep container statuses in sync"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Replay events from this Unix timestamp instead of the saved cursor")
+        parser.add_argument("--no-reconcile", action="store_true",
+                            help="Skip the full status sync performed before listening")
+
+    def handle(self, *args, **options):
+        logger.info("Starting Docker event listener")
+        DockerEventService().listen(since=options["since"], reconcile=not options["no_reconcile"])
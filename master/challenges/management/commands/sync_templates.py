@@ -86,7 +86,8 @@ class Command(BaseCommand):
                     "description": template_info["description"] if "description" in template_info else None,
                     "docker_compose": template_info["docker_compose"] if "docker_compose" in template_info else None,
                     "containers_config": template_info["containers"] if "containers" in template_info else None,
-                    "networks_config": template_info["networks"] if "networks" in template_info else None
+                    "networks_config": template_info["networks"] if "networks" in template_info else None,
+                    "build_mode": template_info["build_mode"]
                 },
             )
 
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0002_challengenetworkconfig_docker_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challengetemplate',
+            name='build_mode',
+            field=models.CharField(choices=[('per_team', 'Per team'), ('shared', 'Shared')], default='per_team', help_text='Shared mode builds images once per template and injects flags when containers start', max_length=16),
+        ),
+    ]
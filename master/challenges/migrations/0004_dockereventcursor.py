@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0003_challengetemplate_build_mode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DockerEventCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(default='default', max_length=64, unique=True)),
+                ('time_nano', models.BigIntegerField(default=0, help_text='Time of the last processed Docker event in nanoseconds')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Docker Event Cursor',
+                'verbose_name_plural': 'Docker Event Cursors',
+            },
+        ),
+    ]
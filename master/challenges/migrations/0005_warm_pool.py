@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0004_dockereventcursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challengedeployment',
+            name='is_pooled',
+            field=models.BooleanField(db_index=True, default=False, help_text='Pre-provisioned deployment waiting to be claimed by a team'),
+        ),
+        migrations.AddField(
+            model_name='challengetemplate',
+            name='warm_pool_size',
+            field=models.PositiveIntegerField(default=0, help_text='Number of stopped deployments kept ready to be claimed when a session starts (shared build mode only)'),
+        ),
+    ]
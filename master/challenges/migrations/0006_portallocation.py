@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0005_warm_pool'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('port', models.PositiveIntegerField(unique=True)),
+                ('is_allocated', models.BooleanField(default=False)),
+                ('allocated_at', models.DateTimeField(blank=True, null=True)),
+                ('blocked_at', models.DateTimeField(blank=True, help_text='Time the port was found to be in use outside of the platform', null=True)),
+            ],
+            options={
+                'verbose_name': 'Port Allocation',
+                'verbose_name_plural': 'Port Allocations',
+                'indexes': [models.Index(fields=['is_allocated', 'port'], name='challenges__is_allo_363f65_idx')],
+            },
+        ),
+    ]
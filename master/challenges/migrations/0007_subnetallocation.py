@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0006_portallocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubnetAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('network_address', models.GenericIPAddressField(unique=True)),
+                ('prefix_length', models.PositiveSmallIntegerField()),
+                ('pool', models.CharField(help_text='Subnet pool this entry was carved from', max_length=64)),
+                ('is_allocated', models.BooleanField(default=False)),
+                ('allocated_at', models.DateTimeField(blank=True, null=True)),
+                ('blocked_at', models.DateTimeField(blank=True, help_text='Time the subnet was found to overlap a network outside the platform', null=True)),
+            ],
+            options={
+                'verbose_name': 'Subnet Allocation',
+                'verbose_name_plural': 'Subnet Allocations',
+                'indexes': [models.Index(fields=['pool', 'prefix_length', 'is_allocated', 'network_address'], name='challenges__pool_7d0d0e_idx')],
+            },
+        ),
+    ]
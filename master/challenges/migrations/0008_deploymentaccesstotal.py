@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:30
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+from challenges.utils.helpers import merge_access_periods
+
+
+def build_access_totals(apps, schema_editor):
+    """Merge existing access records into totals, so time spent and open sessions are known right away"""
+    DeploymentAccess = apps.get_model('challenges', 'DeploymentAccess')
+    DeploymentAccessTotal = apps.get_model('challenges', 'DeploymentAccessTotal')
+
+    now = timezone.now()
+    records = {}
+    for deployment_id, team_id, start, end, is_active in DeploymentAccess.objects.order_by('start_time').values_list(
+            'deployment_id', 'team_id', 'start_time', 'end_time', 'is_active').iterator():
+        records.setdefault((deployment_id, team_id), []).append((start, end, is_active))
+
+    totals = []
+    for (deployment_id, team_id), periods in records.items():
+        total, open_since, open_sessions = merge_access_periods(periods, now)
+        totals.append(DeploymentAccessTotal(deployment_id=deployment_id, team_id=team_id, total=total,
+                                            open_since=open_since, open_sessions=open_sessions))
+    DeploymentAccessTotal.objects.bulk_create(totals, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_team_points_indexes'),
+        ('challenges', '0007_subnetallocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeploymentAccessTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.DurationField(default=datetime.timedelta(0), help_text='Merged duration of closed access periods')),
+                ('open_sessions', models.PositiveIntegerField(default=0)),
+                ('open_since', models.DateTimeField(blank=True, help_text='Start of the current open access period', null=True)),
+                ('deployment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access_totals', to='challenges.challengedeployment')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='accounts.team')),
+            ],
+            options={
+                'verbose_name': 'Deployment Access Total',
+                'verbose_name_plural': 'Deployment Access Totals',
+                'constraints': [models.UniqueConstraint(fields=('deployment', 'team'), name='unique_deployment_access_total')],
+            },
+        ),
+        migrations.RunPython(build_access_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0008_deploymentaccesstotal'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subnetallocation',
+            name='network_address',
+            field=models.GenericIPAddressField(),
+        ),
+        migrations.AddConstraint(
+            model_name='subnetallocation',
+            constraint=models.UniqueConstraint(fields=('pool', 'prefix_length', 'network_address'), name='unique_subnet_allocation'),
+        ),
+    ]
@@ -3,8 +3,16 @@ __all__ = [
     'ChallengeNetworkConfig',
     'ChallengeDeployment',
     'DeploymentAccess',
+    'DeploymentAccessTotal',
     'ChallengeContainer',
+    'DockerEventCursor',
+    'PortAllocation',
+    'SubnetAllocation',
 ]
 
-from .challenge import ChallengeTemplate, ChallengeNetworkConfig, ChallengeDeployment, DeploymentAccess
+from .challenge import ChallengeTemplate, ChallengeNetworkConfig, ChallengeDeployment, DeploymentAccess, \
+    DeploymentAccessTotal
 from .container import ChallengeContainer
+from .docker_event import DockerEventCursor
+from .port_allocation import PortAllocation
+from .subnet_allocation import SubnetAllocation
@@ -8,10 +8,14 @@ from zipfile import ZipFile
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 
-from challenges.utils.helpers import get_time_string_from_seconds
+from challenges.models.enums import TemplateBuildMode
+from challenges.models.subnet_allocation import SubnetAllocation
+from challenges.utils.helpers import get_time_string_from_seconds, merge_access_periods
 from challenges.utils.template_helpers import read_template_info
 
 logger = logging.getLogger(__name__)
@@ -26,6 +30,12 @@ class ChallengeTemplate(models.Model):
     docker_compose = models.TextField(default="", blank=True)
     containers_config = models.JSONField(default=dict, null=True, blank=True)
     networks_config = models.JSONField(default=dict, null=True, blank=True)
+    build_mode = models.CharField(max_length=16, choices=TemplateBuildMode, default=TemplateBuildMode.PER_TEAM,
+                                  help_text="Shared mode builds images once per template and injects flags "
+                                            "when containers start")
+    warm_pool_size = models.PositiveIntegerField(default=0,
+                                                 help_text="Number of stopped deployments kept ready to be claimed "
+                                                           "when a session starts (shared build mode only)")
     template_file = models.FileField(upload_to='ctf/static/uploads/', null=True, blank=True,
                                      help_text="Upload a zip file containing the scenario folder")
 
@@ -52,6 +62,9 @@ class ChallengeTemplate(models.Model):
             if not self.title:
                 raise ValidationError({'title': 'Title is required when not uploading a template file'})
 
+        if self.warm_pool_size and self.build_mode != TemplateBuildMode.SHARED:
+            raise ValidationError({'warm_pool_size': 'Warm pool is only available in shared build mode'})
+
     def save(self, *args, **kwargs):
         template_file = self.template_file
         if template_file:
@@ -78,6 +91,7 @@ class ChallengeTemplate(models.Model):
                         self.docker_compose = template_info.get('docker_compose', '')
                         self.containers_config = template_info.get('containers', {})
                         self.networks_config = template_info.get('networks', {})
+                        self.build_mode = template_info.get('build_mode', TemplateBuildMode.PER_TEAM)
                     else:
                         raise ValidationError('Failed to read template information')
 
@@ -86,7 +100,8 @@ class ChallengeTemplate(models.Model):
                 self.template_file = None
 
                 super().save(update_fields=['folder', 'name', 'title', 'description', 'docker_compose',
-                                            'containers_config', 'networks_config', 'template_file'])
+                                            'containers_config', 'networks_config', 'build_mode',
+                                            'template_file'])
             except Exception as e:
                 if os.path.exists(template_file.path):
                     os.remove(template_file.path)
@@ -140,11 +155,19 @@ class ChallengeNetworkConfig(models.Model):
             return False
 
 
+@receiver(post_delete, sender=ChallengeNetworkConfig)
+def release_network_subnet(sender, instance, **kwargs):
+    """Return the network subnet to the free-list once the network is gone"""
+    SubnetAllocation.objects.release(instance.subnet)
+
+
 class ChallengeDeployment(models.Model):
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     template = models.ForeignKey('challenges.ChallengeTemplate', related_name="deployments", on_delete=models.PROTECT)
     last_activity = models.DateTimeField(default=timezone.now)
     has_active_connections = models.BooleanField(default=False)
+    is_pooled = models.BooleanField(default=False, db_index=True,
+                                    help_text="Pre-provisioned deployment waiting to be claimed by a team")
 
     class Meta:
         verbose_name = "Deployment"
@@ -219,16 +242,25 @@ class DeploymentAccess(models.Model):
         verbose_name_plural = "Deployment Accesses"
 
     def save(self, *args, **kwargs):
-        """Override save to update deployment activity"""
-        super().save(*args, **kwargs)
+        """Override save to update deployment activity and count new sessions in the access total"""
+        if self._state.adding and self.is_active:
+            with transaction.atomic():
+                access_total = DeploymentAccessTotal.lock(self.deployment_id, self.team_id)
+                super().save(*args, **kwargs)
+                access_total.open_access(self.start_time)
+        else:
+            super().save(*args, **kwargs)
         self.deployment.update_activity()
 
     def end_session(self):
         """End the current session"""
-        self.end_time = timezone.now()
-        self.is_active = False
-        self.duration = self.end_time - self.start_time
-        self.save(update_fields=['end_time', 'is_active', 'duration'])
+        with transaction.atomic():
+            access_total = DeploymentAccessTotal.lock(self.deployment_id, self.team_id)
+            self.end_time = timezone.now()
+            self.is_active = False
+            self.duration = self.end_time - self.start_time
+            self.save(update_fields=['end_time', 'is_active', 'duration'])
+            access_total.close_access(self.end_time)
 
     def get_current_duration(self):
         """Get the current duration of an active session"""
@@ -242,3 +274,100 @@ class DeploymentAccess(models.Model):
         if self.is_active:
             return self.get_current_duration()
         return self.duration or timedelta(0)
+
+
+class DeploymentAccessTotal(models.Model):
+    """Merged access time of a team on a deployment, kept up to date as access sessions open and close
+
+    Overlapping sessions count once. While any session is open, the time since the first of them opened is
+    added to the stored total of closed periods. Access records of a team and deployment are only written
+    while holding the lock of its total.
+    """
+    CONSISTENCY_TOLERANCE = timedelta(seconds=1)
+
+    deployment = models.ForeignKey(ChallengeDeployment, related_name="access_totals", on_delete=models.CASCADE)
+    team = models.ForeignKey("accounts.Team", on_delete=models.CASCADE)
+    total = models.DurationField(default=timedelta(0), help_text="Merged duration of closed access periods")
+    open_sessions = models.PositiveIntegerField(default=0)
+    open_since = models.DateTimeField(null=True, blank=True, help_text="Start of the current open access period")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['deployment', 'team'], name='unique_deployment_access_total'),
+        ]
+        verbose_name = "Deployment Access Total"
+        verbose_name_plural = "Deployment Access Totals"
+
+    def __str__(self):
+        return f"{self.team} - {self.deployment_id} - {self.get_total()}"
+
+    def get_total(self, now=None) -> timedelta:
+        """Get merged access time including the current open period"""
+        if not self.open_sessions or not self.open_since:
+            return self.total
+        return self.total + max((now or timezone.now()) - self.open_since, timedelta(0))
+
+    def open_access(self, start_time):
+        if not self.open_sessions:
+            self.open_since = start_time
+        self.open_sessions += 1
+        self.save(update_fields=['open_sessions', 'open_since'])
+
+    def close_access(self, end_time, sessions: int = 1):
+        if self.open_sessions > sessions:
+            self.open_sessions -= sessions
+            self.save(update_fields=['open_sessions'])
+            return
+
+        if self.open_sessions and self.open_since:
+            self.total += max(end_time - self.open_since, timedelta(0))
+        self.open_sessions = 0
+        self.open_since = None
+        self.save(update_fields=['total', 'open_sessions', 'open_since'])
+
+    def reconcile(self, now=None) -> bool:
+        """Compare with the merged access records and repair the total if it drifted, requires the lock
+
+        Returns:
+            bool: True if the total was consistent
+        """
+        now = now or timezone.now()
+        total, open_since, open_sessions = self.measure(self.deployment_id, self.team_id, now)
+        expected = DeploymentAccessTotal(total=total, open_since=open_since, open_sessions=open_sessions)
+        if open_sessions == self.open_sessions \
+                and abs(expected.get_total(now) - self.get_total(now)) <= self.CONSISTENCY_TOLERANCE:
+            return True
+
+        logger.warning(f"Access total of team {self.team_id} on deployment {self.deployment_id} drifted: "
+                       f"{self.get_total(now)} with {self.open_sessions} open sessions, "
+                       f"expected {expected.get_total(now)} with {open_sessions}")
+        self.total, self.open_since, self.open_sessions = total, open_since, open_sessions
+        self.save(update_fields=['total', 'open_sessions', 'open_since'])
+        return False
+
+    @classmethod
+    def lock(cls, deployment_id, team_id) -> 'DeploymentAccessTotal':
+        """Get the total locked for update, creating it from the access records if missing"""
+        access_total = cls.objects.select_for_update().filter(deployment_id=deployment_id, team_id=team_id).first()
+        if access_total is not None:
+            return access_total
+
+        total, open_since, open_sessions = cls.measure(deployment_id, team_id)
+        try:
+            with transaction.atomic():
+                cls.objects.create(deployment_id=deployment_id, team_id=team_id, total=total,
+                                   open_since=open_since, open_sessions=open_sessions)
+        except IntegrityError:
+            pass
+        return cls.objects.select_for_update().get(deployment_id=deployment_id, team_id=team_id)
+
+    @staticmethod
+    def measure(deployment_id, team_id, now=None) -> tuple:
+        """Merge overlapping access periods of the team on the deployment
+
+        Returns:
+            tuple: (duration of closed periods, start of the open period, number of open sessions)
+        """
+        records = DeploymentAccess.objects.filter(deployment_id=deployment_id, team_id=team_id) \
+            .order_by('start_time').values_list('start_time', 'end_time', 'is_active')
+        return merge_access_periods(records, now or timezone.now())
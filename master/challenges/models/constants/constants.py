@@ -6,3 +6,57 @@ class DockerConstants:
     SSH_DIR = "/home/ctf-user/.ssh"
     AUTH_KEYS_FILE = "authorized_keys"
     AUTH_KEYS_PERMISSIONS = "600"
+    FLAG_PLACEHOLDER_PREFIX = "FLAG_PLACEHOLDER_"
+    FLAGS_FILE = "/.ctf-flags.sed"
+    FLAG_FILES_LIST = "/.ctf-flag-files"
+    # Appended to the Dockerfile of shared images - lists the files holding flag placeholders once per build,
+    # their paths inside the image are only known after the Dockerfile has copied them
+    FLAG_FILES_LIST_STEP = (
+        f'RUN find / -xdev -type f -exec grep -l "{FLAG_PLACEHOLDER_PREFIX}" {{}} + > {FLAG_FILES_LIST} '
+        f'2>/dev/null; true'
+    )
+    # Wraps the image command in shared build mode - substitutes flag placeholders in the files listed in
+    # FLAG_FILES_LIST with values written to FLAGS_FILE before the original entrypoint is executed.
+    # Images built before the list existed fall back to searching the filesystem
+    FLAG_INJECTION_SCRIPT = (
+        f'if [ -f {FLAGS_FILE} ]; then '
+        f'flags_script=$(cat {FLAGS_FILE}); rm -f {FLAGS_FILE}; '
+        f'{{ if [ -f {FLAG_FILES_LIST} ]; then cat {FLAG_FILES_LIST}; '
+        f'else find / -xdev -type f -exec grep -l "{FLAG_PLACEHOLDER_PREFIX}" {{}} + 2>/dev/null; fi; }} | '
+        f'while IFS= read -r file; do sed -i "$flags_script" "$file"; done; '
+        f'fi; exec "$@"'
+    )
+    SSH_PROBE_SECTION_MARKER = "@@ctf-probe:"
+    # Collects the output of every SSH session detection method in a single exec - each method's
+    # output follows its own section marker line
+    SSH_PROBE_SCRIPT = (
+        f'echo "{SSH_PROBE_SECTION_MARKER}ps"; '
+        f"ps aux 2>/dev/null | grep -E 'sshd: [a-zA-Z0-9]+@' | grep -v grep; "
+        f'echo "{SSH_PROBE_SECTION_MARKER}netstat"; '
+        f"netstat -tn 2>/dev/null | grep ':22' | grep 'ESTABLISHED'; "
+        f'echo "{SSH_PROBE_SECTION_MARKER}ss"; '
+        f"command -v ss >/dev/null 2>&1 && ss -tn | grep ':22' | grep 'ESTABLISHED'; "
+        f'echo "{SSH_PROBE_SECTION_MARKER}proc"; '
+        f"cat /proc/net/tcp 2>/dev/null | grep ':0016' | grep ' 01 ' | grep -v '0100007F'; "
+        f'echo "{SSH_PROBE_SECTION_MARKER}ps_user"; '
+        f"ps aux 2>/dev/null | grep -E 'sshd: .+@' | grep -v grep; "
+        f'echo "{SSH_PROBE_SECTION_MARKER}who"; '
+        f"who 2>/dev/null; "
+        f"true"
+    )
+    # Docker container states mapped to ContainerStatus values, any other state is treated as an error
+    CONTAINER_STATUS_MAP = {
+        "created": "created",
+        "running": "running",
+        "exited": "stopped",
+    }
+    # Docker error messages reported when a published host port is already taken
+    PORT_CONFLICT_ERRORS = (
+        "Ports are not available",
+        "port is already allocated",
+        "address already in use",
+    )
+    # Docker error messages reported when a requested network subnet is already in use
+    SUBNET_CONFLICT_ERRORS = (
+        "Pool overlaps",
+    )
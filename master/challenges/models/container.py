@@ -1,15 +1,17 @@
 import logging
-import random
-import socket
 from pathlib import Path
 
 from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 
 from accounts.models.enums import TeamRole
 from challenges.models.constants import DockerConstants
-from challenges.models.enums import ContainerStatus
-from challenges.models.exceptions import ContainerOperationError
+from challenges.models.enums import ContainerStatus, TemplateBuildMode
+from challenges.models.exceptions import ContainerOperationError, PortUnavailableError
+from challenges.models.port_allocation import PortAllocation
+from challenges.utils.template_helpers import create_build_context, get_build_context_fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +19,17 @@ logger = logging.getLogger(__name__)
 class ChallengeContainerManager(models.Manager):
     """Custom manager for ChallengeContainer model"""
 
-    def create_with_docker(self, template, temp_dir, session, blue_team, docker_service, path="", is_entrypoint=False):
-        """Create a new challenge container with Docker container"""
+    def create_with_docker(self, template, temp_dir, session, blue_team, docker_service, path="", is_entrypoint=False,
+                           flag_values=None, deployment=None, start=True):
+        """Create a new challenge container with Docker container
+
+        Templates in shared build mode reuse one image per template build context and receive
+        their flag values at container start instead of at image build. Per-team images are built
+        from an in-memory build context with the flag values substituted. Containers of pooled
+        deployments are created without session and team and are not started.
+        """
+        port = None
+        docker_container = None
         try:
             template_name = Path(temp_dir).name if temp_dir else template.name
             if path:
@@ -29,25 +40,63 @@ class ChallengeContainerManager(models.Manager):
                 build_path = str(template.get_full_template_path())
                 container_name = template_name
 
-            tag = f"{DockerConstants.CONTAINER_PREFIX}-{template_name}-{Path(build_path).name}-{session.pk}-{blue_team.pk}"
-
-            docker_service.build_image(build_path, tag)
-            port = self.generate_port_number(tag)
-            docker_container = docker_service.create_container(container_name=tag, image_tag=tag, port=port)
-
+            tag = (f"{DockerConstants.CONTAINER_PREFIX}-{template_name}-{Path(build_path).name}-"
+                   f"{self.get_owner_suffix(session, blue_team, deployment)}")
+
+            if template.build_mode == TemplateBuildMode.SHARED:
+                image_tag = (f"{DockerConstants.CONTAINER_PREFIX}-{template_name}-{Path(build_path).name}:"
+                             f"{get_build_context_fingerprint(build_path)}")
+                template_path = temp_dir or template.get_full_template_path()
+                docker_service.get_or_build_image(
+                    build_path, image_tag,
+                    lambda: create_build_context(build_path, template_path, {}, DockerConstants.FLAG_FILES_LIST_STEP)
+                )
+                flag_values = flag_values or {}
+            else:
+                image_tag = tag
+                build_context = create_build_context(build_path, temp_dir or template.get_full_template_path(),
+                                                     flag_values or {})
+                docker_service.build_image(build_path, tag, fileobj=build_context)
+                flag_values = None
+
+            while True:
+                port = PortAllocation.objects.allocate()
+                try:
+                    docker_container = docker_service.create_container(container_name=tag, image_tag=image_tag,
+                                                                       port=port, flag_values=flag_values,
+                                                                       start=start)
+                    break
+                except PortUnavailableError as e:
+                    logger.warning(f"Port {port} is in use on the host, retrying with another port: {e}")
+                    docker_service.remove_container(tag, force=True)
+                    PortAllocation.objects.release(port, blocked=True)
+                    port = None
+
+            logger.info(f"Allocated port {port} for new container {tag}")
             return self.create(
                 name=tag,
                 template_name=container_name,
                 docker_id=docker_container.id,
-                status=ContainerStatus.RUNNING,
+                status=ContainerStatus.RUNNING if start else ContainerStatus.CREATED,
                 blue_team=blue_team,
                 is_entrypoint=is_entrypoint,
-                port=port
+                port=port,
+                deployment=deployment
             )
         except Exception as e:
             logger.error(f"Failed to create challenge container: {e}")
+            if docker_container:
+                docker_service.remove_container(docker_container.id, force=True)
+            PortAllocation.objects.release(port)
             raise ContainerOperationError(f"Failed to create container: {e}")
 
+    @staticmethod
+    def get_owner_suffix(session=None, blue_team=None, deployment=None) -> str:
+        """Get container name suffix identifying its owner, pooled deployments have no owner yet"""
+        if session and blue_team:
+            return f"{session.pk}-{blue_team.pk}"
+        return f"pool-{deployment.pk}"
+
     def get_by_docker_id(self, docker_id):
         """Get container by Docker ID"""
         return self.get(docker_id=docker_id)
@@ -67,44 +116,6 @@ class ChallengeContainerManager(models.Manager):
             models.Q(red_team=team)
         )
 
-    def generate_port_number(self, tag):
-        """Generate a random port number for new container"""
-        max_attempts = 15
-        restricted_ranges = [
-            (0, 1024),
-            (49152, 65535)
-        ]
-
-        for attempt in range(max_attempts):
-            port = random.randint(30000, 49000)
-
-            in_restricted_range = any(lower <= port <= upper for lower, upper in restricted_ranges)
-            if in_restricted_range:
-                logger.debug(f"Port {port} is in a restricted range, skipping")
-                continue
-
-            if ChallengeContainer.objects.filter(port=port).exists():
-                logger.warning(f"Port {port} is already in use in database, attempt {attempt + 1}/{max_attempts}")
-                continue
-
-            if self._is_port_available(port):
-                logger.info(f"Generated available port {port} for new container {tag}")
-                return port
-            else:
-                logger.warning(f"Port {port} is not available on system, attempt {attempt + 1}/{max_attempts}")
-
-        raise ContainerOperationError(f"Failed to find available port after {max_attempts} attempts")
-
-    @staticmethod
-    def _is_port_available(port):
-        """Check if a port is available to bind"""
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            try:
-                s.bind(('0.0.0.0', port))
-                return True
-            except (socket.error, OSError):
-                return False
-
 
 class ChallengeContainer(models.Model):
     name = models.CharField(max_length=128, unique=True)
@@ -210,3 +221,9 @@ class ChallengeContainer(models.Model):
         except Exception as e:
             logger.error(f"Failed to delete container {self.pk}: {e}")
             return False
+
+
+@receiver(post_delete, sender=ChallengeContainer)
+def release_container_port(sender, instance, **kwargs):
+    """Return the published port to the free-list once the container is gone"""
+    PortAllocation.objects.release(instance.port)
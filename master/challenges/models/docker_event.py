@@ -0,0 +1,35 @@
+from typing import Optional
+
+from django.db import models
+
+
+class DockerEventCursor(models.Model):
+    name = models.CharField(max_length=64, unique=True, default="default")
+    time_nano = models.BigIntegerField(default=0, help_text="Time of the last processed Docker event in nanoseconds")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Docker Event Cursor"
+        verbose_name_plural = "Docker Event Cursors"
+
+    def __str__(self):
+        return f"Docker event cursor {self.name} ({self.time_nano})"
+
+    @classmethod
+    def get_cursor(cls, name: str = "default") -> "DockerEventCursor":
+        """Get the cursor with given name, creating it if it does not exist"""
+        cursor, created = cls.objects.get_or_create(name=name)
+        return cursor
+
+    def get_since(self) -> Optional[str]:
+        """Get the cursor position in the format accepted by the Docker events API"""
+        if not self.time_nano:
+            return None
+        seconds, nanos = divmod(self.time_nano, 1_000_000_000)
+        return f"{seconds}.{nanos:09d}"
+
+    def advance(self, time_nano: int):
+        """Move the cursor forward to given event time"""
+        if time_nano > self.time_nano:
+            self.time_nano = time_nano
+            self.save(update_fields=['time_nano', 'updated_at'])
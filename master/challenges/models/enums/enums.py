@@ -7,3 +7,14 @@ class ContainerStatus(models.TextChoices):
     STOPPED = "stopped"
     DELETED = "deleted"
     ERROR = "error"
+
+
+class TemplateBuildMode(models.TextChoices):
+    PER_TEAM = "per_team", "Per team"
+    SHARED = "shared", "Shared"
+
+
+class ContainerOperation(models.TextChoices):
+    START = "start", "Start"
+    STOP = "stop", "Stop"
+    REMOVE = "remove", "Remove"
@@ -21,3 +21,23 @@ class ContainerNotFoundError(ContainerOperationError):
 class ContainerStateError(ContainerOperationError):
     """Raised when container is in invalid state for operation"""
     pass
+
+
+class SSHDetectionUnavailableError(CTFBaseException):
+    """Raised when an SSH detection backend cannot be used on this host"""
+    pass
+
+
+class PortUnavailableError(DockerOperationError):
+    """Raised when a host port requested for a container is already in use"""
+    pass
+
+
+class SubnetUnavailableError(DockerOperationError):
+    """Raised when a subnet requested for a network overlaps an existing network"""
+    pass
+
+
+class FlagAlreadyCapturedError(CTFBaseException):
+    """Raised when a flag was captured by another submission first"""
+    pass
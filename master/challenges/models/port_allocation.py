@@ -0,0 +1,88 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from challenges.models.exceptions import ContainerOperationError
+
+logger = logging.getLogger(__name__)
+
+
+class PortAllocationManager(models.Manager):
+    """Free-list of host ports published by challenge containers"""
+
+    def allocate(self) -> int:
+        """Allocate the lowest free port, safe for concurrent provisioning workers"""
+        for attempt in range(2):
+            blocked_since = timezone.now() - timedelta(seconds=settings.CONTAINER_PORT_BLOCK_DURATION)
+            with transaction.atomic():
+                allocation = self.select_for_update(skip_locked=True).filter(
+                    port__gte=settings.CONTAINER_PORT_RANGE_START,
+                    port__lte=settings.CONTAINER_PORT_RANGE_END,
+                    is_allocated=False
+                ).exclude(blocked_at__gte=blocked_since).order_by('port').first()
+
+                if allocation:
+                    allocation.is_allocated = True
+                    allocation.allocated_at = timezone.now()
+                    allocation.save(update_fields=['is_allocated', 'allocated_at'])
+                    logger.debug(f"Allocated port {allocation.port}")
+                    return allocation.port
+
+            if attempt == 0:
+                self.populate()
+
+        raise ContainerOperationError("No free port available in the container port range")
+
+    def release(self, port: int, blocked: bool = False) -> bool:
+        """Return a port to the free-list, blocked ports are skipped for a while since the host holds them"""
+        if not port:
+            return False
+        released = self.filter(port=port, is_allocated=True).update(
+            is_allocated=False,
+            allocated_at=None,
+            blocked_at=timezone.now() if blocked else None
+        )
+        if released:
+            logger.debug(f"Released port {port}{' (blocked)' if blocked else ''}")
+        return bool(released)
+
+    def populate(self) -> int:
+        """Create missing free-list entries for the configured range, marking ports used by existing containers"""
+        from challenges.models.container import ChallengeContainer
+
+        used_ports = set(ChallengeContainer.objects.exclude(port=None).values_list('port', flat=True))
+        now = timezone.now()
+        created = self.bulk_create(
+            [
+                self.model(port=port, is_allocated=port in used_ports, allocated_at=now if port in used_ports else None)
+                for port in range(settings.CONTAINER_PORT_RANGE_START, settings.CONTAINER_PORT_RANGE_END + 1)
+            ],
+            ignore_conflicts=True,
+            batch_size=1000
+        )
+        logger.info(f"Populated port free-list with range {settings.CONTAINER_PORT_RANGE_START}-"
+                    f"{settings.CONTAINER_PORT_RANGE_END}")
+        return len(created)
+
+
+class PortAllocation(models.Model):
+    port = models.PositiveIntegerField(unique=True)
+    is_allocated = models.BooleanField(default=False)
+    allocated_at = models.DateTimeField(null=True, blank=True)
+    blocked_at = models.DateTimeField(null=True, blank=True,
+                                      help_text="Time the port was found to be in use outside of the platform")
+
+    objects = PortAllocationManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["is_allocated", "port"]),
+        ]
+        verbose_name = "Port Allocation"
+        verbose_name_plural = "Port Allocations"
+
+    def __str__(self):
+        return f"Port {self.port} ({'allocated' if self.is_allocated else 'free'})"
@@ -0,0 +1,139 @@
+import ipaddress
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from challenges.models.exceptions import DockerOperationError
+
+logger = logging.getLogger(__name__)
+
+
+class SubnetAllocationManager(models.Manager):
+    """Free-list of subnets carved out of the configured pool for challenge networks"""
+
+    def allocate(self) -> str:
+        """Allocate the lowest free subnet in CIDR notation, safe for concurrent provisioning workers
+
+        Subnets overlapping allocations made with another pool or prefix are skipped, so the settings can change
+        while networks created with the previous ones are still running.
+        """
+        for attempt in range(2):
+            blocked_since = timezone.now() - timedelta(seconds=settings.NETWORK_SUBNET_BLOCK_DURATION)
+            with transaction.atomic():
+                allocation = self.select_for_update(skip_locked=True).filter(
+                    pool=settings.NETWORK_SUBNET_POOL,
+                    prefix_length=settings.NETWORK_SUBNET_PREFIX,
+                    is_allocated=False
+                ).exclude(blocked_at__gte=blocked_since).exclude(
+                    network_address__in=self._get_overlapping_addresses()
+                ).order_by('network_address').first()
+
+                if allocation:
+                    allocation.is_allocated = True
+                    allocation.allocated_at = timezone.now()
+                    allocation.save(update_fields=['is_allocated', 'allocated_at'])
+                    logger.debug(f"Allocated subnet {allocation.cidr}")
+                    return allocation.cidr
+
+            if attempt == 0:
+                self.populate()
+
+        raise DockerOperationError(f"No free subnet available in pool {settings.NETWORK_SUBNET_POOL}")
+
+    def release(self, network_address: str, blocked: bool = False) -> bool:
+        """Return a subnet to the free-list, blocked subnets are skipped for a while since they overlap the host
+
+        Accepts a CIDR or a bare network address, allocated subnets never overlap so the address alone is unique.
+        """
+        if not network_address:
+            return False
+        filters = {'network_address': network_address.split('/')[0], 'is_allocated': True}
+        if '/' in network_address:
+            filters['prefix_length'] = int(network_address.split('/')[1])
+        released = self.filter(**filters).update(
+            is_allocated=False,
+            allocated_at=None,
+            blocked_at=timezone.now() if blocked else None
+        )
+        if released:
+            logger.debug(f"Released subnet {network_address}{' (blocked)' if blocked else ''}")
+        return bool(released)
+
+    def populate(self) -> int:
+        """Create missing free-list entries by splitting the configured pool into subnets of the configured prefix"""
+        from challenges.models.challenge import ChallengeNetworkConfig
+
+        pool = ipaddress.ip_network(settings.NETWORK_SUBNET_POOL)
+        used_addresses = set(ChallengeNetworkConfig.objects.values_list('subnet', flat=True))
+        now = timezone.now()
+        created = self.bulk_create(
+            [
+                self.model(
+                    network_address=str(subnet.network_address),
+                    prefix_length=subnet.prefixlen,
+                    pool=settings.NETWORK_SUBNET_POOL,
+                    is_allocated=str(subnet.network_address) in used_addresses,
+                    allocated_at=now if str(subnet.network_address) in used_addresses else None
+                )
+                for subnet in pool.subnets(new_prefix=settings.NETWORK_SUBNET_PREFIX)
+            ],
+            ignore_conflicts=True,
+            batch_size=1000
+        )
+        logger.info(f"Populated subnet free-list with /{settings.NETWORK_SUBNET_PREFIX} subnets of {pool}")
+        return len(created)
+
+    def _get_overlapping_addresses(self) -> set[str]:
+        """Get network addresses of configured pool subnets overlapping allocations of another pool or prefix"""
+        pool = ipaddress.ip_network(settings.NETWORK_SUBNET_POOL)
+        prefix = settings.NETWORK_SUBNET_PREFIX
+        allocations = self.filter(is_allocated=True).exclude(
+            pool=settings.NETWORK_SUBNET_POOL,
+            prefix_length=prefix
+        ).values_list('network_address', 'prefix_length')
+
+        addresses = set()
+        for network_address, prefix_length in allocations:
+            network = ipaddress.ip_network(f"{network_address}/{prefix_length}")
+            if network.version != pool.version or not network.overlaps(pool):
+                continue
+            if prefix_length >= prefix:
+                addresses.add(str(network.supernet(new_prefix=prefix).network_address))
+            else:
+                # Overlapping networks are nested, only the part inside the pool holds candidates
+                inner = network if network.subnet_of(pool) else pool
+                addresses.update(str(subnet.network_address) for subnet in inner.subnets(new_prefix=prefix))
+        return addresses
+
+
+class SubnetAllocation(models.Model):
+    network_address = models.GenericIPAddressField()
+    prefix_length = models.PositiveSmallIntegerField()
+    pool = models.CharField(max_length=64, help_text="Subnet pool this entry was carved from")
+    is_allocated = models.BooleanField(default=False)
+    allocated_at = models.DateTimeField(null=True, blank=True)
+    blocked_at = models.DateTimeField(null=True, blank=True,
+                                      help_text="Time the subnet was found to overlap a network outside the platform")
+
+    objects = SubnetAllocationManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["pool", "prefix_length", "network_address"],
+                                    name="unique_subnet_allocation"),
+        ]
+        indexes = [
+            models.Index(fields=["pool", "prefix_length", "is_allocated", "network_address"]),
+        ]
+        verbose_name = "Subnet Allocation"
+        verbose_name_plural = "Subnet Allocations"
+
+    def __str__(self):
+        return f"Subnet {self.cidr} ({'allocated' if self.is_allocated else 'free'})"
+
+    @property
+    def cidr(self) -> str:
+        return f"{self.network_address}/{self.prefix_length}"
@@ -2,10 +2,18 @@ from .docker_service import DockerService
 from .container_service import ContainerService
 from .challenge_service import ChallengeService
 from .deployment_service import DeploymentService
+from .provisioning_service import ProvisioningService
+from .ssh_detection_service import SSHDetectionService
+from .docker_event_service import DockerEventService
+from .warm_pool_service import WarmPoolService
 
 __all__ = [
     'ContainerService',
     'DockerService',
     'ChallengeService',
     'DeploymentService',
+    'ProvisioningService',
+    'SSHDetectionService',
+    'DockerEventService',
+    'WarmPoolService',
 ]
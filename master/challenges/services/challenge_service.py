@@ -1,49 +1,18 @@
 import logging
-import os
-import re
-import shutil
-from pathlib import Path
 from typing import Optional
 
-from django.conf import settings
+from django.db import transaction
 
-from challenges.models import ChallengeDeployment, ChallengeNetworkConfig
-from challenges.models.enums import ContainerStatus
-from challenges.models.exceptions import ContainerOperationError, DockerOperationError
+from challenges.models import ChallengeContainer, ChallengeDeployment, ChallengeNetworkConfig, SubnetAllocation
+from challenges.models.constants import DockerConstants
+from challenges.models.enums import ContainerStatus, TemplateBuildMode
+from challenges.models.exceptions import ContainerOperationError, DockerOperationError, SubnetUnavailableError
 from challenges.services import DockerService, ContainerService
 from ctf.models import Flag
 
 logger = logging.getLogger(__name__)
 
 
-def create_temp_folder(template):
-    """Create temporary folder for challenge files"""
-    temp_dir = f"temp/{template.name}"
-
-    temp_path = Path(settings.BASE_DIR) / temp_dir
-    temp_path.parent.mkdir(parents=True, exist_ok=True)
-
-    source_path = template.get_full_template_path()
-    if not source_path.exists():
-        logger.warning(f"Source path {source_path} does not exist, creating empty temp directory")
-        temp_path.mkdir(parents=True, exist_ok=True)
-        return temp_dir
-
-    logger.info(f"Copying template files from {source_path} to {temp_dir}")
-    shutil.copytree(source_path, temp_dir)
-    return temp_dir
-
-
-def remove_temp_folder(folder):
-    """Remove temp folder"""
-    try:
-        parent = Path(folder).parent
-        logger.info(f"Removing temp folder {parent}")
-        shutil.rmtree(Path(settings.BASE_DIR) / parent)
-    except Exception as e:
-        logger.error(f"Error removing temp folder {folder}: {str(e)}")
-
-
 class ChallengeService:
     def __init__(self, docker_service=None, container_service=None):
         self.docker_service = docker_service or DockerService()
@@ -53,50 +22,146 @@ class ChallengeService:
         """Prepare a challenge (single or multi-container) for a blue team"""
         template = session.template
         is_single_container = (bool(template.containers_config) and len(dict(template.containers_config)) == 1)
+        is_shared_build = template.build_mode == TemplateBuildMode.SHARED
         logger.info(
             f"Preparing '{template.name}' for blue team {blue_team.id} ({'single' if is_single_container else 'multi'}-container)")
-        temp_challenge_dir = create_temp_folder(template)
+        if is_shared_build:
+            deployment = self.claim_pooled_deployment(session, blue_team)
+            if deployment:
+                return deployment
 
+        deployment = None
+        flag_mapping = {}
         try:
-            flag_mapping = self.prepare_flags(temp_challenge_dir, blue_team, template)
+            temp_challenge_dir = str(template.get_full_template_path())
+            flag_mapping = self.prepare_flags(blue_team, template)
+            flag_values = self.get_flag_values(flag_mapping)
             deployment = ChallengeDeployment.objects.create(template=template)
 
             if is_single_container:
                 containers = self.prepare_single_container(template, temp_challenge_dir, session, blue_team,
-                                                           flag_mapping)
+                                                           flag_mapping, flag_values, deployment)
                 network = None
             else:
                 containers = self.prepare_multi_container(template, temp_challenge_dir, session, blue_team,
-                                                          flag_mapping)
+                                                          flag_mapping, flag_values, deployment)
                 container_map = {container.template_name: container for container in containers}
                 network = self.setup_container_networks(template, session.pk, deployment.pk, container_map, containers)
 
-            deployment.containers.set(containers)
-
-            if network:
-                if isinstance(network, list):
-                    logger.debug(f"Adding {len(network)} networks to deployment")
-                    for net in network:
-                        deployment.networks.add(net)
-                else:
-                    deployment.networks.add(network)
-
-            deployment.save()
+            self._attach_to_deployment(deployment, containers, network)
             return deployment
         except (ContainerOperationError, DockerOperationError, ValueError) as e:
             logger.error(f"Error preparing challenge: {str(e)}")
-            if not is_single_container:
-                self.docker_service.prune_networks()
+            self.cleanup_failed_deployment(deployment, flag_mapping)
             raise e
         except Exception as e:
             logger.exception(f"Unexpected error preparing challenge: {str(e)}")
-            if not is_single_container:
-                self.docker_service.prune_networks()
+            self.cleanup_failed_deployment(deployment, flag_mapping)
+            raise e
+
+    def prepare_pooled_deployment(self, template) -> ChallengeDeployment:
+        """Create a deployment with stopped containers and networks, ready to be claimed by a team"""
+        is_single_container = (bool(template.containers_config) and len(dict(template.containers_config)) == 1)
+        template_path = str(template.get_full_template_path())
+        logger.info(f"Preparing pooled deployment of '{template.name}'")
+
+        deployment = ChallengeDeployment.objects.create(template=template, is_pooled=True)
+        try:
+            if is_single_container:
+                container = self.container_service.create_game_container(template, template_path, None, None,
+                                                                         deployment=deployment, start=False)
+                containers = [container] if container else []
+                network = None
+            else:
+                containers = self.container_service.create_related_containers(template, template_path, None, None,
+                                                                              deployment=deployment, start=False)
+                container_map = {container.template_name: container for container in containers}
+                network = self.setup_container_networks(template, "pool", deployment.pk, container_map,
+                                                        containers) if containers else None
+
+            if not containers:
+                raise ContainerOperationError("Failed to create pooled containers")
+
+            self._attach_to_deployment(deployment, containers, network)
+            return deployment
+        except Exception as e:
+            logger.error(f"Error preparing pooled deployment: {str(e)}")
+            self.cleanup_failed_deployment(deployment, {})
+            raise e
+
+    def claim_pooled_deployment(self, session, blue_team) -> Optional[ChallengeDeployment]:
+        """Claim a pooled deployment of the session template, inject team flags and SSH keys and start it"""
+        template = session.template
+        with transaction.atomic():
+            deployment = ChallengeDeployment.objects.select_for_update(skip_locked=True).filter(
+                template=template,
+                is_pooled=True
+            ).order_by('pk').first()
+            if not deployment:
+                return None
+
+            deployment.is_pooled = False
+            deployment.save(update_fields=['is_pooled'])
+
+        logger.info(f"Claimed pooled deployment {deployment.pk} of '{template.name}' for blue team {blue_team.id}")
+        is_single_container = (bool(template.containers_config) and len(dict(template.containers_config)) == 1)
+        flag_mapping = {}
+        try:
+            flag_mapping = self.prepare_flags(blue_team, template)
+            flag_values = self.get_flag_values(flag_mapping)
+            pool_suffix = ChallengeContainer.objects.get_owner_suffix(deployment=deployment)
+            team_suffix = ChallengeContainer.objects.get_owner_suffix(session, blue_team)
+
+            containers = list(deployment.containers.all())
+            for container in containers:
+                docker_container = self.docker_service.get_container(container.docker_id)
+                if flag_values:
+                    self.docker_service.put_file(docker_container, DockerConstants.FLAGS_FILE,
+                                                 self.docker_service.get_flags_script(flag_values))
+
+                container.name = container.name.removesuffix(pool_suffix) + team_suffix
+                docker_container.rename(container.name)
+                # The flags entrypoint only runs on start, a container started while pooled has to be restarted
+                docker_container.reload()
+                if docker_container.status in ('created', 'exited'):
+                    docker_container.start()
+                else:
+                    docker_container.restart()
+
+                container.blue_team = blue_team
+                container.status = ContainerStatus.RUNNING
+                container.save(update_fields=['name', 'blue_team', 'status'])
+
+            for container in containers:
+                self.assign_flags_to_container(container, flag_mapping)
+                if is_single_container or container.is_entrypoint:
+                    self.configure_container_ssh(container, blue_team)
+                self.configure_container_port(container)
+
+            deployment.update_activity()
+            return deployment
+        except Exception as e:
+            logger.error(f"Error claiming pooled deployment {deployment.pk}: {str(e)}")
+            self.cleanup_failed_deployment(deployment, flag_mapping)
             raise e
-        finally:
-            remove_temp_folder(temp_challenge_dir)
 
-    def prepare_single_container(self, template, temp_dir, session, blue_team, flag_mapping):
+    @staticmethod
+    def _attach_to_deployment(deployment, containers, network):
+        """Link created containers and networks to the deployment"""
+        deployment.containers.set(containers)
+
+        if network:
+            if isinstance(network, list):
+                logger.debug(f"Adding {len(network)} networks to deployment")
+                for net in network:
+                    deployment.networks.add(net)
+            else:
+                deployment.networks.add(network)
+
+        deployment.save()
+
+    def prepare_single_container(self, template, temp_dir, session, blue_team, flag_mapping, flag_values=None,
+                                 deployment=None):
         """Prepare a single container challenge"""
         logger.info(f"Creating single container for template {template.name}")
         container = self.container_service.create_game_container(
@@ -104,6 +169,8 @@ class ChallengeService:
             temp_dir=temp_dir,
             session=session,
             blue_team=blue_team,
+            flag_values=flag_values,
+            deployment=deployment,
         )
 
         if not container:
@@ -118,11 +185,12 @@ class ChallengeService:
 
         return [container]
 
-    def prepare_multi_container(self, template, temp_dir, session, blue_team, flag_mapping):
+    def prepare_multi_container(self, template, temp_dir, session, blue_team, flag_mapping, flag_values=None,
+                                deployment=None):
         """Prepare a multi-container challenge"""
         logger.info(f"Creating related containers for template {template.name}")
         containers = self.container_service.create_related_containers(
-            template, temp_dir, session, blue_team
+            template, temp_dir, session, blue_team, flag_values, deployment
         )
 
         if not containers:
@@ -142,6 +210,23 @@ class ChallengeService:
 
         return containers
 
+    @staticmethod
+    def cleanup_failed_deployment(deployment, flag_mapping):
+        """Remove containers, networks and flags created by a failed preparation so it can be retried"""
+        try:
+            flag_ids = [flag_data["flag"].pk for flags_list in flag_mapping.values() for flag_data in flags_list]
+            Flag.objects.filter(pk__in=flag_ids).delete()
+
+            if deployment and deployment.pk:
+                logger.info(f"Cleaning up failed deployment {deployment.pk}")
+                for container in deployment.containers.all():
+                    container.delete()
+                for network in deployment.networks.all():
+                    network.delete()
+                deployment.delete()
+        except Exception as e:
+            logger.error(f"Error cleaning up failed deployment: {str(e)}")
+
     def setup_container_networks(self, template, session_pk, deployment_pk, container_map, containers):
         """Setup networks for containers based on template config or create a default network"""
         logger.info(f"Setting up networks for challenge template {template.name}")
@@ -160,7 +245,7 @@ class ChallengeService:
 
                     if network_name and container_names:
                         logger.info(f"Creating network '{network_name}' with {len(container_names)} containers")
-                        network, subnet = self.docker_service.create_network()
+                        network, subnet = self.create_network()
                         networks[network_name] = network
 
                         db_network = ChallengeNetworkConfig.objects.create(
@@ -196,7 +281,7 @@ class ChallengeService:
                 return None
         else:
             logger.info("Creating a single network for all containers")
-            challenge_network, subnet = self.container_service.docker.create_network()
+            challenge_network, subnet = self.create_network()
 
             db_network = ChallengeNetworkConfig.objects.create(
                 name=f"default-{session_pk}-{deployment_pk}",
@@ -219,6 +304,19 @@ class ChallengeService:
             logger.info(f"Created default network with subnet {subnet}")
             return db_network
 
+    def create_network(self):
+        """Create a Docker network on a subnet allocated from the configured pool"""
+        while True:
+            subnet = SubnetAllocation.objects.allocate()
+            try:
+                return self.docker_service.create_network(subnet)
+            except SubnetUnavailableError as e:
+                logger.warning(f"Subnet {subnet} is in use on the host, retrying with another subnet: {e}")
+                SubnetAllocation.objects.release(subnet, blocked=True)
+            except Exception:
+                SubnetAllocation.objects.release(subnet)
+                raise
+
     def _extract_network_definitions(self, networks_config):
         """
         Extract network definitions from networks_config regardless of structure.
@@ -301,7 +399,9 @@ class ChallengeService:
         container.save()
         logger.debug(f"Assigned {len(flag_objects)} flags to container {container.name}")
 
-    def prepare_flags(self, temp_dir, team, template):
+    @staticmethod
+    def prepare_flags(team, template):
+        """Create flags of all template containers for the team"""
         logger.info(f"Preparing flags for template {template.name}, team {team.id}")
         flag_mapping = {}
         for key, value in template.containers_config.items():
@@ -318,44 +418,13 @@ class ChallengeService:
                     logger.debug(f"Created {len(container_flags)} flags for container {key}")
                     flag_mapping[key] = container_flags
 
-        self._replace_flag_placeholders(temp_dir, flag_mapping)
         return flag_mapping
 
-    def _replace_flag_placeholders(self, temp_dir, flag_mapping):
-        """Replace flag placeholders in all files under temp_dir"""
-        total_files = 0
-        replaced_files = 0
-
-        for root, _, files in os.walk(temp_dir):
-            for file in files:
-                filepath = Path(root) / file
-                total_files += 1
-                if filepath.is_file() and self.replace_placeholders(filepath, flag_mapping):
-                    replaced_files += 1
-
-        logger.debug(f"Replaced flag placeholders in {replaced_files}/{total_files} files")
-
     @staticmethod
-    def replace_placeholders(filepath: Path, flag_mapping):
-        try:
-            content = filepath.read_text(encoding='utf-8')
-
-            pattern = r'FLAG_PLACEHOLDER_\d+'
-            if not re.search(pattern, content):
-                return False
-
-            modified = False
-            for container_name, flags_list in flag_mapping.items():
-                for flag_data in flags_list:
-                    if flag_data["placeholder"] in content:
-                        content = content.replace(flag_data["placeholder"], flag_data["flag"].value)
-                        modified = True
-
-            if modified:
-                filepath.write_text(content, encoding='utf-8')
-                return True
-
-            return False
-        except Exception as e:
-            logger.error(f"Error processing {filepath}: {str(e)}")
-            return False
+    def get_flag_values(flag_mapping) -> dict[str, str]:
+        """Get placeholder to flag value mapping of all flags in the deployment"""
+        return {
+            flag_data["placeholder"]: flag_data["flag"].value
+            for flags_list in flag_mapping.values()
+            for flag_data in flags_list
+        }
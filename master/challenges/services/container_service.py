@@ -1,11 +1,15 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+from django.conf import settings
+from django.db import connection
+
 from accounts.models import Team
 from challenges.models import ChallengeContainer
 from challenges.models.constants import DockerConstants
-from challenges.models.enums import ContainerStatus
+from challenges.models.enums import ContainerOperation, ContainerStatus
 from challenges.models.exceptions import ContainerOperationError
 from challenges.services import DockerService
 from ctf.models import GameSession
@@ -23,7 +27,8 @@ class ContainerService:
             cls._instance.docker = kwargs.get('docker_service') or DockerService()
         return cls._instance
 
-    def create_related_containers(self, template, temp_dir, session, blue_team):
+    def create_related_containers(self, template, temp_dir, session, blue_team, flag_values=None, deployment=None,
+                                  start=True):
         """Batch create related containers"""
         try:
             containers = []
@@ -31,7 +36,8 @@ class ContainerService:
             for filepath in template_path.rglob("*"):
                 if filepath.is_file():
                     if filepath.name == 'Dockerfile' or filepath.name.startswith('Dockerfile.'):
-                        container = self.create_game_container(template, temp_dir, session, blue_team, filepath)
+                        container = self.create_game_container(template, temp_dir, session, blue_team, filepath,
+                                                               flag_values, deployment, start)
                         if container:
                             containers.append(container)
                         else:
@@ -50,7 +56,8 @@ class ContainerService:
             logger.error(f"Error batch creating containers: {e}")
             return []
 
-    def create_game_container(self, template, temp_dir, session, blue_team, path="") -> Optional[ChallengeContainer]:
+    def create_game_container(self, template, temp_dir, session, blue_team, path="",
+                              flag_values=None, deployment=None, start=True) -> Optional[ChallengeContainer]:
         """Create a new game container from template"""
         try:
             logger.info(f"Creating new game container {path if path else temp_dir}")
@@ -74,7 +81,10 @@ class ContainerService:
                 blue_team=blue_team,
                 docker_service=self.docker,
                 path=path,
-                is_entrypoint=is_entrypoint
+                is_entrypoint=is_entrypoint,
+                flag_values=flag_values,
+                deployment=deployment,
+                start=start
             )
         except Exception as e:
             logger.error(f"Failed to create game container: {e}")
@@ -184,13 +194,7 @@ class ContainerService:
                 container.save(update_fields=['status'])
                 return False
 
-            status_map = {
-                "created": ContainerStatus.CREATED,
-                "running": ContainerStatus.RUNNING,
-                "exited": ContainerStatus.STOPPED,
-            }
-
-            new_status = status_map.get(docker_container.status, ContainerStatus.ERROR)
+            new_status = DockerConstants.CONTAINER_STATUS_MAP.get(docker_container.status, ContainerStatus.ERROR)
             if new_status != container.status:
                 container.status = new_status
                 container.save(update_fields=['status'])
@@ -239,32 +243,105 @@ class ContainerService:
             logger.error(f"Failed to start container {container.docker_id}: {e}")
             return False
 
-    def stop_session_containers(self, session: GameSession) -> bool:
+    def stop_session_containers(self, session: GameSession, timeout: int = None, progress_callback=None) -> bool:
         """Stop all session containers"""
         try:
             containers = session.get_containers()
             logger.info(f"Stopping {len(containers)} containers for session {session.name}")
 
-            for container in containers:
-                self.sync_container_status(container)
-
-                if container.is_running():
-                    logger.info(f"Stopping container {container.name}")
-                    stopped = self.stop_container(container)
-                    if not stopped:
-                        logger.warning(f"Failed to stop container {container.name}")
-                else:
-                    logger.info(f"Container {container.name} is already stopped (status: {container.status})")
-
+            results = self.bulk_container_operation(containers, ContainerOperation.STOP, timeout=timeout,
+                                                    progress_callback=progress_callback)
+            if results["failed"]:
+                logger.warning(f"Failed to stop {len(results['failed'])} containers of session {session.name}")
             return True
         except Exception as e:
             logger.error(f"Failed to stop session containers: {e}")
             return False
 
-    def stop_container(self, container: ChallengeContainer) -> bool:
+    def bulk_container_operation(self, containers, operation: ContainerOperation, timeout: int = None,
+                                 max_workers: int = None, progress_callback=None) -> dict:
+        """Start, stop or remove many containers concurrently
+
+        Containers already in the requested state are skipped. Stopped containers get `timeout`
+        seconds to exit before they are killed. `progress_callback(completed, total)` is called
+        after every finished container.
+
+        Returns:
+            dict: Container IDs grouped under "succeeded", "skipped" and "failed"
+        """
+        containers = list(containers)
+        results = {"succeeded": [], "skipped": [], "failed": []}
+        if not containers:
+            return results
+
+        max_workers = max_workers or settings.DOCKER_API_MAX_WORKERS
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(containers)),
+                                thread_name_prefix=f"container-{operation}") as executor:
+            outcomes = executor.map(lambda container: self._run_container_operation(container, operation, timeout),
+                                    containers)
+            for completed, (container, outcome) in enumerate(zip(containers, outcomes), start=1):
+                results[outcome].append(container.pk)
+                if progress_callback:
+                    progress_callback(completed, len(containers))
+
+        logger.info(f"Bulk {operation} of {len(containers)} containers: {len(results['succeeded'])} succeeded, "
+                    f"{len(results['skipped'])} skipped, {len(results['failed'])} failed")
+        return results
+
+    def bulk_kill_ssh_sessions(self, containers, clean_ssh_access: bool, max_workers: int = None) -> dict:
+        """Kill SSH sessions of many containers concurrently
+
+        Returns:
+            dict: Container IDs grouped under "succeeded" and "failed"
+        """
+        containers = list(containers)
+        results = {"succeeded": [], "failed": []}
+        if not containers:
+            return results
+
+        max_workers = max_workers or settings.DOCKER_API_MAX_WORKERS
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(containers)),
+                                thread_name_prefix="ssh-kill") as executor:
+            outcomes = executor.map(lambda container: self.kill_ssh_session(container, clean_ssh_access), containers)
+            for container, success in zip(containers, outcomes):
+                results["succeeded" if success else "failed"].append(container.pk)
+        return results
+
+    def _run_container_operation(self, container: ChallengeContainer, operation: ContainerOperation,
+                                 timeout: int = None) -> str:
+        """Run a single container operation inside a worker thread"""
+        try:
+            if operation == ContainerOperation.REMOVE:
+                return "succeeded" if container.delete() else "failed"
+
+            docker_container = self.docker.get_container(container.docker_id)
+            if not docker_container:
+                container.status = ContainerStatus.ERROR
+                container.save(update_fields=['status'])
+                return "failed"
+
+            if (docker_container.status == "running") == (operation == ContainerOperation.START):
+                status = DockerConstants.CONTAINER_STATUS_MAP.get(docker_container.status, ContainerStatus.ERROR)
+                if status != container.status:
+                    container.status = status
+                    container.save(update_fields=['status'])
+                return "skipped"
+
+            if operation == ContainerOperation.START:
+                success = self.start_container(container)
+            else:
+                success = self.stop_container(container, timeout)
+            return "succeeded" if success else "failed"
+        except Exception as e:
+            logger.error(f"Failed to {operation} container {container.name}: {e}")
+            return "failed"
+        finally:
+            connection.close()
+
+    def stop_container(self, container: ChallengeContainer, timeout: int = None) -> bool:
         """Stop a game container"""
         try:
-            if self.docker.stop_container(container.docker_id):
+            if self.docker.stop_container(container.docker_id, timeout):
                 self.sync_container_status(container)
                 return True
             return False
@@ -1,11 +1,17 @@
 import logging
 from datetime import timedelta
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, DurationField, Exists, ExpressionWrapper, F, OuterRef, Subquery, Value, When
 from django.utils import timezone
 
-from challenges.models.challenge import DeploymentAccess
+from accounts.models.enums import TeamRole
+from challenges.models import ChallengeContainer, ChallengeDeployment, DeploymentAccess, DeploymentAccessTotal
+from challenges.models.enums import ContainerOperation, ContainerStatus
 from challenges.services import ContainerService, DockerService
-from ctf.models import Flag
+from ctf.models import Flag, TeamAssignment
 from ctf.models.enums import GameSessionStatus
 
 logger = logging.getLogger(__name__)
@@ -14,6 +20,9 @@ logger = logging.getLogger(__name__)
 class DeploymentService:
     """Business logic for deployment wide operations"""
     _instance = None
+    STATUS_FRESH_KEY = "deployment-status-fresh:{}"
+    STATUS_REFRESH_LOCK_KEY = "deployment-status-refresh:{}"
+    START_LOCK_KEY = "deployment-start:{}"
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
@@ -25,47 +34,54 @@ class DeploymentService:
     def start_deployment(self, deployment) -> bool:
         """Start all containers in a deployment"""
         try:
-            containers = deployment.containers.all()
-            logger.info(f"Starting {len(containers)} containers for deployment {deployment.pk}")
-
-            success = True
-            for container in containers:
-                if not container.is_running():
-                    logger.info(f"Container {container.name} is not running - trying to start it")
-                    if not self.container_service.start_container(container):
-                        logger.warning(f"Failed to start container {container.name}")
-                        success = False
-                else:
-                    logger.info(f"Container {container.name} is already running")
-
-            deployment.update_activity()
-            return success
+            results = self.start_deployments([deployment])
+            return not results["failed"]
         except Exception as e:
             logger.error(f"Failed to start deployment {deployment.pk}: {e}")
             return False
 
-    def stop_deployment(self, deployment) -> bool:
+    def stop_deployment(self, deployment, timeout: int = None) -> bool:
         """Stop all containers in a deployment"""
         try:
-            containers = deployment.containers.all()
-            logger.info(f"Stopping {len(containers)} containers for deployment {deployment.pk}")
-
-            success = True
-            for container in containers:
-                if container.is_running():
-                    if not self.container_service.stop_container(container):
-                        logger.warning(f"Failed to stop container {container.name}")
-                        success = False
-                else:
-                    logger.info(f"Container {container.name} is already stopped")
-
-            deployment.has_active_connections = False
-            deployment.save(update_fields=['has_active_connections'])
-            return success
+            results = self.stop_deployments([deployment], timeout)
+            return not results["failed"]
         except Exception as e:
             logger.error(f"Failed to stop deployment {deployment.pk}: {e}")
             return False
 
+    def start_deployments(self, deployments, max_workers: int = None) -> dict:
+        """Start containers of many deployments concurrently, pooled deployments are only started once claimed
+
+        Returns:
+            dict: Container IDs grouped under "succeeded", "skipped" and "failed"
+        """
+        deployment_ids = [deployment.pk for deployment in deployments]
+        containers = ChallengeContainer.objects.filter(
+            deployment_id__in=deployment_ids,
+            deployment__is_pooled=False
+        ).select_related('deployment')
+        logger.info(f"Starting {len(containers)} containers for {len(deployment_ids)} deployments")
+
+        results = self.container_service.bulk_container_operation(containers, ContainerOperation.START,
+                                                                  max_workers=max_workers)
+        ChallengeDeployment.objects.filter(pk__in=deployment_ids).update(last_activity=timezone.now())
+        return results
+
+    def stop_deployments(self, deployments, timeout: int = None, max_workers: int = None) -> dict:
+        """Stop containers of many deployments concurrently
+
+        Returns:
+            dict: Container IDs grouped under "succeeded", "skipped" and "failed"
+        """
+        deployment_ids = [deployment.pk for deployment in deployments]
+        containers = ChallengeContainer.objects.filter(deployment_id__in=deployment_ids).select_related('deployment')
+        logger.info(f"Stopping {len(containers)} containers for {len(deployment_ids)} deployments")
+
+        results = self.container_service.bulk_container_operation(containers, ContainerOperation.STOP,
+                                                                  timeout=timeout, max_workers=max_workers)
+        ChallengeDeployment.objects.filter(pk__in=deployment_ids).update(has_active_connections=False)
+        return results
+
     def sync_deployment_status(self, deployment) -> bool:
         """Sync status of all containers in a deployment"""
         try:
@@ -78,11 +94,62 @@ class DeploymentService:
                     logger.warning(f"Failed to sync container {container.name}")
                     success = False
 
+            if success:
+                cache.set(self.STATUS_FRESH_KEY.format(deployment.pk), True, settings.DEPLOYMENT_STATUS_CACHE_TTL)
             return success
         except Exception as e:
             logger.error(f"Failed to sync deployment {deployment.pk}: {e}")
             return False
 
+    def request_status_refresh(self, deployment) -> bool:
+        """Schedule a background status sync when the last one is older than the cache TTL
+
+        At most one refresh per deployment is in flight, views keep reading the stored status meanwhile.
+        """
+        from challenges.tasks import refresh_deployment_status
+
+        if cache.get(self.STATUS_FRESH_KEY.format(deployment.pk)):
+            return False
+        if not cache.add(self.STATUS_REFRESH_LOCK_KEY.format(deployment.pk), True,
+                         settings.DEPLOYMENT_STATUS_REFRESH_TIMEOUT):
+            return False
+
+        try:
+            refresh_deployment_status.delay(deployment.pk)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to schedule status refresh for deployment {deployment.pk}: {e}")
+            self.release_status_refresh(deployment.pk)
+            return False
+
+    def release_status_refresh(self, deployment_id):
+        """Allow another status refresh of the deployment to be scheduled"""
+        cache.delete(self.STATUS_REFRESH_LOCK_KEY.format(deployment_id))
+
+    def request_start(self, deployment) -> bool:
+        """Queue a start of the deployment unless a start of it is already queued or running"""
+        from challenges.tasks import start_deployment
+
+        if not cache.add(self.START_LOCK_KEY.format(deployment.pk), True, settings.DEPLOYMENT_START_TIMEOUT):
+            logger.info(f"Start of deployment {deployment.pk} is already pending")
+            return False
+
+        try:
+            start_deployment.delay(deployment.pk)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to queue start of deployment {deployment.pk}: {e}")
+            self.release_start(deployment.pk)
+            return False
+
+    def is_start_pending(self, deployment) -> bool:
+        """Check if a start of the deployment is queued or running"""
+        return bool(cache.get(self.START_LOCK_KEY.format(deployment.pk)))
+
+    def release_start(self, deployment_id):
+        """Allow another start of the deployment to be queued"""
+        cache.delete(self.START_LOCK_KEY.format(deployment_id))
+
     @staticmethod
     def record_deployment_access(deployment, team, container=None, session_id=None) -> bool:
         """Record a new SSH access to the deployment"""
@@ -139,21 +206,91 @@ class DeploymentService:
             logger.error(f"Failed to end deployment access: {e}")
             return False
 
-    def has_exceeded_time_limit(self, team, deployment):
-        """Check if team has exceeded their time limit for this deployment"""
-        game_session = deployment.assignments.filter(
-            team=team,
-            session__status=GameSessionStatus.ACTIVE
-        ).first()
-
-        if not game_session or not game_session.session.enable_time_restrictions:
-            return False
-
-        time_spent = self.get_team_total_access_time_for_deployment(team, deployment)
-        max_time = game_session.session.get_max_time_for_role(game_session.role)
+    @staticmethod
+    def get_time_limit_status(deployment_ids, now=None) -> dict:
+        """Get remaining time of all teams in time restricted active sessions on the deployments in one query
+
+        Returns:
+            dict: {(deployment ID, team ID): (remaining minutes, open access sessions)}
+        """
+        now = now or timezone.now()
+        totals = DeploymentAccessTotal.objects.filter(deployment=OuterRef('deployment'), team=OuterRef('team'))
+        assignments = TeamAssignment.objects.filter(
+            deployment_id__in=deployment_ids,
+            session__status=GameSessionStatus.ACTIVE,
+            session__enable_time_restrictions=True,
+        ).annotate(
+            max_time=Case(
+                When(role=TeamRole.BLUE, then=F('session__max_blue_team_time')),
+                default=F('session__max_red_team_time'),
+            ),
+            access_total=Subquery(totals.values('total')[:1]),
+            open_since=Subquery(totals.values('open_since')[:1]),
+            open_sessions=Subquery(totals.values('open_sessions')[:1]),
+        ).filter(max_time__gt=0).values_list(
+            'deployment_id', 'team_id', 'max_time', 'access_total', 'open_since', 'open_sessions'
+        )
+
+        status = {}
+        for deployment_id, team_id, max_time, total, open_since, open_sessions in assignments:
+            access_total = DeploymentAccessTotal(
+                total=total or timedelta(0), open_since=open_since, open_sessions=open_sessions or 0
+            )
+            remaining = max_time - access_total.get_total(now).total_seconds() / 60
+            status.setdefault((deployment_id, team_id), (remaining, access_total.open_sessions))
+        return status
+
+    def enforce_time_limits(self, deployments, max_workers: int = None) -> set:
+        """Kill SSH sessions of teams over their time limit and end their access in bulk
+
+        Only deployments with a team that is connected past its limit are touched, their containers are
+        handled concurrently.
+
+        Returns:
+            set: (deployment ID, team ID) of all teams over their time limit, connected or not
+        """
+        now = timezone.now()
+        deployments = {deployment.pk: deployment for deployment in deployments}
+        self._create_missing_access_totals(list(deployments))
+        status = self.get_time_limit_status(list(deployments), now)
+        exceeded = {pair for pair, (remaining, _) in status.items() if remaining <= 0}
+        violators = [pair for pair in exceeded if status[pair][1]]
+        if not violators:
+            return exceeded
+
+        containers = [
+            container
+            for deployment_id in {deployment_id for deployment_id, _ in violators}
+            for container in deployments[deployment_id].containers.all()
+            if container.status == ContainerStatus.RUNNING
+        ]
+        results = self.container_service.bulk_kill_ssh_sessions(containers, True, max_workers)
+
+        duration = ExpressionWrapper(Value(now) - F('start_time'), output_field=DurationField())
+        for deployment_id, team_id in violators:
+            with transaction.atomic():
+                access_total = DeploymentAccessTotal.lock(deployment_id, team_id)
+                ended = DeploymentAccess.objects.filter(
+                    deployment_id=deployment_id,
+                    team_id=team_id,
+                    is_active=True
+                ).update(end_time=now, is_active=False, duration=duration)
+                # Every access of the team was ended, so its open period closes whatever the count was
+                access_total.close_access(now, max(ended, access_total.open_sessions))
+
+        logger.info(f"Enforced time limits of {len(violators)} teams, killed SSH sessions of "
+                    f"{len(results['succeeded'])} containers, {len(results['failed'])} failed")
+        return exceeded
 
-        logger.info(f"Time spent: {time_spent} minutes, Max time: {max_time} minutes")
-        return max_time > 0 and time_spent >= max_time
+    @staticmethod
+    def _create_missing_access_totals(deployment_ids):
+        """Create totals of teams connected to the deployments without one, so their time is enforced"""
+        missing = DeploymentAccess.objects.filter(deployment_id__in=deployment_ids, is_active=True).filter(
+            ~Exists(DeploymentAccessTotal.objects.filter(deployment=OuterRef('deployment'), team=OuterRef('team')))
+        ).order_by().values_list('deployment_id', 'team_id').distinct()
+        for deployment_id, team_id in missing:
+            with transaction.atomic():
+                DeploymentAccessTotal.lock(deployment_id, team_id)
 
     @staticmethod
     def get_team_total_access_time_for_deployment(team, deployment):
@@ -166,39 +303,12 @@ class DeploymentService:
         if not game_session or not game_session.session.enable_time_restrictions:
             return 0
 
-        access_records = DeploymentAccess.objects.filter(
-            deployment=deployment,
-            team=team
-        ).order_by('start_time')
-
-        time_periods = []
-        for record in access_records:
-            if record.is_active:
-                end_time = timezone.now()
-            else:
-                end_time = record.end_time
-
-            time_periods.append((record.start_time, end_time))
-
-        if not time_periods:
-            return 0
-
-        merged_periods = []
-        current_start, current_end = time_periods[0]
-        for start, end in time_periods[1:]:
-            if start <= current_end:
-                current_end = max(current_end, end)
-            else:
-                merged_periods.append((current_start, current_end))
-                current_start, current_end = start, end
-
-        merged_periods.append((current_start, current_end))
-
-        total_duration = timedelta(0)
-        for start, end in merged_periods:
-            total_duration += end - start
+        access_total = DeploymentAccessTotal.objects.filter(deployment=deployment, team=team).first()
+        if access_total is None:
+            with transaction.atomic():
+                access_total = DeploymentAccessTotal.lock(deployment.pk, team.pk)
 
-        return total_duration.total_seconds() / 60
+        return access_total.get_total().total_seconds() / 60
 
     def get_remaining_time_for_deployment(self, team, deployment):
         """Get remaining time in minutes for team's deployment access"""
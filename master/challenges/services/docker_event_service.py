@@ -0,0 +1,130 @@
+import logging
+import time
+from collections import defaultdict
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from challenges.models import ChallengeContainer, ChallengeDeployment, DockerEventCursor
+from challenges.models.constants import DockerConstants
+from challenges.models.enums import ContainerStatus
+from challenges.services import DockerService
+
+logger = logging.getLogger(__name__)
+
+
+class DockerEventService:
+    """Keeps container and deployment state in sync with the Docker event stream"""
+    EVENT_STATUS_MAP = {
+        "create": ContainerStatus.CREATED,
+        "start": ContainerStatus.RUNNING,
+        "restart": ContainerStatus.RUNNING,
+        "unpause": ContainerStatus.RUNNING,
+        "pause": ContainerStatus.STOPPED,
+        "die": ContainerStatus.STOPPED,
+        "oom": ContainerStatus.ERROR,
+        "destroy": ContainerStatus.DELETED,
+    }
+
+    def __init__(self, docker_service: DockerService = None, cursor_name: str = "default"):
+        self.docker = docker_service or DockerService()
+        self.cursor_name = cursor_name
+
+    def listen(self, since: str = None, reconcile: bool = True, reconnect_delay: int = 5):
+        """Consume container events forever, resuming from the persisted cursor after reconnects"""
+        cursor = DockerEventCursor.get_cursor(self.cursor_name)
+
+        while True:
+            try:
+                close_old_connections()
+                if reconcile:
+                    self.reconcile()
+
+                start = since or cursor.get_since()
+                since = None
+                logger.info(f"Listening for Docker events since {start or 'now'}")
+
+                events = self.docker.get_events(since=start, filters={
+                    "type": "container",
+                    "event": list(self.EVENT_STATUS_MAP),
+                })
+                for event in events:
+                    close_old_connections()
+                    self.handle_event(event)
+                    if event.get("timeNano"):
+                        cursor.advance(event["timeNano"])
+
+                logger.warning("Docker event stream closed")
+            except Exception as e:
+                logger.error(f"Error while listening for Docker events: {e}")
+
+            time.sleep(reconnect_delay)
+
+    def handle_event(self, event: dict) -> bool:
+        """Apply a single container event to the database"""
+        action = event.get("Action") or event.get("status")
+        actor = event.get("Actor", {})
+        docker_id = actor.get("ID") or event.get("id")
+        name = actor.get("Attributes", {}).get("name", "")
+
+        status = self.EVENT_STATUS_MAP.get(action)
+        if not status or not docker_id or not name.startswith(DockerConstants.CONTAINER_PREFIX):
+            return False
+
+        if action == "oom":
+            logger.warning(f"Container {name} ran out of memory")
+
+        containers = ChallengeContainer.objects.filter(docker_id=docker_id).exclude(status=status)
+        if action == "die":
+            # Keep the error status set by a preceding oom event
+            containers = containers.exclude(status=ContainerStatus.ERROR)
+
+        updated = containers.update(status=status, updated_at=timezone.now())
+        if updated:
+            logger.info(f"Container {name} is now {status} ({action} event)")
+            deployments = ChallengeDeployment.objects.filter(containers__docker_id=docker_id)
+            if status != ContainerStatus.RUNNING:
+                self._release_stopped_deployments(deployments)
+            self._publish_deployment_status(deployments)
+        return bool(updated)
+
+    def reconcile(self) -> int:
+        """Sync status of all containers with a single Docker list call"""
+        docker_statuses = {
+            container.id: container.status
+            for container in self.docker.client.containers.list(all=True, sparse=True)
+        }
+
+        changes = defaultdict(list)
+        for container in ChallengeContainer.objects.exclude(status=ContainerStatus.DELETED).only('pk', 'docker_id',
+                                                                                                 'status'):
+            docker_status = docker_statuses.get(container.docker_id)
+            if docker_status is None:
+                new_status = ContainerStatus.DELETED
+            else:
+                new_status = DockerConstants.CONTAINER_STATUS_MAP.get(docker_status, ContainerStatus.ERROR)
+
+            if new_status != container.status:
+                changes[new_status].append(container.pk)
+
+        updated = 0
+        for status, container_ids in changes.items():
+            updated += ChallengeContainer.objects.filter(pk__in=container_ids).update(status=status,
+                                                                                    updated_at=timezone.now())
+
+        self._release_stopped_deployments(ChallengeDeployment.objects.filter(has_active_connections=True))
+        logger.info(f"Reconciled {updated} container statuses with Docker")
+        return updated
+
+    @staticmethod
+    def _publish_deployment_status(deployments):
+        """Push the new state of the deployments to their teams"""
+        from ctf.services import TeamEventService
+
+        for deployment in deployments:
+            TeamEventService.publish_deployment_status(deployment)
+
+    @staticmethod
+    def _release_stopped_deployments(deployments):
+        """Clear active connection flag of deployments without running containers"""
+        deployments.exclude(containers__status=ContainerStatus.RUNNING).update(has_active_connections=False)
@@ -1,60 +1,98 @@
+import io
 import logging
-import socket
-from typing import Optional, Dict
+import re
+import tarfile
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, BinaryIO, Callable
 
 import docker
-from docker.errors import APIError, NotFound
+from docker.errors import APIError, NotFound, ImageNotFound
+from docker.models.images import Image
 from docker.models.containers import Container
 from docker.models.networks import Network
 from docker.types import IPAMPool, IPAMConfig
+from django.conf import settings
 
 from challenges.models.constants import DockerConstants
 from challenges.models.enums import ContainerStatus
-from challenges.models.exceptions import DockerOperationError, ContainerNotFoundError
+from challenges.models.exceptions import DockerOperationError, ContainerNotFoundError, PortUnavailableError, \
+    SubnetUnavailableError
 
 logger = logging.getLogger(__name__)
 
 
 class DockerService:
     """Handles all low-level Docker operations"""
+    _build_locks: Dict[str, threading.Lock] = {}
+    _build_locks_guard = threading.Lock()
 
     def __init__(self):
         try:
-            self.client = docker.from_env()
+            self.client = docker.from_env(max_pool_size=settings.DOCKER_API_MAX_WORKERS)
             self.client.ping()
         except Exception as e:
             logger.error(f"Failed to connect to Docker: {e}")
             raise RuntimeError(f"Failed to connect to Docker: {e}")
 
-    def build_image(self, template_path: str, image_tag: str):
-        """Build a Docker image from template"""
+    def build_image(self, template_path: str, image_tag: str, fileobj: BinaryIO = None):
+        """Build a Docker image from template directory or from a streamed tar build context"""
         try:
             logger.info(f"Building image {image_tag} from template {template_path}")
+            if fileobj is not None:
+                return self.client.images.build(fileobj=fileobj, custom_context=True, tag=image_tag, rm=True)
             return self.client.images.build(path=template_path, tag=image_tag, rm=True)
         except Exception as e:
             logger.error(f"Failed to build image {image_tag}: {e}")
             raise
 
-    def create_container(self, container_name: str, image_tag: str, port: int = None) -> Container:
-        """Create and start a new Docker container"""
+    def get_or_build_image(self, template_path: str, image_tag: str,
+                           build_context: Callable[[], BinaryIO] = None) -> Image:
+        """Get image by tag and build it only if it does not exist yet, from the build context when given"""
+        with self._build_locks_guard:
+            lock = self._build_locks.setdefault(image_tag, threading.Lock())
+
+        with lock:
+            try:
+                image = self.client.images.get(image_tag)
+                logger.info(f"Reusing existing image {image_tag}")
+                return image
+            except ImageNotFound:
+                image, _ = self.build_image(template_path, image_tag,
+                                            fileobj=build_context() if build_context else None)
+                return image
+
+    def create_container(self, container_name: str, image_tag: str, port: int = None,
+                         flag_values: Dict[str, str] = None, start: bool = True) -> Container:
+        """Create and start a new Docker container
+
+        When flag values are given, the image command is wrapped so that flag placeholders baked into the
+        shared image are replaced with the given values before the original entrypoint runs. An empty mapping
+        wraps the command without writing any flags, so they can be written before a later start.
+        """
         try:
-            if port:
-                try:
-                    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                        s.bind(('0.0.0.0', port))
-                except (socket.error, OSError) as e:
-                    logger.error(f"Port {port} is not available for binding: {e}")
-                    raise DockerOperationError(f"Port {port} is not available: {e}")
-
-            container = self.client.containers.run(
-                image=image_tag,
-                name=container_name,
-                detach=True,
-                ports={DockerConstants.SSH_PORT: None} if not port else {DockerConstants.SSH_PORT: port},
-                network="ctf-platform_user_net"
-            )
-
-            if port:
+            container_config = {
+                "image": image_tag,
+                "name": container_name,
+                "ports": {DockerConstants.SSH_PORT: None} if not port else {DockerConstants.SSH_PORT: port},
+                "network": "ctf-platform_user_net",
+            }
+
+            if flag_values is not None:
+                container = self.client.containers.create(**container_config,
+                                                          **self._get_flag_injection_config(image_tag))
+                if flag_values:
+                    self.put_file(container, DockerConstants.FLAGS_FILE, self.get_flags_script(flag_values))
+                if start:
+                    container.start()
+            elif start:
+                container = self.client.containers.run(detach=True, **container_config)
+            else:
+                container = self.client.containers.create(**container_config)
+
+            if port and start:
                 container.reload()
                 actual_port = self.get_container_port(container, DockerConstants.SSH_PORT)
                 if actual_port and int(actual_port) != port:
@@ -65,10 +103,40 @@ class DockerService:
             raise
         except Exception as e:
             logger.error(f"Failed to create container {container_name}: {e}")
-            if "Ports are not available" in str(e):
-                raise DockerOperationError(f"Port binding failed, port may be in use: {e}")
+            if any(message in str(e) for message in DockerConstants.PORT_CONFLICT_ERRORS):
+                raise PortUnavailableError(f"Port binding failed, port may be in use: {e}")
             raise DockerOperationError(f"Failed to create container: {e}")
 
+    def _get_flag_injection_config(self, image_tag: str) -> dict:
+        """Get entrypoint override running the flag injection script before the original image command"""
+        image_config = self.client.images.get(image_tag).attrs.get("Config") or {}
+        command = (image_config.get("Entrypoint") or []) + (image_config.get("Cmd") or [])
+        return {
+            "entrypoint": ["/bin/sh", "-c", DockerConstants.FLAG_INJECTION_SCRIPT, "flag-injection"],
+            "command": command,
+        }
+
+    @staticmethod
+    def get_flags_script(flag_values: Dict[str, str]) -> str:
+        """Get sed script replacing flag placeholders, longest first so FLAG_PLACEHOLDER_1 can't clobber _10"""
+        placeholders = sorted(flag_values, key=len, reverse=True)
+        return ";".join(f"s|{placeholder}|{flag_values[placeholder]}|g" for placeholder in placeholders)
+
+    @staticmethod
+    def put_file(container: Container, path: str, content: str, mode: int = 0o600) -> bool:
+        """Write a single file into a container filesystem"""
+        data = content.encode("utf-8")
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w") as tar:
+            file_info = tarfile.TarInfo(name=Path(path).name)
+            file_info.size = len(data)
+            file_info.mode = mode
+            tar.addfile(file_info, io.BytesIO(data))
+
+        if not container.put_archive(str(Path(path).parent), archive.getvalue()):
+            raise DockerOperationError(f"Failed to write {path} to container {container.name}")
+        return True
+
     def remove_container(self, container_id: str, force: bool = False) -> bool:
         """Remove a Docker container"""
         try:
@@ -127,6 +195,14 @@ class DockerService:
             logger.error(f"Failed to list containers: {e}")
             return []
 
+    def get_events(self, since: str = None, filters: dict = None):
+        """Stream decoded Docker events, starting from given timestamp when provided"""
+        try:
+            return self.client.events(since=since, filters=filters, decode=True)
+        except Exception as e:
+            logger.error(f"Failed to open Docker event stream: {e}")
+            raise DockerOperationError(f"Failed to open Docker event stream: {e}")
+
     @staticmethod
     def execute_command(container: Container, command: list[str], privileged: bool = False) -> tuple[int, str]:
         """Execute a command in a container"""
@@ -153,12 +229,12 @@ class DockerService:
             logger.error(f"Failed to start container {container_id}: {e}")
             return False
 
-    def stop_container(self, container_id: str) -> bool:
-        """Stop a Docker container"""
+    def stop_container(self, container_id: str, timeout: int = None) -> bool:
+        """Stop a Docker container, killing it when it does not exit within timeout seconds"""
         try:
             container = self.get_container(container_id)
             if container and container.status == "running":
-                container.stop()
+                container.stop(timeout=settings.CONTAINER_STOP_TIMEOUT if timeout is None else timeout)
                 return True
             return False
         except Exception as e:
@@ -198,41 +274,18 @@ class DockerService:
             logger.error(f"Failed to get network: {e}")
             return None
 
-    def get_available_subnet(self) -> str:
-        """Find an available subnet for new network"""
-        try:
-            used_subnets = []
-            for network in self.list_networks():
-                if network.attrs.get("IPAM") and network.attrs["IPAM"].get("Config"):
-                    for config in network.attrs["IPAM"]["Config"]:
-                        if "Subnet" in config:
-                            used_subnets.append(config["Subnet"])
-
-            logger.debug(f"Used subnets: {used_subnets}")
-
-            for i in range(1, 255):
-                subnet = f"172.{i}.0.0/16"
-                if subnet not in used_subnets:
-                    logger.info(f"Found available subnet: {subnet}")
-                    return subnet
-
-            raise DockerOperationError("No available subnet found in any range")
-
-        except Exception as e:
-            logger.error(f"Error while finding available subnet: {e}")
-            raise DockerOperationError(f"Failed to find available subnet: {e}")
-
-    def create_network(self) -> bool | tuple[Network, str]:
-        """Create a new Docker network"""
+    def create_network(self, subnet: str) -> tuple[Network, str]:
+        """Create a new Docker network with given subnet"""
         try:
-            subnet = self.get_available_subnet()
             ipam_config = IPAMConfig(pool_configs=[IPAMPool(subnet=subnet)])
             network = self.client.networks.create(name=f"{DockerConstants.CONTAINER_PREFIX}{subnet}", driver="bridge",
                                                   ipam=ipam_config)
             return network, subnet
         except Exception as e:
             logger.error(f"Failed to create network: {e}")
-            return False
+            if any(message in str(e) for message in DockerConstants.SUBNET_CONFLICT_ERRORS):
+                raise SubnetUnavailableError(f"Subnet {subnet} overlaps an existing network: {e}")
+            raise DockerOperationError(f"Failed to create network: {e}")
 
     def prune_networks(self):
         """Remove all docker networks"""
@@ -299,8 +352,8 @@ class DockerService:
         """Check if there are any active SSH sessions in the container and return session IDs
         
         Returns a list of session IDs for active SSH connections, or an empty list if none.
-        This method tries multiple approaches to support different Linux distributions
-        including Ubuntu, Alpine, and other common distros.
+        All detection methods run in a single exec round trip to support different Linux
+        distributions including Ubuntu, Alpine, and other common distros.
         
         The session IDs are designed to be stable across multiple checks so that
         the same connection is identified with the same ID in subsequent checks.
@@ -312,179 +365,93 @@ class DockerService:
                 logger.warning(f"Container {container_id} not running")
                 return []
 
-            # Method 1: Look for child sshd processes that indicate client connections
-            # This pattern explicitly excludes the main sshd daemon
-            try:
-                # Get both PID and connection details for stability
-                result = container.exec_run(
-                    ["sh", "-c", "ps aux | grep -E 'sshd: [a-zA-Z0-9]+@' | grep -v grep"],
-                    privileged=True
-                )
-                if result.exit_code == 0 and result.output.strip():
-                    output = result.output.decode('utf-8').strip()
-                    # Create more stable IDs that include the connection details
-                    session_ids = []
-                    for line in output.split('\n'):
-                        if not line.strip():
-                            continue
-                        # Extract PID (usually 2nd column in ps output)
-                        parts = line.split()
-                        if len(parts) > 1 and parts[1].isdigit():
-                            # Hash the whole line to create a stable ID
-                            connection_hash = hash(line) % 10000000
-                            session_ids.append(f"ssh-pid-{parts[1]}-{connection_hash}")
-
-                    if session_ids:
-                        logger.debug(f"Found SSH sessions with stable IDs: {session_ids}")
-                        return session_ids
-            except Exception as e:
-                logger.error(f"Error in method 1 (ps): {e}")
-
-            # Method 2: Check established connections on port 22 using netstat
-            # Get actual IP:port details for stable session IDs
-            try:
-                result = container.exec_run(
-                    ["sh", "-c", "netstat -tn 2>/dev/null | grep ':22' | grep 'ESTABLISHED'"],
-                    privileged=True
-                )
-                if result.exit_code == 0 and result.output.strip():
-                    output = result.output.decode('utf-8').strip()
-                    session_ids = []
-
-                    for line in output.split('\n'):
-                        if not line.strip():
-                            continue
-                        # Create a hash from the connection details to ensure stable IDs
-                        connection_hash = hash(line) % 10000000
-                        session_ids.append(f"ssh-net-{connection_hash}")
-
-                    if session_ids:
-                        logger.debug(f"Found {len(session_ids)} SSH connections with netstat")
-                        return session_ids
-            except Exception as e:
-                logger.error(f"Error in method 2 (netstat): {e}")
-
-            # Method 3: Try with ss command (newer alternative to netstat in some distros)
-            try:
-                result = container.exec_run(
-                    ["sh", "-c", "command -v ss >/dev/null 2>&1 && ss -tn | grep ':22' | grep 'ESTABLISHED'"],
-                    privileged=True
-                )
-                if result.exit_code == 0 and result.output.strip():
-                    output = result.output.decode('utf-8').strip()
-                    session_ids = []
-
-                    for line in output.split('\n'):
-                        if not line.strip():
-                            continue
-                        # Create a hash from the connection details to ensure stable IDs
-                        connection_hash = hash(line) % 10000000
-                        session_ids.append(f"ssh-ss-{connection_hash}")
-
-                    if session_ids:
-                        logger.debug(f"Found {len(session_ids)} SSH connections with ss command")
-                        return session_ids
-            except Exception as e:
-                logger.error(f"Error in method 3 (ss): {e}")
-
-            # Method 4: Check for established TCP connections on port 22 in /proc/net/tcp
-            # 0016 is port 22 in hex, 01 indicates ESTABLISHED state
-            try:
-                # First verify there's an actual remote connection by checking the source IP isn't localhost
-                # This avoids counting internal connections from the daemon itself
-                result = container.exec_run(
-                    ["sh", "-c", "cat /proc/net/tcp 2>/dev/null | grep ':0016' | grep ' 01 ' | grep -v '0100007F'"],
-                    privileged=True
-                )
-                if result.exit_code == 0 and result.output.strip():
-                    output = result.output.decode('utf-8').strip()
-
-                    # Double-check with netstat/ss to confirm these are really external connections
-                    verify_result = container.exec_run(
-                        ["sh", "-c",
-                         "command -v netstat >/dev/null && netstat -tn | grep ':22' | grep 'ESTABLISHED' | grep -v '127.0.0.1' || echo ''"],
-                        privileged=True
-                    )
-
-                    if verify_result.exit_code == 0 and verify_result.output.strip():
-                        session_ids = []
-                        for line in output.split('\n'):
-                            if not line.strip():
-                                continue
-                            # Extract remote addr field for stable hash
-                            parts = line.split()
-                            if len(parts) > 2:
-                                remote_addr = parts[2]
-                                session_ids.append(f"ssh-proc-{remote_addr}")
-
-                        if session_ids:
-                            logger.debug(f"Found {len(session_ids)} verified SSH connections via /proc/net/tcp")
-                            return session_ids
-                    else:
-                        logger.debug(f"Found potential SSH connections in /proc/net/tcp but verification failed")
-            except Exception as e:
-                logger.error(f"Error in method 4 (/proc/net/tcp): {e}")
-
-            # Method 5: Look specifically for client connections by checking for username pattern
-            # This avoids detecting the main sshd process
-            try:
-                result = container.exec_run(
-                    ["sh", "-c", "ps aux | grep -E 'sshd: .+@' | grep -v grep"],
-                    privileged=True
-                )
-                if result.exit_code == 0 and result.output.strip():
-                    output = result.output.decode('utf-8').strip()
-                    session_ids = []
-
-                    for line in output.split('\n'):
-                        if not line.strip():
-                            continue
-                        # Create a stable ID based on the username and connection details
-                        connection_hash = hash(line) % 10000000
-
-                        # Try to extract the username pattern for more stable ID
-                        import re
-                        match = re.search(r'sshd: ([^@]+)@', line)
-                        username = match.group(1) if match else f"user-{connection_hash}"
-
-                        session_ids.append(f"ssh-user-{username}-{connection_hash}")
-
-                    if session_ids:
-                        logger.debug(f"Found {len(session_ids)} client SSH connections via ps")
-                        return session_ids
-            except Exception as e:
-                logger.error(f"Error in method 5 (ps grep): {e}")
-
-            # Method 6: Last resort - use 'who' command to check logged in users
-            try:
-                result = container.exec_run(
-                    ["who"],
-                    privileged=True
-                )
-                if result.exit_code == 0 and result.output.strip():
-                    output = result.output.decode('utf-8')
-                    session_ids = []
-
-                    for line in output.split('\n'):
-                        if not line.strip():
-                            continue
-                        # Extract username and PTY for stable connection ID
-                        parts = line.split()
-                        if len(parts) >= 2:
-                            username = parts[0]
-                            pts = parts[1]
-                            session_ids.append(f"ssh-who-{username}-{pts}")
-
-                    if session_ids:
-                        logger.debug(f"Found {len(session_ids)} users logged in with 'who' command")
-                        return session_ids
-            except Exception as e:
-                logger.error(f"Error in method 6 (who): {e}")
-
-            # No active SSH sessions found
-            logger.debug(f"No active SSH sessions found for container {container_id}")
-            return []
+            result = container.exec_run(["sh", "-c", DockerConstants.SSH_PROBE_SCRIPT], privileged=True)
+            session_ids = self._parse_ssh_probe_output(result.output.decode('utf-8', errors='replace'))
+            if not session_ids:
+                logger.debug(f"No active SSH sessions found for container {container_id}")
+            return session_ids
         except Exception as e:
             logger.error(f"Failed to check SSH sessions for container {container_id}: {e}")
             # Return empty list on error instead of error messages that could be mistaken for session IDs
             return []
+
+    def check_active_ssh_sessions_bulk(self, container_ids: list[str], max_workers: int = None) -> Dict[str, list]:
+        """Check active SSH sessions of many containers concurrently
+
+        Returns a mapping of container ID to the list of its active session IDs.
+        """
+        if not container_ids:
+            return {}
+
+        max_workers = max_workers or settings.DOCKER_API_MAX_WORKERS
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(container_ids)),
+                                thread_name_prefix="ssh-probe") as executor:
+            results = executor.map(self.check_active_ssh_sessions, container_ids)
+            return dict(zip(container_ids, results))
+
+    @staticmethod
+    def _parse_ssh_probe_output(output: str) -> list:
+        """Build session IDs from the probe script output using the first detection method with results"""
+        sections = {}
+        current_section = None
+        for line in output.split('\n'):
+            if line.startswith(DockerConstants.SSH_PROBE_SECTION_MARKER):
+                current_section = line[len(DockerConstants.SSH_PROBE_SECTION_MARKER):].strip()
+                sections[current_section] = []
+            elif current_section and line.strip():
+                sections[current_section].append(line)
+
+        def connection_hash(line: str) -> int:
+            # crc32 stays the same across worker processes, unlike the salted built-in hash()
+            return zlib.crc32(line.encode('utf-8')) % 10000000
+
+        # Method 1: child sshd processes that indicate client connections, keyed by PID
+        session_ids = [
+            f"ssh-pid-{line.split()[1]}-{connection_hash(line)}"
+            for line in sections.get("ps", [])
+            if len(line.split()) > 1 and line.split()[1].isdigit()
+        ]
+        if session_ids:
+            logger.debug(f"Found SSH sessions with stable IDs: {session_ids}")
+            return session_ids
+
+        # Method 2: established connections on port 22 using netstat
+        session_ids = [f"ssh-net-{connection_hash(line)}" for line in sections.get("netstat", [])]
+        if session_ids:
+            logger.debug(f"Found {len(session_ids)} SSH connections with netstat")
+            return session_ids
+
+        # Method 3: ss command (newer alternative to netstat in some distros)
+        session_ids = [f"ssh-ss-{connection_hash(line)}" for line in sections.get("ss", [])]
+        if session_ids:
+            logger.debug(f"Found {len(session_ids)} SSH connections with ss command")
+            return session_ids
+
+        # Method 4: established TCP connections on port 22 in /proc/net/tcp, only trusted when
+        # netstat confirms there is an external connection
+        external_connections = [line for line in sections.get("netstat", []) if "127.0.0.1" not in line]
+        if sections.get("proc") and external_connections:
+            session_ids = [f"ssh-proc-{line.split()[2]}" for line in sections["proc"] if len(line.split()) > 2]
+            if session_ids:
+                logger.debug(f"Found {len(session_ids)} verified SSH connections via /proc/net/tcp")
+                return session_ids
+
+        # Method 5: client connections identified by the username pattern
+        session_ids = []
+        for line in sections.get("ps_user", []):
+            match = re.search(r'sshd: ([^@]+)@', line)
+            username = match.group(1) if match else f"user-{connection_hash(line)}"
+            session_ids.append(f"ssh-user-{username}-{connection_hash(line)}")
+        if session_ids:
+            logger.debug(f"Found {len(session_ids)} client SSH connections via ps")
+            return session_ids
+
+        # Method 6: last resort - users logged in according to 'who'
+        session_ids = [
+            f"ssh-who-{line.split()[0]}-{line.split()[1]}"
+            for line in sections.get("who", [])
+            if len(line.split()) >= 2
+        ]
+        if session_ids:
+            logger.debug(f"Found {len(session_ids)} users logged in with 'who' command")
+        return session_ids
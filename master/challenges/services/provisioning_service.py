@@ -0,0 +1,74 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.db import connection
+
+from challenges.models.exceptions import ContainerOperationError
+from challenges.services import ChallengeService
+from ctf.models.settings import GlobalSettings
+
+logger = logging.getLogger(__name__)
+
+
+class ProvisioningService:
+    """Prepares challenge deployments for many teams concurrently"""
+
+    def __init__(self, challenge_service: ChallengeService = None):
+        self.challenge_service = challenge_service or ChallengeService()
+
+    def provision_deployments(self, session, teams, max_workers=None, retries=None) -> dict:
+        """Prepare a deployment for every team using a bounded worker pool
+
+        Teams whose preparation fails are cleaned up and retried up to `retries` times.
+
+        Returns:
+            dict: Team ID mapped to {"team", "deployment", "error", "attempts"}
+        """
+        settings = GlobalSettings.get_settings()
+        max_workers = max_workers or settings.max_parallel_provisioning
+        retries = settings.provisioning_retries if retries is None else retries
+
+        results = {
+            team.pk: {"team": team, "deployment": None, "error": None, "attempts": 0}
+            for team in teams
+        }
+
+        pending = list(teams)
+        for attempt in range(1, retries + 2):
+            if not pending:
+                break
+
+            workers = max(1, min(max_workers, len(pending)))
+            logger.info(f"Provisioning {len(pending)} deployments for session {session.name} "
+                        f"(attempt {attempt}, {workers} workers)")
+
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="provisioning") as executor:
+                futures = {executor.submit(self._provision_team, session, team): team for team in pending}
+                for future in as_completed(futures):
+                    team = futures[future]
+                    result = results[team.pk]
+                    result["attempts"] = attempt
+                    try:
+                        result["deployment"] = future.result()
+                        result["error"] = None
+                        logger.info(f"Provisioned deployment for team {team.name}")
+                    except Exception as e:
+                        result["error"] = str(e)
+                        logger.warning(f"Provisioning failed for team {team.name} (attempt {attempt}): {e}")
+
+            pending = [result["team"] for result in results.values() if result["deployment"] is None]
+
+        if pending:
+            logger.error(f"Failed to provision deployments for teams: {', '.join(team.name for team in pending)}")
+
+        return results
+
+    def _provision_team(self, session, team):
+        """Prepare the deployment of a single team inside a worker thread"""
+        try:
+            deployment = self.challenge_service.prepare_challenge(session, team)
+            if not deployment:
+                raise ContainerOperationError(f"Failed to prepare challenge for team {team.name}")
+            return deployment
+        finally:
+            connection.close()
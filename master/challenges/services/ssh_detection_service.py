@@ -0,0 +1,180 @@
+import ipaddress
+import logging
+import socket
+from typing import Dict
+
+from django.conf import settings
+
+from challenges.models.exceptions import SSHDetectionUnavailableError
+from challenges.services import DockerService
+
+logger = logging.getLogger(__name__)
+
+TCP_STATE_ESTABLISHED = "01"
+TCP_STATE_LISTEN = "0A"
+SSH_PORT = 22
+
+
+class ExecSSHDetectionBackend:
+    """Detects SSH sessions by probing every container with docker exec"""
+    name = "exec"
+
+    def __init__(self, docker_service: DockerService):
+        self.docker_service = docker_service
+
+    def detect_sessions(self, containers) -> Dict[str, list]:
+        """Return active session IDs keyed by container Docker ID"""
+        return self.docker_service.check_active_ssh_sessions_bulk([container.docker_id for container in containers])
+
+
+class HostSSHDetectionBackend:
+    """Detects SSH sessions from the host connection tables
+
+    Every challenge container publishes its SSH port on a unique host port, so established
+    connections to that port in the host /proc/1/net/tcp (userland proxy) or nf_conntrack (iptables NAT)
+    belong to the container. Proxy connections only count for ports with a listening socket, since
+    outbound connections from ephemeral ports overlap the published port range, and connections to a
+    remote port 22 are the proxy's own legs to containers. Tables are read once per sweep regardless of
+    the number of containers.
+    Only connections through published ports are visible - containers reachable solely from
+    inside the challenge network report no sessions of their own.
+    """
+    name = "host"
+
+    def __init__(self, tcp_paths: list[str] = None, conntrack_path: str = None):
+        self.tcp_paths = tcp_paths or settings.SSH_DETECTION_PROC_NET_TCP_PATHS
+        self.conntrack_path = conntrack_path or settings.SSH_DETECTION_CONNTRACK_PATH
+
+    def detect_sessions(self, containers) -> Dict[str, list]:
+        """Return active session IDs keyed by container Docker ID"""
+        containers_by_port = {container.port: container for container in containers if container.port}
+        connections = self._read_established_connections()
+
+        sessions = {container.docker_id: [] for container in containers}
+        for local_port, remote_ip, remote_port in sorted(connections):
+            container = containers_by_port.get(local_port)
+            if container:
+                sessions[container.docker_id].append(f"ssh-host-{local_port}-{remote_ip}:{remote_port}")
+
+        logger.debug(f"Found {sum(len(ids) for ids in sessions.values())} SSH connections in host tables")
+        return sessions
+
+    def _read_established_connections(self) -> set:
+        """Read (local port, remote IP, remote port) of all established external connections"""
+        connections = set()
+        readable = False
+
+        listening_ports, proxy_connections = set(), set()
+        for path in self.tcp_paths:
+            try:
+                with open(path) as f:
+                    listening, established = self._parse_proc_net_tcp(f.read())
+                listening_ports.update(listening)
+                proxy_connections.update(established)
+                readable = True
+            except OSError as e:
+                logger.debug(f"Could not read {path}: {e}")
+        connections.update(connection for connection in proxy_connections if connection[0] in listening_ports)
+
+        if self.conntrack_path:
+            try:
+                with open(self.conntrack_path) as f:
+                    connections.update(self._parse_conntrack(f.read()))
+                readable = True
+            except OSError as e:
+                logger.debug(f"Could not read {self.conntrack_path}: {e}")
+
+        if not readable:
+            raise SSHDetectionUnavailableError("No host connection table is readable")
+
+        return {
+            connection for connection in connections
+            if connection[2] != SSH_PORT and not self._is_loopback(connection[1])
+        }
+
+    @staticmethod
+    def _is_loopback(ip: str) -> bool:
+        address = ipaddress.ip_address(ip)
+        return (getattr(address, 'ipv4_mapped', None) or address).is_loopback
+
+    @staticmethod
+    def _parse_proc_net_tcp(content: str) -> tuple[set, set]:
+        """Parse listening ports and established connections from /proc/net/tcp or /proc/net/tcp6"""
+        listening_ports = set()
+        connections = set()
+        for line in content.split('\n')[1:]:
+            parts = line.split()
+            if len(parts) < 4 or parts[3] not in (TCP_STATE_ESTABLISHED, TCP_STATE_LISTEN):
+                continue
+            try:
+                _, local_port = HostSSHDetectionBackend._decode_proc_address(parts[1])
+                remote_ip, remote_port = HostSSHDetectionBackend._decode_proc_address(parts[2])
+            except ValueError:
+                continue
+            if parts[3] == TCP_STATE_LISTEN:
+                listening_ports.add(local_port)
+            else:
+                connections.add((local_port, remote_ip, remote_port))
+        return listening_ports, connections
+
+    @staticmethod
+    def _decode_proc_address(address: str) -> tuple[str, int]:
+        """Decode a hex "address:port" pair from /proc/net/tcp"""
+        host, port = address.split(':')
+        raw = bytes.fromhex(host)
+        # Addresses are stored as 32-bit words in host (little-endian) byte order
+        raw = b''.join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+        family = socket.AF_INET if len(raw) == 4 else socket.AF_INET6
+        return socket.inet_ntop(family, raw), int(port, 16)
+
+    @staticmethod
+    def _parse_conntrack(content: str) -> set:
+        """Parse established TCP connections from nf_conntrack, keyed by the original destination port"""
+        connections = set()
+        for line in content.split('\n'):
+            if ' tcp ' not in line or ' ESTABLISHED ' not in line:
+                continue
+            fields = {}
+            for token in line.split():
+                key, sep, value = token.partition('=')
+                # Keep the first occurrence - the original direction of the connection
+                if sep and key not in fields:
+                    fields[key] = value
+            try:
+                connections.add((int(fields['dport']), fields['src'], int(fields['sport'])))
+            except (KeyError, ValueError):
+                continue
+        return connections
+
+
+class SSHDetectionService:
+    """Detects active SSH sessions using the configured backend with exec probing as fallback"""
+    backends = {
+        ExecSSHDetectionBackend.name: ExecSSHDetectionBackend,
+        HostSSHDetectionBackend.name: HostSSHDetectionBackend,
+    }
+
+    def __init__(self, docker_service: DockerService = None, backend: str = None):
+        self.docker_service = docker_service or DockerService()
+        self.fallback = ExecSSHDetectionBackend(self.docker_service)
+
+        backend = backend or settings.SSH_DETECTION_BACKEND
+        if backend not in self.backends:
+            logger.warning(f"Unknown SSH detection backend {backend}, using {self.fallback.name}")
+            backend = self.fallback.name
+        self.backend = self.fallback if backend == self.fallback.name else self.backends[backend]()
+
+    def detect_sessions(self, containers) -> Dict[str, list]:
+        """Return active session IDs keyed by container Docker ID"""
+        containers = list(containers)
+        if not containers:
+            return {}
+
+        if self.backend is not self.fallback:
+            try:
+                return self.backend.detect_sessions(containers)
+            except Exception as e:
+                logger.warning(f"SSH detection backend {self.backend.name} failed, "
+                               f"falling back to {self.fallback.name}: {e}")
+
+        return self.fallback.detect_sessions(containers)
@@ -0,0 +1,58 @@
+import logging
+
+from django.db.models import Sum
+
+from challenges.models import ChallengeDeployment, ChallengeTemplate
+from challenges.models.enums import TemplateBuildMode
+from challenges.services import ChallengeService
+from ctf.models import GameSession
+from ctf.models.enums import GameSessionStatus
+
+logger = logging.getLogger(__name__)
+
+
+class WarmPoolService:
+    """Keeps pre-provisioned deployments ready for templates in shared build mode"""
+
+    def __init__(self, challenge_service: ChallengeService = None):
+        self.challenge_service = challenge_service or ChallengeService()
+
+    @staticmethod
+    def get_target_size(template) -> int:
+        """Get the number of pooled deployments the template should have"""
+        if template.build_mode != TemplateBuildMode.SHARED:
+            return 0
+
+        planned = GameSession.objects.filter(
+            template=template,
+            status=GameSessionStatus.PLANNED
+        ).aggregate(total=Sum('warm_pool_size'))['total'] or 0
+        return template.warm_pool_size + planned
+
+    def fill_pool(self, template) -> int:
+        """Create or remove pooled deployments until the template pool has its target size"""
+        target = self.get_target_size(template)
+        pooled = list(ChallengeDeployment.objects.filter(template=template, is_pooled=True).order_by('pk'))
+
+        for deployment in pooled[target:]:
+            logger.info(f"Removing surplus pooled deployment {deployment.pk} of '{template.name}'")
+            self.challenge_service.cleanup_failed_deployment(deployment, {})
+
+        missing = max(0, target - len(pooled))
+        created = 0
+        for _ in range(missing):
+            try:
+                self.challenge_service.prepare_pooled_deployment(template)
+                created += 1
+            except Exception as e:
+                logger.error(f"Failed to fill warm pool of '{template.name}': {e}")
+                break
+
+        if target or pooled:
+            logger.info(f"Warm pool of '{template.name}': {min(len(pooled), target) + created}/{target} ready")
+        return created
+
+    def fill_all_pools(self) -> dict:
+        """Fill warm pools of all templates, returning the number of created deployments per template"""
+        templates = ChallengeTemplate.objects.filter(build_mode=TemplateBuildMode.SHARED)
+        return {template.name: self.fill_pool(template) for template in templates}
@@ -2,12 +2,15 @@ import logging
 from datetime import timedelta
 
 from celery import shared_task
+from django.db import transaction
 from django.utils import timezone
 
-from challenges.models import ChallengeDeployment, DeploymentAccess
-from challenges.models.enums import ContainerStatus
-from challenges.services import ContainerService, DockerService, DeploymentService
+from challenges.models import ChallengeContainer, ChallengeDeployment, DeploymentAccess, DeploymentAccessTotal
+from challenges.models.enums import ContainerOperation, ContainerStatus
+from challenges.services import ContainerService, DeploymentService, SSHDetectionService, WarmPoolService
+from ctf.models.enums import GameSessionStatus
 from ctf.models.settings import GlobalSettings
+from ctf.services import TeamEventService
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +38,7 @@ def check_inactive_deployments():
     cutoff_time = timezone.now() - timedelta(minutes=settings.inactive_container_timeout)
 
     inactive_deployments = ChallengeDeployment.objects.filter(
+        is_pooled=False,
         has_active_connections=False,
         last_activity__lt=cutoff_time,
         containers__status=ContainerStatus.RUNNING
@@ -97,15 +101,17 @@ def monitor_ssh_connections():
 
     This task checks for active SSH connections across all deployments
     and updates the deployment's has_active_connections flag accordingly.
-    It uses the docker_service to check for active SSH connections and the deployment_service to record and end access sessions.
+    Time limits of all deployments are enforced first in one batch, before sessions are detected.
+    It uses the ssh_detection_service to find active SSH connections of all running containers in one sweep and the deployment_service to record and end access sessions.
     """
     logger.info("Running monitor_ssh_connections task")
     container_service = ContainerService()
-    docker_service = DockerService()
+    ssh_detection_service = SSHDetectionService()
     deployment_service = DeploymentService()
 
     try:
         deployments = ChallengeDeployment.objects.filter(
+            is_pooled=False,
             containers__status=ContainerStatus.RUNNING
         ).distinct().prefetch_related(
             'containers',
@@ -115,6 +121,8 @@ def monitor_ssh_connections():
             'template'
         )
 
+        exceeded_time_limits = deployment_service.enforce_time_limits(deployments)
+
         active_access_records = DeploymentAccess.objects.filter(
             is_active=True,
             deployment__in=deployments
@@ -132,6 +140,11 @@ def monitor_ssh_connections():
 
         logger.info(f"Found {len(deployments)} active deployments")
 
+        ssh_sessions_map = ssh_detection_service.detect_sessions(ChallengeContainer.objects.filter(
+            deployment__in=deployments,
+            status=ContainerStatus.RUNNING
+        ).only('docker_id', 'port'))
+
         for deployment in deployments:
             try:
                 logger.info(f"Checking active SSH connections for deployment {deployment.id}")
@@ -149,7 +162,7 @@ def monitor_ssh_connections():
                 matched_db_sessions = set()
 
                 for container in running_containers:
-                    container_active_sessions = docker_service.check_active_ssh_sessions(container.docker_id)
+                    container_active_sessions = ssh_sessions_map.get(container.docker_id, [])
 
                     valid_sessions = {
                         sid for sid in container_active_sessions
@@ -178,13 +191,6 @@ def monitor_ssh_connections():
                         matched_db_sessions.add(session_id)
                         container = container_session_map.get(session_id)
                         if container:
-                            team = container.red_team if container.red_team else container.blue_team
-                            if team and deployment_service.has_exceeded_time_limit(team, deployment):
-                                logger.info(f"Team {team.name} has exceeded time limit for deployment {deployment.id}")
-                                for dep_container in running_containers:
-                                    container_service.kill_ssh_session(dep_container, True)
-                                deployment_service.end_deployment_access(deployment, session_id)
-                                continue
                             container.update_activity()
                         logger.debug(f"Matched docker session {session_id} to existing DB session")
                         continue
@@ -203,14 +209,6 @@ def monitor_ssh_connections():
                             found_match = True
                             container = container_session_map.get(session_id)
                             if container:
-                                team = container.red_team if container.red_team else container.blue_team
-                                if team and deployment_service.has_exceeded_time_limit(team, deployment):
-                                    logger.info(
-                                        f"Team {team.name} has exceeded time limit for deployment {deployment.id}")
-                                    for dep_container in running_containers:
-                                        container_service.kill_ssh_session(dep_container, True)
-                                    deployment_service.end_deployment_access(deployment, session_id)
-                                    continue
                                 container.update_activity()
                             logger.debug(f"Matched docker session {session_id} to existing DB session")
                             break
@@ -220,12 +218,10 @@ def monitor_ssh_connections():
                         if container:
                             team = container.red_team if container.red_team else container.blue_team
                             if team:
-                                if deployment_service.has_exceeded_time_limit(team, deployment):
+                                if (deployment.id, team.id) in exceeded_time_limits:
                                     logger.info(
                                         f"Team {team.name} has exceeded time limit for deployment {deployment.id}")
-                                    for dep_container in running_containers:
-                                        container_service.kill_ssh_session(dep_container, True)
-                                    deployment_service.end_deployment_access(deployment, session_id)
+                                    container_service.bulk_kill_ssh_sessions(running_containers, True)
                                     continue
 
                                 logger.info(f"Recording new deployment access session {session_id}")
@@ -241,6 +237,9 @@ def monitor_ssh_connections():
                     logger.info(f"Ending deployment access session {session_id}")
                     deployment_service.end_deployment_access(deployment, session_id)
 
+                if has_connections or deployment.has_active_connections:
+                    TeamEventService.publish_time_restrictions(deployment)
+
                 if has_connections != deployment.has_active_connections:
                     deployment.has_active_connections = has_connections
                     deployment.last_activity = timezone.now()
@@ -251,3 +250,88 @@ def monitor_ssh_connections():
 
     except Exception as e:
         logger.error(f"Error monitoring SSH connections: {e}")
+
+
+@shared_task
+def refresh_deployment_status(deployment_id):
+    """Sync status of a deployment with Docker outside of the request path"""
+    deployment_service = DeploymentService()
+    try:
+        deployment = ChallengeDeployment.objects.get(pk=deployment_id)
+        if not deployment_service.sync_deployment_status(deployment):
+            logger.warning(f"Failed to refresh status of deployment {deployment_id}")
+    except ChallengeDeployment.DoesNotExist:
+        logger.warning(f"Deployment {deployment_id} no longer exists")
+    finally:
+        deployment_service.release_status_refresh(deployment_id)
+
+
+@shared_task
+def start_deployment(deployment_id):
+    """Start a deployment requested by a team, routed to the dedicated deployment start queue"""
+    deployment_service = DeploymentService()
+    try:
+        deployment = ChallengeDeployment.objects.get(pk=deployment_id)
+        logger.info(f"Starting deployment {deployment_id}")
+        if not deployment_service.start_deployment(deployment):
+            logger.error(f"Failed to start deployment {deployment_id}")
+        if not deployment_service.sync_deployment_status(deployment):
+            logger.warning(f"Failed to sync deployment {deployment_id} status")
+    except ChallengeDeployment.DoesNotExist:
+        logger.warning(f"Deployment {deployment_id} no longer exists")
+        return
+    finally:
+        deployment_service.release_start(deployment_id)
+
+    TeamEventService.publish_deployment_status(deployment)
+
+
+@shared_task
+def fill_warm_pools():
+    """Pre-provision pooled deployments for templates in shared build mode"""
+    logger.info("Running fill_warm_pools task")
+    created = WarmPoolService().fill_all_pools()
+    logger.info(f"Created {sum(created.values())} pooled deployments")
+
+
+@shared_task
+def reconcile_access_totals():
+    """Check running access time totals of active game sessions against merged access records and repair drift"""
+    logger.info("Running reconcile_access_totals task")
+    pairs = DeploymentAccess.objects.filter(
+        deployment__assignments__session__status=GameSessionStatus.ACTIVE
+    ).order_by().values_list('deployment_id', 'team_id').distinct()
+
+    repaired = 0
+    for deployment_id, team_id in pairs:
+        try:
+            with transaction.atomic():
+                if not DeploymentAccessTotal.lock(deployment_id, team_id).reconcile():
+                    repaired += 1
+        except Exception as e:
+            logger.error(f"Failed to reconcile access total of team {team_id} on deployment {deployment_id}: {e}")
+
+    logger.info(f"Reconciled access totals, repaired {repaired}")
+
+
+@shared_task
+def run_container_operation(container_ids, operation, timeout=None):
+    """Start, stop or remove the given containers concurrently, containers of pooled deployments are not started"""
+    logger.info(f"Running bulk {operation} of {len(container_ids)} containers")
+    containers = ChallengeContainer.objects.filter(pk__in=container_ids).select_related('deployment')
+    if ContainerOperation(operation) == ContainerOperation.START:
+        containers = containers.exclude(deployment__is_pooled=True)
+    return ContainerService().bulk_container_operation(containers, ContainerOperation(operation), timeout=timeout)
+
+
+@shared_task
+def run_deployment_operation(deployment_ids, operation, timeout=None):
+    """Start or stop containers of the given deployments concurrently"""
+    logger.info(f"Running bulk {operation} of {len(deployment_ids)} deployments")
+    deployments = ChallengeDeployment.objects.filter(pk__in=deployment_ids)
+    deployment_service = DeploymentService()
+    if ContainerOperation(operation) == ContainerOperation.START:
+        return deployment_service.start_deployments(deployments)
+    if ContainerOperation(operation) == ContainerOperation.STOP:
+        return deployment_service.stop_deployments(deployments, timeout)
+    raise ValueError(f"Unsupported deployment operation {operation}")
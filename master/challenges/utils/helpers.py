@@ -1,6 +1,39 @@
+from datetime import timedelta
+
+
 def get_time_string_from_seconds(seconds: float) -> str:
     """Returns time string in '%dh %dm %ds' format from seconds."""
     hours = seconds // 3600
     minutes = (seconds % 3600) // 60
     seconds = seconds % 60
     return f"{hours}h {minutes}m {seconds}s"
+
+
+def merge_access_periods(records, now) -> tuple:
+    """Merge overlapping access periods given as (start, end, is active) ordered by start
+
+    Returns:
+        tuple: (duration of closed periods, start of the open period, number of open sessions)
+    """
+    total = timedelta(0)
+    open_sessions = 0
+    current_start = current_end = None
+    for start, end, is_active in records:
+        if is_active:
+            open_sessions += 1
+            end = now
+        end = end or start
+
+        if current_end is not None and start <= current_end:
+            current_end = max(current_end, end)
+            continue
+        if current_start is not None:
+            total += current_end - current_start
+        current_start, current_end = start, end
+
+    if current_start is None:
+        return total, None, 0
+    # Open sessions last until now, so they all fall into the last merged period
+    if open_sessions:
+        return total, current_start, open_sessions
+    return total + current_end - current_start, None, 0
@@ -1,14 +1,28 @@
+import hashlib
+import io
 import logging
+import os
+import re
+import tarfile
+import threading
 from pathlib import Path
 from typing import Optional, Dict, Any
 
 import yaml
 from django.conf import settings
+from docker.utils.build import exclude_paths
 
+from challenges.models.constants import DockerConstants
+from challenges.models.enums import TemplateBuildMode
 from challenges.models.exceptions import ContainerOperationError
 
 logger = logging.getLogger(__name__)
 
+FLAG_PLACEHOLDER_PATTERN = re.compile(rf"{DockerConstants.FLAG_PLACEHOLDER_PREFIX}\d+".encode())
+
+_placeholder_index_cache: Dict[tuple[str, str], Dict[str, list[tuple[int, str]]]] = {}
+_placeholder_index_lock = threading.Lock()
+
 
 def get_templates_dir() -> Path:
     """Get the templates directory path"""
@@ -49,8 +63,118 @@ def read_template_info(template_dir: Path) -> Optional[Dict[str, Any]]:
             "description": metadata.get("description", f"Container template from {template_dir.name}"),
             "docker_compose": compose_content,
             "containers": metadata.get("containers", []),
-            "networks": metadata.get("networks", [])
+            "networks": metadata.get("networks", []),
+            "build_mode": metadata.get("build_mode", TemplateBuildMode.PER_TEAM)
         }
     except Exception as e:
         logger.error(f"Error reading template from {template_dir}: {e}")
         return None
+
+
+def get_build_context_fingerprint(build_path: str | Path) -> str:
+    """Get short fingerprint of a build context based on file paths, sizes and modification times"""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(build_path):
+        dirs.sort()
+        for file in sorted(files):
+            filepath = Path(root) / file
+            stat = filepath.stat()
+            digest.update(f"{filepath.relative_to(build_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:12]
+
+
+def get_placeholder_index(template_path: str | Path) -> Dict[str, list[tuple[int, str]]]:
+    """Get flag placeholder offsets of every text file in the template, indexed once per template version
+
+    Returns:
+        dict: Relative file path mapped to a list of (byte offset, placeholder) pairs
+    """
+    template_path = Path(template_path)
+    cache_key = (str(template_path), get_build_context_fingerprint(template_path))
+    with _placeholder_index_lock:
+        if cache_key in _placeholder_index_cache:
+            return _placeholder_index_cache[cache_key]
+
+    index = {}
+    prefix = DockerConstants.FLAG_PLACEHOLDER_PREFIX.encode()
+    for root, _, files in os.walk(template_path):
+        for file in files:
+            filepath = Path(root) / file
+            data = filepath.read_bytes()
+            if prefix not in data:
+                continue
+            try:
+                data.decode('utf-8')
+            except UnicodeDecodeError:
+                logger.debug(f"Skipping binary file {filepath} containing flag placeholders")
+                continue
+
+            index[str(filepath.relative_to(template_path))] = [
+                (match.start(), match.group().decode()) for match in FLAG_PLACEHOLDER_PATTERN.finditer(data)
+            ]
+
+    logger.info(f"Indexed flag placeholders of {template_path}: {len(index)} files")
+    with _placeholder_index_lock:
+        _placeholder_index_cache[cache_key] = index
+    return index
+
+
+def substitute_placeholders(data: bytes, placeholders: list[tuple[int, str]], flag_values: Dict[str, str]) -> bytes:
+    """Splice flag values into file content at the indexed placeholder offsets"""
+    chunks = []
+    position = 0
+    for offset, placeholder in placeholders:
+        if placeholder not in flag_values:
+            continue
+        chunks.append(data[position:offset])
+        chunks.append(flag_values[placeholder].encode())
+        position = offset + len(placeholder)
+    chunks.append(data[position:])
+    return b"".join(chunks)
+
+
+def read_dockerignore(build_path: Path) -> list[str]:
+    """Read exclude patterns from .dockerignore of the build context"""
+    dockerignore = build_path / ".dockerignore"
+    if not dockerignore.exists():
+        return []
+    lines = (line.strip() for line in dockerignore.read_text().splitlines())
+    return [line for line in lines if line and not line.startswith('#')]
+
+
+def create_build_context(build_path: str | Path, template_path: str | Path, flag_values: Dict[str, str],
+                         dockerfile_steps: str = "") -> io.BytesIO:
+    """Create an in-memory tar build context of build_path with flag values substituted
+
+    Unchanged files are streamed from the template directory, files containing placeholders
+    are spliced in memory using the placeholder index of the template. Given Dockerfile steps
+    are appended to the Dockerfile of the build context.
+    """
+    build_path, template_path = Path(build_path), Path(template_path)
+    index = get_placeholder_index(template_path)
+
+    context = io.BytesIO()
+    substituted = 0
+    with tarfile.open(fileobj=context, mode="w") as tar:
+        for relative_path in sorted(exclude_paths(str(build_path), read_dockerignore(build_path))):
+            filepath = build_path / relative_path
+            placeholders = index.get(str(filepath.relative_to(template_path)))
+            is_dockerfile = bool(dockerfile_steps) and relative_path == "Dockerfile"
+            if (placeholders is None and not is_dockerfile) or not filepath.is_file() or filepath.is_symlink():
+                tar.add(filepath, arcname=relative_path, recursive=False)
+                continue
+
+            data = filepath.read_bytes()
+            if placeholders is not None:
+                data = substitute_placeholders(data, placeholders, flag_values)
+                substituted += 1
+            if is_dockerfile:
+                data = data.rstrip(b"\n") + f"\n{dockerfile_steps}\n".encode()
+            info = tar.gettarinfo(filepath, arcname=relative_path)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+    context.seek(0)
+    logger.debug(f"Created build context of {build_path}: {context.getbuffer().nbytes} bytes, "
+                 f"{substituted} files with flags")
+    return context
@@ -11,6 +11,7 @@ from challenges.services import DeploymentService
 from challenges.utils.view_helpers import get_user_challenges
 from ctf.models import TeamAssignment
 from ctf.models.settings import GlobalSettings
+from ctf.services import RateLimitService
 from ctf.utils.view_helpers import get_session_time_restrictions, create_challenge_data_dict
 
 logger = logging.getLogger(__name__)
@@ -30,7 +31,7 @@ class ChallengesView(LoginRequiredMixin, TemplateView):
 
             for challenge in context.get('challenges', []):
                 try:
-                    deployment_service.sync_deployment_status(challenge.deployment)
+                    deployment_service.request_status_refresh(challenge.deployment)
 
                     has_time_restriction, max_time, time_spent, remaining_time, time_exceeded = (
                         get_session_time_restrictions(challenge, self.request.user.team)
@@ -64,11 +65,7 @@ class ChallengesView(LoginRequiredMixin, TemplateView):
             if not request.user.team or request.user.team != challenge.team:
                 return JsonResponse({'error': 'You do not have permission to access this challenge'}, status=403)
 
-            deployment_service = DeploymentService()
-            try:
-                deployment_service.sync_deployment_status(challenge.deployment)
-            except Exception as e:
-                logger.error(f"Error syncing deployment status: {e}")
+            DeploymentService().request_status_refresh(challenge.deployment)
 
             challenge_data = create_challenge_data_dict(challenge, request.user.team)
 
@@ -104,6 +101,12 @@ def get_new_hint(request, challenge_uuid):
     if not request.user.team or not assignment:
         return JsonResponse({'error': 'You do not have permission to access this challenge'}, status=403)
 
+    retry_after = RateLimitService.check(RateLimitService.HINT_REQUEST, request.user)
+    if retry_after:
+        response = JsonResponse({'error': f'Too many hint requests, try again in {retry_after} seconds'}, status=429)
+        response['Retry-After'] = str(retry_after)
+        return response
+
     new_hint_flag = assignment.get_next_available_flag_hint()
     if not new_hint_flag:
         return JsonResponse({'error': 'You have taken all hints for this challenge'}, status=400)
@@ -1,6 +1,4 @@
 import logging
-import time
-from threading import Thread
 
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
@@ -37,20 +35,15 @@ class DeploymentStatusView(TeamRequiredMixin, AjaxResponseMixin, DetailView):
             )
 
             deployment_service = DeploymentService()
-            try:
-                deployment_service.sync_deployment_status(assignment.deployment)
-            except Exception as e:
-                logger.error(f"Error syncing deployment status: {e}")
-                return JsonResponse({
-                    'is_running': False,
-                    'error': str(e),
-                    'connection_info': []
-                })
+            is_starting = deployment_service.is_start_pending(assignment.deployment)
+            if not is_starting:
+                deployment_service.request_status_refresh(assignment.deployment)
 
             challenge_data = create_challenge_data_dict(assignment, request.user.team)
 
             response_data = {
                 'is_running': challenge_data['is_running'],
+                'is_starting': is_starting,
                 'connection_info': challenge_data.get('connection_string', ''),
             }
             if 'time_restrictions' in challenge_data:
@@ -86,12 +79,10 @@ class StartDeploymentView(TeamRequiredMixin, TimeRestrictionMixin, AjaxResponseM
             if time_check_result:
                 return time_check_result
 
-            thread = Thread(
-                target=start_deployment_async,
-                args=(challenge.deployment.id, request.user.team.id)
-            )
-            thread.daemon = True
-            thread.start()
+            deployment_service = DeploymentService()
+            if not deployment_service.request_start(challenge.deployment) and \
+                    not deployment_service.is_start_pending(challenge.deployment):
+                raise RuntimeError("Failed to queue deployment start")
 
             if self.is_ajax():
                 # Create a simplified response
@@ -123,27 +114,3 @@ class StartDeploymentView(TeamRequiredMixin, TimeRestrictionMixin, AjaxResponseM
                 return JsonResponse({'error': str(e)}, status=500)
             return redirect('challenges')
 
-
-def start_deployment_async(deployment_id, team_id):
-    """Background task to start a deployment"""
-    try:
-        from challenges.models import ChallengeDeployment
-
-        logger.info(f"Starting deployment {deployment_id} for team {team_id}")
-        deployment = ChallengeDeployment.objects.get(id=deployment_id)
-
-        deployment_service = DeploymentService()
-        success = deployment_service.start_deployment(deployment)
-
-        if success:
-            logger.info(f"Deployment {deployment_id} started successfully, syncing status...")
-            time.sleep(2)
-            sync_result = deployment_service.sync_deployment_status(deployment)
-            if not sync_result:
-                logger.warning(f"Failed to sync deployment {deployment_id} status")
-            else:
-                logger.info(f"Deployment {deployment_id} status synced successfully")
-        else:
-            logger.error(f"Failed to start deployment {deployment_id}")
-    except Exception as e:
-        logger.error(f"Error in async deployment start: {e}", exc_info=True)
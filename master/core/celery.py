@@ -35,4 +35,20 @@ app.conf.beat_schedule = {
         'task': 'challenges.tasks.monitor_ssh_connections',
         'schedule': crontab(minute='1-59/2'),  # Every 2 minutes
     },
+    'fill_warm_pools': {
+        'task': 'challenges.tasks.fill_warm_pools',
+        'schedule': crontab(minute=0, hour=3),  # Daily at 3:00 AM
+    },
+    'reconcile_access_totals': {
+        'task': 'challenges.tasks.reconcile_access_totals',
+        'schedule': crontab(minute=15),  # Hourly
+    },
+    'rebuild_rankings': {
+        'task': 'ctf.tasks.rebuild_rankings',
+        'schedule': crontab(minute=45),  # Hourly
+    },
+    'rebuild_flag_filter': {
+        'task': 'ctf.tasks.rebuild_flag_filter',
+        'schedule': crontab(minute=30),  # Hourly
+    },
 }
@@ -12,6 +12,7 @@ LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = '/'
 
 INSTALLED_APPS = [
+    'daphne',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -160,6 +161,11 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+# Deployment starts requested by teams run on a dedicated queue, its worker concurrency caps parallel starts
+DEPLOYMENT_START_QUEUE = os.environ.get('DEPLOYMENT_START_QUEUE', 'deployments')
+CELERY_TASK_ROUTES = {
+    'challenges.tasks.start_deployment': {'queue': DEPLOYMENT_START_QUEUE},
+}
 
 # Django Celery Beat Settings
 DJANGO_CELERY_BEAT_TZ_AWARE = True
@@ -170,7 +176,67 @@ CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
         'CONFIG': {
-            "hosts": [('redis', 6379)],
+            "hosts": [os.environ.get('REDIS_URL')],
         },
-    },
+    } if os.environ.get('REDIS_URL') else {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    }
+}
+
+# Docker Configuration
+DOCKER_API_MAX_WORKERS = int(os.environ.get('DOCKER_API_MAX_WORKERS', 16))
+# Seconds a container gets to shut down gracefully before it is killed
+CONTAINER_STOP_TIMEOUT = int(os.environ.get('CONTAINER_STOP_TIMEOUT', 10))
+
+# SSH session detection backend used by monitor_ssh_connections - "exec" probes every container,
+# "host" reads the host connection tables from the host /proc mounted at /host/proc. Tables are read through
+# /proc/1 of the host, /proc/net resolves to the network namespace of the reading process instead
+SSH_DETECTION_BACKEND = os.environ.get('SSH_DETECTION_BACKEND', 'exec')
+SSH_DETECTION_PROC_NET_TCP_PATHS = os.environ.get(
+    'SSH_DETECTION_PROC_NET_TCP_PATHS', '/host/proc/1/net/tcp,/host/proc/1/net/tcp6'
+).split(',')
+SSH_DETECTION_CONNTRACK_PATH = os.environ.get('SSH_DETECTION_CONNTRACK_PATH', '/host/proc/1/net/nf_conntrack')
+
+# Cache Configuration
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
+        'KEY_PREFIX': 'ctf',
+    } if os.environ.get('REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
 }
+
+# Seconds a synced deployment status is considered fresh before views schedule another background sync
+DEPLOYMENT_STATUS_CACHE_TTL = int(os.environ.get('DEPLOYMENT_STATUS_CACHE_TTL', 30))
+DEPLOYMENT_STATUS_REFRESH_TIMEOUT = int(os.environ.get('DEPLOYMENT_STATUS_REFRESH_TIMEOUT', 60))
+# Seconds a queued deployment start blocks further start requests of the same deployment
+DEPLOYMENT_START_TIMEOUT = int(os.environ.get('DEPLOYMENT_START_TIMEOUT', 300))
+
+# Redis holding team rankings, the flag filter and rate limit buckets - without it rankings are read from
+# the database, the flag filter is disabled and requests are not rate limited
+CTF_REDIS_URL = os.environ.get('REDIS_URL')
+# Seconds a scoreboard snapshot is shared between viewers - live updates are streamed on top of it
+SCOREBOARD_SNAPSHOT_TTL = int(os.environ.get('SCOREBOARD_SNAPSHOT_TTL', 30))
+# Maximum number of missed score updates replayed to a reconnecting viewer before it reloads the snapshot
+SCOREBOARD_RESUME_LIMIT = int(os.environ.get('SCOREBOARD_RESUME_LIMIT', 500))
+# Upper bound of points per team in score charts - longer time windows switch to coarser score rollups
+SCORE_HISTORY_MAX_POINTS = int(os.environ.get('SCORE_HISTORY_MAX_POINTS', 1500))
+# Seconds badge updates are delayed so score changes landing together are handled in one run
+BADGE_UPDATE_DELAY = int(os.environ.get('BADGE_UPDATE_DELAY', 2))
+# Bloom filter bitmap rejecting guessed flags without a database query.
+# The defaults (1 MiB, 7 hashes) keep false positives below 1% up to ~870k uncaptured flags
+FLAG_FILTER_SIZE = int(os.environ.get('FLAG_FILTER_SIZE', 2 ** 23))
+FLAG_FILTER_HASHES = int(os.environ.get('FLAG_FILTER_HASHES', 7))
+
+# Host ports published for challenge container SSH access
+CONTAINER_PORT_RANGE_START = int(os.environ.get('CONTAINER_PORT_RANGE_START', 30000))
+CONTAINER_PORT_RANGE_END = int(os.environ.get('CONTAINER_PORT_RANGE_END', 49000))
+CONTAINER_PORT_BLOCK_DURATION = int(os.environ.get('CONTAINER_PORT_BLOCK_DURATION', 600))
+
+# Address pool split into per-network subnets for challenge networks - existing allocations keep their
+# subnet when the pool or prefix changes, new networks skip subnets overlapping them
+NETWORK_SUBNET_POOL = os.environ.get('NETWORK_SUBNET_POOL', '10.128.0.0/12')
+NETWORK_SUBNET_PREFIX = int(os.environ.get('NETWORK_SUBNET_PREFIX', 24))
+NETWORK_SUBNET_BLOCK_DURATION = int(os.environ.get('NETWORK_SUBNET_BLOCK_DURATION', 600))
@@ -62,7 +62,7 @@ class GameSessionAdmin(admin.ModelAdmin):
     list_display = ('name', 'status', 'template', 'start_date', 'end_date', 'is_active')
     list_filter = ('status',)
     search_fields = ('name',)
-    readonly_fields = ('end_date',)
+    readonly_fields = ('end_date', 'teardown_progress')
 
     def is_active(self, obj):
         return obj.is_active()
@@ -70,6 +70,16 @@ class GameSessionAdmin(admin.ModelAdmin):
     is_active.boolean = True
     is_active.short_description = "Active"
 
+    def teardown_progress(self, obj):
+        progress = obj.get_teardown_progress()
+        if not progress:
+            return "-"
+        if "total" not in progress:
+            return progress["state"]
+        return f"{progress['state']}: {progress['stage']} ({progress['current']}/{progress['total']})"
+
+    teardown_progress.short_description = "Teardown"
+
     def save_model(self, request, obj, form, change):
         """Override save_model to handle session creation"""
         try:
@@ -143,7 +153,13 @@ class GlobalSettingsAdmin(admin.ModelAdmin):
             'classes': ('wide',),
         }),
         ('Container Settings', {
-            'fields': ('enable_auto_container_shutdown', 'inactive_container_timeout'),
+            'fields': ('enable_auto_container_shutdown', 'inactive_container_timeout', 'max_parallel_provisioning',
+                       'provisioning_retries'),
+            'classes': ('wide',),
+        }),
+        ('Rate Limit Settings', {
+            'fields': ('flag_submissions_per_minute', 'flag_submissions_per_minute_per_user',
+                       'hint_requests_per_minute', 'hint_requests_per_minute_per_user', 'rate_limit_burst'),
             'classes': ('wide',),
         }),
         ('Matchmaking Settings', {
@@ -0,0 +1,73 @@
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import async_to_sync
+from channels.generic.websocket import JsonWebsocketConsumer
+
+from ctf.services import ScoreboardService, TeamEventService
+
+logger = logging.getLogger(__name__)
+
+
+class TeamEventConsumer(JsonWebsocketConsumer):
+    """Streams events of the team of the connected user"""
+
+    def connect(self):
+        user = self.scope.get("user")
+        if not user or not user.is_authenticated or not user.team_id:
+            self.close()
+            return
+
+        self.group_name = TeamEventService.get_group_name(user.team_id)
+        async_to_sync(self.channel_layer.group_add)(self.group_name, self.channel_name)
+        self.accept()
+        logger.debug(f"User {user.pk} subscribed to events of team {user.team_id}")
+
+    def disconnect(self, code):
+        if getattr(self, "group_name", None):
+            async_to_sync(self.channel_layer.group_discard)(self.group_name, self.channel_name)
+
+    def team_event(self, event):
+        self.send_json({"type": event["event"], **event["data"]})
+
+
+class ScoreboardConsumer(JsonWebsocketConsumer):
+    """Streams score history and badge changes to scoreboard viewers
+
+    Viewers pass the cursor of their snapshot as `?cursor=` to receive the updates they missed.
+    """
+
+    def connect(self):
+        user = self.scope.get("user")
+        if not user or not user.is_authenticated:
+            self.close()
+            return
+
+        async_to_sync(self.channel_layer.group_add)(ScoreboardService.GROUP_NAME, self.channel_name)
+        self.accept()
+
+        cursor = self._get_cursor()
+        if cursor is None:
+            return
+
+        deltas = ScoreboardService.get_deltas(cursor)
+        if deltas is None:
+            self.send_json({"type": ScoreboardService.RESET})
+            return
+        for delta in deltas:
+            self.send_json(delta)
+
+    def disconnect(self, code):
+        user = self.scope.get("user")
+        if user and user.is_authenticated:
+            async_to_sync(self.channel_layer.group_discard)(ScoreboardService.GROUP_NAME, self.channel_name)
+
+    def scoreboard_event(self, event):
+        self.send_json(event["data"])
+
+    def _get_cursor(self):
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        try:
+            return int(query["cursor"][0])
+        except (KeyError, ValueError):
+            return None
@@ -1,8 +1,10 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db.models import OuterRef, Subquery
 
 from accounts.models.enums import TeamRole
-from ctf.models import Flag
+from ctf.models import Flag, TeamAssignment
+from ctf.services import FlagFilterService
 
 
 class FlagSubmissionForm(forms.Form):
@@ -19,29 +21,28 @@ class FlagSubmissionForm(forms.Form):
     def clean_flag(self):
         flag_value = self.cleaned_data['flag']
 
+        if not FlagFilterService.might_exist(flag_value):
+            raise ValidationError("Invalid flag")
+
         try:
-            flag = Flag.objects.get_free_flag_by_value(flag_value)
+            flag = self._get_flag(flag_value)
             if not flag:
                 raise ValidationError("Invalid flag")
 
-            if flag.owner == self.team:
+            if flag.owner_id == self.team.pk:
                 raise ValidationError("You cannot capture your own team's flag")
 
-            if flag.container and flag.container.deployment:
-                if flag.container.red_team != self.team:
+            if flag.container and flag.container.deployment_id:
+                if flag.container.red_team_id != self.team.pk:
                     raise ValidationError(
                         "You cannot capture flag that does not belong to deployment you are attacking")
 
-                blue_assignment = flag.container.deployment.assignments.get(role=TeamRole.BLUE)
-                if not blue_assignment:
+                if flag.deployment_blue_team_id is None:
                     raise ValidationError("Invalid flag configuration - no blue team assignment found")
 
-                if flag.container.deployment != self.challenge.deployment:
+                if flag.container.deployment_id != self.challenge.deployment_id:
                     raise ValidationError("This flag does not belong to this challenge")
-                if blue_assignment.team != self.challenge.session.team_assignments.get(
-                        role=TeamRole.BLUE,
-                        deployment=self.challenge.deployment
-                ).team:
+                if flag.deployment_blue_team_id != flag.session_blue_team_id:
                     raise ValidationError("This flag does not belong to the correct blue team")
             else:
                 raise ValidationError("Invalid flag configuration")
@@ -53,3 +54,16 @@ class FlagSubmissionForm(forms.Form):
             raise
         except Exception as e:
             raise ValidationError(str(e))
+
+    def _get_flag(self, flag_value):
+        """Get the uncaptured flag with its container and the blue teams of its deployment in one query"""
+        blue_assignments = TeamAssignment.objects.filter(
+            deployment=OuterRef('container__deployment'),
+            role=TeamRole.BLUE,
+        )
+        return Flag.objects.select_related('container').annotate(
+            deployment_blue_team_id=Subquery(blue_assignments.values('team_id')[:1]),
+            session_blue_team_id=Subquery(
+                blue_assignments.filter(session_id=self.challenge.session_id).values('team_id')[:1]
+            ),
+        ).filter(value=flag_value, is_captured=False).first()
@@ -0,0 +1,96 @@
+import copy
+import logging
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+
+from accounts.models import Team, User
+from challenges.models.exceptions import FlagAlreadyCapturedError
+from ctf.management.commands.utils import create_teams
+from ctf.models import Flag
+from ctf.services import FlagService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Benchmark flag captures per second with concurrent submitters and verify no points are lost"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flags", type=int, default=200, help="Number of flags to capture")
+        parser.add_argument("--teams", type=int, default=4, help="Number of capturing teams")
+        parser.add_argument("--workers", type=int, default=8, help="Number of concurrent submitters")
+        parser.add_argument("--submissions", type=int, default=2,
+                            help="Submissions of every flag, only the first one may score")
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4()
+        owner = Team.objects.create(name=f"Benchmark owner {run_id}")
+        teams = create_teams(run_id, options["teams"])
+        users = [
+            User.objects.create(username=f"Benchmark {i} {run_id}", email=f"benchmark-{i}@example.com", team=team)
+            for i, team in enumerate(teams)
+        ]
+
+        try:
+            flags = Flag.objects.bulk_create([
+                Flag(value=f"benchmark-{run_id}-{i}", points=random.randint(1, 100), owner=owner)
+                for i in range(options["flags"])
+            ])
+            submissions = [
+                (copy.copy(flag), copy.deepcopy(random.choice(users)))
+                for flag in flags
+                for _ in range(options["submissions"])
+            ]
+            random.shuffle(submissions)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["workers"], thread_name_prefix="capture") as executor:
+                results = list(executor.map(lambda submission: self._submit(*submission), submissions))
+            elapsed = time.perf_counter() - started
+
+            captured = results.count(True)
+            self.stdout.write(
+                f"{len(submissions)} submissions by {options['workers']} workers in {elapsed:.2f}s - "
+                f"{captured} captures, {results.count(False)} rejected duplicates, "
+                f"{len(submissions) / elapsed:.1f} submissions/s, {captured / elapsed:.1f} captures/s"
+            )
+            self._verify(teams, flags, captured)
+        finally:
+            Flag.objects.filter(value__startswith=f"benchmark-{run_id}-").delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+            Team.objects.filter(pk__in=[owner.pk, *(team.pk for team in teams)]).delete()
+
+    @staticmethod
+    def _submit(flag: Flag, user: User) -> bool:
+        try:
+            FlagService.capture_and_award(flag, user)
+            return True
+        except FlagAlreadyCapturedError:
+            return False
+        finally:
+            connection.close()
+
+    def _verify(self, teams: list[Team], flags: list[Flag], captured: int):
+        """Check every flag scored exactly once and team points match the captured flags"""
+        if captured != len(flags):
+            self.stdout.write(self.style.ERROR(f"{captured} captures for {len(flags)} flags"))
+            return
+
+        for team in teams:
+            team.refresh_from_db()
+            expected = Flag.objects.filter(pk__in=[flag.pk for flag in flags], captured_by=team).aggregate(
+                points=Sum("points"))["points"] or 0
+            if team.red_points != expected or team.score != team.blue_points + team.red_points:
+                self.stdout.write(self.style.ERROR(
+                    f"Team {team.name} has {team.red_points} red points and score {team.score}, "
+                    f"expected {expected} red points"
+                ))
+                return
+
+        self.stdout.write(self.style.SUCCESS("All flags scored exactly once, no points were lost"))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ctf', '0004_alter_teamassignment_entrypoint_container'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='globalsettings',
+            name='max_parallel_provisioning',
+            field=models.PositiveIntegerField(default=4, help_text='Maximum number of team deployments prepared in parallel when a session starts'),
+        ),
+        migrations.AddField(
+            model_name='globalsettings',
+            name='provisioning_retries',
+            field=models.PositiveIntegerField(default=2, help_text='Number of times a failed team deployment is retried when a session starts'),
+        ),
+    ]
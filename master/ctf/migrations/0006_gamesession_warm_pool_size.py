@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ctf', '0005_globalsettings_provisioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamesession',
+            name='warm_pool_size',
+            field=models.PositiveIntegerField(default=0, help_text='Number of deployments pre-provisioned for this session on top of the template warm pool while the session is planned'),
+        ),
+    ]
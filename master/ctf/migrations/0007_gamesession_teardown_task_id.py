@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ctf', '0006_gamesession_warm_pool_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamesession',
+            name='teardown_task_id',
+            field=models.CharField(blank=True, editable=False, help_text='Task distributing remaining points and stopping containers after the session is completed', max_length=64, null=True),
+        ),
+    ]
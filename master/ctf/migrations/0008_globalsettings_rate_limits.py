@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ctf', '0007_gamesession_teardown_task_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='globalsettings',
+            name='flag_submissions_per_minute',
+            field=models.PositiveIntegerField(default=20, help_text='Flag submissions allowed per team per minute, 0 disables the limit'),
+        ),
+        migrations.AddField(
+            model_name='globalsettings',
+            name='flag_submissions_per_minute_per_user',
+            field=models.PositiveIntegerField(default=10, help_text='Flag submissions allowed per player per minute, 0 disables the limit'),
+        ),
+        migrations.AddField(
+            model_name='globalsettings',
+            name='hint_requests_per_minute',
+            field=models.PositiveIntegerField(default=6, help_text='Hint requests allowed per team per minute, 0 disables the limit'),
+        ),
+        migrations.AddField(
+            model_name='globalsettings',
+            name='hint_requests_per_minute_per_user',
+            field=models.PositiveIntegerField(default=3, help_text='Hint requests allowed per player per minute, 0 disables the limit'),
+        ),
+        migrations.AddField(
+            model_name='globalsettings',
+            name='rate_limit_burst',
+            field=models.PositiveIntegerField(default=5, help_text='Number of requests that can be made at once before the per minute limits apply'),
+        ),
+    ]
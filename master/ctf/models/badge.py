@@ -1,5 +1,4 @@
 from django.db import models
-from django.db.transaction import atomic
 
 
 class Badge(models.Model):
@@ -9,6 +8,11 @@ class Badge(models.Model):
         ('red', 'Red Team'),
         ('custom', 'Custom'),
     ]
+    RANKING_FIELDS = {
+        'overall': 'score',
+        'blue': 'blue_points',
+        'red': 'red_points',
+    }
 
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -29,38 +33,3 @@ class Badge(models.Model):
     def get_badge_by_type(cls, badge_type):
         """Get badge by type"""
         return cls.objects.filter(badge_type=badge_type).first()
-
-    @classmethod
-    @atomic
-    def update_team_badges(cls, team):
-        """Update badges for a specific team"""
-        if not team.is_in_game:
-            return
-
-        with atomic():
-            badges = cls.objects.select_for_update().filter(
-                badge_type__in=['overall', 'blue', 'red']
-            )
-
-            teams = team.__class__.objects.select_for_update().filter(is_in_game=True)
-
-            overall_badge = next((b for b in badges if b.badge_type == 'overall'), None)
-            if overall_badge:
-                best_overall = teams.order_by('-score').first()
-                if best_overall and best_overall.id == team.id:
-                    overall_badge.team = team
-                    overall_badge.save()
-
-            blue_badge = next((b for b in badges if b.badge_type == 'blue'), None)
-            if blue_badge:
-                best_blue = teams.order_by('-blue_points').first()
-                if best_blue and best_blue.id == team.id:
-                    blue_badge.team = team
-                    blue_badge.save()
-
-            red_badge = next((b for b in badges if b.badge_type == 'red'), None)
-            if red_badge:
-                best_red = teams.order_by('-red_points').first()
-                if best_red and best_red.id == team.id:
-                    red_badge.team = team
-                    red_badge.save()
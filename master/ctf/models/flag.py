@@ -1,9 +1,10 @@
 import logging
 import secrets
 import string
-from datetime import datetime, timezone
 
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 
 logger = logging.getLogger(__name__)
 
@@ -27,13 +28,6 @@ class FlagManager(models.Manager):
             logger.error(f"Error creating flag: {e}")
             return None
 
-    def get_free_flag_by_value(self, value):
-        """Get flag by value"""
-        try:
-            return self.get(value=value, is_captured=False)
-        except self.model.DoesNotExist:
-            return None
-
     def get_flags_by_template(self, template):
         """Get flags by template"""
         return self.filter(container__template=template)
@@ -89,14 +83,6 @@ class Flag(models.Model):
     def __str__(self):
         return self.value
 
-    def capture(self, team, user=None):
-        """Mark the flag as captured"""
-        self.is_captured = True
-        self.captured_by = team
-        self.captured_by_user = user
-        self.captured_at = datetime.now(timezone.utc)
-        self.save(update_fields=["is_captured", "captured_by", "captured_by_user", "captured_at"])
-
     def release(self):
         """Release the flag"""
         self.is_captured = False
@@ -110,6 +96,15 @@ class Flag(models.Model):
         return FlagHintUsage.objects.create(flag=self, team=team, session=session)
 
 
+@receiver(post_save, sender=Flag)
+def add_flag_to_filter(sender, instance, **kwargs):
+    """Keep new and released flags accepted by the submission filter"""
+    from ctf.services import FlagFilterService
+
+    if not instance.is_captured:
+        FlagFilterService.schedule_add(instance.value)
+
+
 class FlagHintUsage(models.Model):
     flag = models.ForeignKey("ctf.Flag", on_delete=models.CASCADE, related_name="hint_usages")
     team = models.ForeignKey("accounts.Team", on_delete=models.CASCADE, related_name="flag_hint_usages")
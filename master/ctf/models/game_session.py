@@ -2,7 +2,7 @@ import random
 import uuid
 from datetime import timedelta
 
-from django.db import models
+from django.db import models, transaction
 from django.db.models import QuerySet, Q
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
@@ -34,6 +34,15 @@ class GameSession(models.Model):
         default=0,
         help_text="Maximum time in minutes that a red team can spend attacking a deployment (0 means no limit)"
     )
+    warm_pool_size = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of deployments pre-provisioned for this session on top of the template warm pool "
+                  "while the session is planned"
+    )
+    teardown_task_id = models.CharField(
+        max_length=64, null=True, blank=True, editable=False,
+        help_text="Task distributing remaining points and stopping containers after the session is completed"
+    )
 
     class Meta:
         ordering = ["-start_date"]
@@ -64,6 +73,16 @@ class GameSession(models.Model):
         now = timezone.now()
         return self.team_assignments.filter(start_date__lte=now, end_date__gte=now)
 
+    def get_teardown_progress(self):
+        """Get state and progress of the session teardown task"""
+        if not self.teardown_task_id:
+            return None
+
+        from celery.result import AsyncResult
+        result = AsyncResult(self.teardown_task_id)
+        progress = result.info if isinstance(result.info, dict) else {}
+        return {"state": result.state, **progress}
+
     def get_max_time_for_role(self, role):
         """Get maximum time allowed for a specific team role"""
         if not self.enable_time_restrictions:
@@ -107,15 +126,19 @@ def track_status_change(sender, instance, **kwargs):
 
 @receiver(post_save, sender=GameSession)
 def handle_completed_session(sender, instance, created, **kwargs):
-    """Handle cleanup when a game session is marked as completed"""
+    """Queue cleanup once the transaction marking a game session as completed commits"""
     if instance.status == GameSessionStatus.COMPLETED:
         old_status = getattr(instance, '_old_status', None)
         if old_status != GameSessionStatus.COMPLETED:
-            from ctf.services import FlagService
-            from challenges.services import ContainerService
             instance.phases.all().update(status=GamePhaseStatus.COMPLETED)
-            FlagService().distribute_uncaptured_flags_points(instance)
-            ContainerService().stop_session_containers(instance)
+            transaction.on_commit(lambda: schedule_session_teardown(instance.pk))
+
+
+def schedule_session_teardown(session_id):
+    """Queue teardown of a completed session and remember its task for progress tracking"""
+    from ctf.tasks import teardown_session
+    result = teardown_session.delay(session_id)
+    GameSession.objects.filter(pk=session_id).update(teardown_task_id=result.id)
 
 
 class TeamAssignmentManager(models.Manager):
@@ -27,6 +27,34 @@ class GlobalSettings(models.Model):
         default=1,
         help_text="Number of previous sessions to check when preventing teams from attacking recent targets"
     )
+    max_parallel_provisioning = models.PositiveIntegerField(
+        default=4,
+        help_text="Maximum number of team deployments prepared in parallel when a session starts"
+    )
+    provisioning_retries = models.PositiveIntegerField(
+        default=2,
+        help_text="Number of times a failed team deployment is retried when a session starts"
+    )
+    flag_submissions_per_minute = models.PositiveIntegerField(
+        default=20,
+        help_text="Flag submissions allowed per team per minute, 0 disables the limit"
+    )
+    flag_submissions_per_minute_per_user = models.PositiveIntegerField(
+        default=10,
+        help_text="Flag submissions allowed per player per minute, 0 disables the limit"
+    )
+    hint_requests_per_minute = models.PositiveIntegerField(
+        default=6,
+        help_text="Hint requests allowed per team per minute, 0 disables the limit"
+    )
+    hint_requests_per_minute_per_user = models.PositiveIntegerField(
+        default=3,
+        help_text="Hint requests allowed per player per minute, 0 disables the limit"
+    )
+    rate_limit_burst = models.PositiveIntegerField(
+        default=5,
+        help_text="Number of requests that can be made at once before the per minute limits apply"
+    )
 
     class Meta:
         verbose_name = "Global Settings"
@@ -42,6 +70,10 @@ class GlobalSettings(models.Model):
             raise ValidationError("Number of tiers must be at least 1")
         if self.inactive_container_timeout < 1:
             raise ValidationError("Container inactivity timeout must be at least 1 minute")
+        if self.max_parallel_provisioning < 1:
+            raise ValidationError("Parallel provisioning limit must be at least 1")
+        if self.rate_limit_burst < 1:
+            raise ValidationError("Rate limit burst must be at least 1")
 
     def save(self, *args, **kwargs):
         self.full_clean()
@@ -49,6 +81,9 @@ class GlobalSettings(models.Model):
             raise ValidationError("Only one settings instance can exist")
         super().save(*args, **kwargs)
 
+        from ctf.services import RateLimitService
+        RateLimitService.clear_limits_cache()
+
     @classmethod
     def get_settings(cls):
         """Get the current settings, creating default if none exist"""
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from ctf.consumers import ScoreboardConsumer, TeamEventConsumer
+
+websocket_urlpatterns = [
+    path('ws/team/', TeamEventConsumer.as_asgi()),
+    path('ws/scoreboard/', ScoreboardConsumer.as_asgi()),
+]
@@ -1,7 +1,19 @@
+from .badge_service import BadgeService
+from .flag_filter_service import FlagFilterService
 from .flag_service import FlagService
 from .matchmaking_service import MatchmakingService
+from .ranking_service import RankingService
+from .rate_limit_service import RateLimitService
+from .scoreboard_service import ScoreboardService
+from .team_event_service import TeamEventService
 
 __all__ = [
+    'BadgeService',
+    'FlagFilterService',
     'FlagService',
     'MatchmakingService',
+    'RankingService',
+    'RateLimitService',
+    'ScoreboardService',
+    'TeamEventService',
 ]
@@ -0,0 +1,74 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from ctf.models import Badge
+from ctf.services.ranking_service import RankingService
+from ctf.services.scoreboard_service import ScoreboardService
+
+logger = logging.getLogger(__name__)
+
+
+class BadgeService:
+    """Moves the overall, blue and red badges to the leading teams of the rankings"""
+    PENDING_KEY = "badge-update-pending"
+    QUEUED_ATTRIBUTE = "badge_update_queued"
+
+    @classmethod
+    def schedule_update(cls):
+        """Recompute badge holders once the current transaction commits
+
+        Repeated calls within a transaction queue a single update, and updates of transactions
+        committed within BADGE_UPDATE_DELAY seconds are merged into one run.
+        """
+        connection = transaction.get_connection()
+        # Commit callbacks of earlier transactions have all run, the first callback of this one queues the update
+        setattr(connection, cls.QUEUED_ATTRIBUTE, False)
+        transaction.on_commit(lambda: cls._queue_update(connection))
+
+    @classmethod
+    def _queue_update(cls, connection):
+        from ctf.tasks import update_badges
+
+        if getattr(connection, cls.QUEUED_ATTRIBUTE, False):
+            return
+        setattr(connection, cls.QUEUED_ATTRIBUTE, True)
+
+        if not cache.add(cls.PENDING_KEY, True, settings.BADGE_UPDATE_DELAY + 60):
+            return
+
+        try:
+            update_badges.apply_async(countdown=settings.BADGE_UPDATE_DELAY)
+        except Exception as e:
+            logger.error(f"Failed to queue badge update, updating badges now: {e}")
+            cache.delete(cls.PENDING_KEY)
+            cls.update_badges()
+
+    @classmethod
+    def update_badges(cls) -> list[Badge]:
+        """Give ranking badges to the leading teams, a holder keeps its badge while it shares the lead
+
+        Returns:
+            list: Badges that changed holder
+        """
+        # Score changes arriving from now on need another run
+        cache.delete(cls.PENDING_KEY)
+
+        leaders = {badge_type: RankingService.get_leaders(field) for badge_type, field in Badge.RANKING_FIELDS.items()}
+        changed = []
+        with transaction.atomic():
+            for badge in Badge.objects.select_for_update().filter(badge_type__in=leaders.keys()):
+                badge_leaders = leaders[badge.badge_type]
+                if not badge_leaders or badge.team_id in badge_leaders:
+                    continue
+
+                badge.team_id = badge_leaders[0]
+                badge.save(update_fields=['team'])
+                ScoreboardService.publish_badge(badge)
+                changed.append(badge)
+
+        for badge in changed:
+            logger.info(f"Badge {badge.name} moved to team {badge.team_id}")
+        return changed
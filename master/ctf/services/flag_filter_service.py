@@ -0,0 +1,165 @@
+import hashlib
+import logging
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from ctf.models import Flag
+from ctf.utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class FlagFilterService:
+    """Bloom filter over uncaptured flag values kept in a Redis bitmap
+
+    Lets flag submissions reject guesses without a database query. Values are never removed, captured
+    flags are dropped by the periodic rebuild and rejected by the database lookup until then.
+    """
+    KEY = "ctf:flag-filter"
+    REBUILD_KEY = "ctf:flag-filter:rebuild"
+    REBUILD_LOCK_KEY = "ctf:flag-filter:rebuild-lock"
+    REBUILD_LOCK_TIMEOUT = 300
+    REBUILD_QUEUED_KEY = "flag-filter-rebuild-queued"
+    # Only set bits of existing filters, bits set on a missing key would make a partial filter. A filter being
+    # rebuilt gets the bits too, its scan may have passed the flag before the flag was committed.
+    ADD_SCRIPT = """
+    local added = 0
+    for _, key in ipairs(KEYS) do
+        if redis.call('EXISTS', key) == 1 then
+            for _, offset in ipairs(ARGV) do
+                redis.call('SETBIT', key, offset, 1)
+            end
+            added = 1
+        end
+    end
+    return added
+    """
+
+    @staticmethod
+    def get_client() -> redis.Redis | None:
+        return get_redis_client()
+
+    @classmethod
+    def might_exist(cls, value: str) -> bool:
+        """Check if the value may be an uncaptured flag, False means it certainly is not"""
+        client = cls.get_client()
+        if client is None:
+            return True
+
+        try:
+            if not client.exists(cls.KEY):
+                cls._schedule_rebuild()
+                return True
+            pipeline = client.pipeline(transaction=False)
+            for offset in cls._get_offsets(value):
+                pipeline.getbit(cls.KEY, offset)
+            return all(pipeline.execute())
+        except redis.RedisError as e:
+            logger.warning(f"Flag filter is unavailable: {e}")
+            return True
+
+    @classmethod
+    def add(cls, value: str):
+        client = cls.get_client()
+        if client is None:
+            return
+
+        try:
+            client.eval(cls.ADD_SCRIPT, 2, cls.KEY, cls.REBUILD_KEY, *cls._get_offsets(value))
+        except redis.RedisError as e:
+            logger.warning(f"Failed to add flag to filter, dropping it to force a rebuild: {e}")
+            cls._drop(client)
+
+    @classmethod
+    def schedule_add(cls, value: str):
+        """Add the value once the current transaction commits"""
+        transaction.on_commit(lambda: cls.add(value))
+
+    @classmethod
+    def rebuild(cls) -> bool:
+        """Replace the filter with one built from the uncaptured flags, dropping captured and deleted flags
+
+        The new bitmap exists before the flags are scanned, so flags committed during the scan are added to it.
+        """
+        client = cls.get_client()
+        if client is None:
+            return False
+
+        try:
+            if not client.set(cls.REBUILD_LOCK_KEY, 1, nx=True, ex=cls.REBUILD_LOCK_TIMEOUT):
+                logger.info("Flag filter is already being rebuilt")
+                return False
+        except redis.RedisError as e:
+            logger.error(f"Failed to rebuild flag filter: {e}")
+            return False
+
+        try:
+            client.delete(cls.REBUILD_KEY)
+            # Reserve the full bitmap before the scan, so new flags are added to it and an empty filter exists
+            client.setbit(cls.REBUILD_KEY, settings.FLAG_FILTER_SIZE - 1, 0)
+            flags = Flag.objects.filter(is_captured=False).values_list('value', flat=True)
+            for batch in cls._batches(flags.iterator(chunk_size=1000), 1000):
+                cls._add_values(client, cls.REBUILD_KEY, batch)
+
+            client.rename(cls.REBUILD_KEY, cls.KEY)
+            logger.info("Rebuilt flag filter")
+            return True
+        except redis.RedisError as e:
+            logger.error(f"Failed to rebuild flag filter: {e}")
+            return False
+        finally:
+            try:
+                client.delete(cls.REBUILD_KEY, cls.REBUILD_LOCK_KEY)
+            except redis.RedisError:
+                pass
+
+    @classmethod
+    def _schedule_rebuild(cls):
+        from ctf.tasks import rebuild_flag_filter
+
+        if not cache.add(cls.REBUILD_QUEUED_KEY, True, cls.REBUILD_LOCK_TIMEOUT):
+            return
+        try:
+            rebuild_flag_filter.delay()
+        except Exception as e:
+            logger.error(f"Failed to queue flag filter rebuild: {e}")
+            cache.delete(cls.REBUILD_QUEUED_KEY)
+
+    @classmethod
+    def _add_values(cls, client: redis.Redis, key: str, values: list[str]):
+        if not values:
+            return
+        pipeline = client.pipeline(transaction=False)
+        for value in values:
+            for offset in cls._get_offsets(value):
+                pipeline.setbit(key, offset, 1)
+        pipeline.execute()
+
+    @classmethod
+    def _drop(cls, client: redis.Redis):
+        try:
+            client.delete(cls.KEY)
+        except redis.RedisError:
+            pass
+
+    @staticmethod
+    def _get_offsets(value: str) -> list[int]:
+        """Get bit offsets of the value using double hashing"""
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % settings.FLAG_FILTER_SIZE for i in range(settings.FLAG_FILTER_HASHES)]
+
+    @staticmethod
+    def _batches(iterable, size: int):
+        batch = []
+        for item in iterable:
+            batch.append(item)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -1,8 +1,13 @@
 import logging
 
+from django.db import transaction
+from django.utils import timezone
+
 from accounts.models.enums import TeamRole
 from accounts.models.team import TeamScoreHistory
+from challenges.models.exceptions import FlagAlreadyCapturedError
 from ctf.models import Flag, GameSession, FlagHintUsage
+from ctf.services.team_event_service import TeamEventService
 
 logger = logging.getLogger(__name__)
 
@@ -10,17 +15,38 @@ logger = logging.getLogger(__name__)
 class FlagService:
     @staticmethod
     def capture_and_award(flag: Flag, captured_by_user) -> None:
-        """Handle flag capture"""
-        captured_by = captured_by_user.team
-        flag.capture(captured_by, captured_by_user)
+        """Capture the flag for the team of the user and award its red points in one short transaction
 
-        if FlagHintUsage.objects.filter(flag__hint=flag.hint, team=captured_by).exists():
-            captured_by.red_points += int(flag.points / 2)
-        else:
-            captured_by.red_points += flag.points
+        The flag is claimed with a conditional update, so of concurrent submissions only the first one scores.
 
-        captured_by.update_score()
-        TeamScoreHistory.record_flag_capture(captured_by, flag)
+        Raises:
+            FlagAlreadyCapturedError: If the flag was captured in the meantime
+        """
+        captured_by = captured_by_user.team
+        with transaction.atomic():
+            captured_at = timezone.now()
+            claimed = Flag.objects.filter(pk=flag.pk, is_captured=False).update(
+                is_captured=True,
+                captured_by=captured_by,
+                captured_by_user=captured_by_user,
+                captured_at=captured_at,
+            )
+            if not claimed:
+                raise FlagAlreadyCapturedError("Flag has already been captured")
+
+            flag.is_captured = True
+            flag.captured_by = captured_by
+            flag.captured_by_user = captured_by_user
+            flag.captured_at = captured_at
+
+            if FlagHintUsage.objects.filter(flag__hint=flag.hint, team=captured_by).exists():
+                points = int(flag.points / 2)
+            else:
+                points = flag.points
+
+            captured_by.add_points(red_points=points)
+            TeamScoreHistory.record_flag_capture(captured_by, flag)
+            TeamEventService.publish_flag_capture(flag, captured_by)
 
     @staticmethod
     def award_blue_points(flags: list[Flag]) -> None:
@@ -38,11 +64,11 @@ class FlagService:
         ).prefetch_related('flag')
         used_flag_hints = [hint_usage.flag for hint_usage in hint_usages]
         total_points = sum(int(flag.points / 2) if flag in used_flag_hints else flag.points for flag in flags)
-        team.blue_points += total_points
-        team.update_score()
 
-        description = f"Awarded {total_points} blue points for securing {len(flags)} flag(s)"
-        TeamScoreHistory.record_blue_points(team, total_points, description)
+        with transaction.atomic():
+            team.add_points(blue_points=total_points)
+            description = f"Awarded {total_points} blue points for securing {len(flags)} flag(s)"
+            TeamScoreHistory.record_blue_points(team, total_points, description)
 
         logger.info(f"Awarded {total_points} blue points to team {team.name}")
 
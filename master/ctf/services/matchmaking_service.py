@@ -7,10 +7,11 @@ from django.utils import timezone
 
 from accounts.models import Team
 from accounts.models.enums import TeamRole
-from challenges.services import ContainerService, ChallengeService
+from challenges.services import ContainerService, ChallengeService, ProvisioningService
 from ctf.models import GameSession, TeamAssignment, GamePhase
 from ctf.models.enums import GameSessionStatus
 from ctf.models.settings import GlobalSettings
+from ctf.services.ranking_service import RankingService
 
 logger = logging.getLogger(__name__)
 
@@ -21,11 +22,14 @@ class MatchmakingService:
     def __init__(self, container_service: ContainerService = None, challenge_service: ChallengeService = None):
         self.container_service = container_service or ContainerService()
         self.challenge_service = challenge_service or ChallengeService(container_service=self.container_service)
+        self.provisioning_service = ProvisioningService(challenge_service=self.challenge_service)
+        self.provisioned_deployments = []
 
     def create_round_assignments(self, session: GameSession, teams: list[Team]) -> bool:
         """
         Create assignments for a round using the challenge preparation system
         """
+        self.provisioned_deployments = []
         try:
             if not teams:
                 logger.warning("No teams provided for round assignments")
@@ -42,13 +46,17 @@ class MatchmakingService:
             end_date = current_phase.end_date
 
             logger.info("Preparing containers for each team")
-            for team in teams:
-                try:
-                    deployment = self.challenge_service.prepare_challenge(session, team)
-                    if not deployment:
-                        logger.error(f"Failed to prepare challenge for team {team.name}")
-                        continue
+            results = self.provisioning_service.provision_deployments(session, teams)
+            self.provisioned_deployments = [result["deployment"] for result in results.values() if result["deployment"]]
+            for result in results.values():
+                team = result["team"]
+                deployment = result["deployment"]
+                if not deployment:
+                    logger.error(f"Failed to prepare challenge for team {team.name} after {result['attempts']} "
+                                 f"attempts: {result['error']}")
+                    continue
 
+                try:
                     TeamAssignment.objects.create(
                         session=session,
                         team=team,
@@ -67,6 +75,17 @@ class MatchmakingService:
             logger.error(f"Error creating round assignments: {e}")
             return False
 
+    def cleanup_provisioned_deployments(self):
+        """Remove deployments provisioned by the last create_round_assignments call
+
+        Provisioning threads commit on their own connections, call this when the transaction around the round
+        assignments rolls back so the deployments, containers and their allocations are not left behind.
+        """
+        for deployment in self.provisioned_deployments:
+            self.challenge_service.cleanup_failed_deployment(deployment, {})
+        logger.info(f"Cleaned up {len(self.provisioned_deployments)} deployments of rolled back round assignments")
+        self.provisioned_deployments = []
+
     def create_random_red_assignments(self, session: GameSession, phase: GamePhase, teams: List[Team]) -> bool:
         """
         Create random red team assignments for the second week.
@@ -134,7 +153,7 @@ class MatchmakingService:
         try:
             logger.info("Creating swiss system assignments")
             logger.info("Sorting teams by score")
-            sorted_teams = sorted(teams, key=lambda t: t.score, reverse=True)
+            sorted_teams = RankingService.sort_teams(teams)
             if len(sorted_teams) < number_of_tiers * 2:
                 logger.warning("Not enough teams for Swiss system assignments! Running random assignments instead.")
                 return self.create_random_red_assignments(session, phase, teams)
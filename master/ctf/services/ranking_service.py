@@ -0,0 +1,267 @@
+import logging
+
+import redis
+from django.db.models import Max, Q
+from django.db.models.functions import Coalesce
+
+from accounts.models import Team
+from ctf.utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RankingService:
+    """Keeps in-game teams ranked by score, blue points and red points in Redis sorted sets
+
+    Teams with equal points share a rank. Without Redis, or while it is unavailable, rankings are read
+    from the indexed point columns of the team table.
+    """
+    FIELDS = ('score', 'blue_points', 'red_points')
+    KEY = "ctf:ranking:{}"
+    READY_KEY = "ctf:ranking:ready"
+    VERSION_KEY = "ctf:ranking:version"
+    # Points of a team are versioned by its latest score history entry. Older versions are ignored, so an
+    # update read before a newer transaction committed cannot overwrite the newer points.
+    UPDATE_SCRIPT = """
+    local current = tonumber(redis.call('HGET', KEYS[4], ARGV[1]))
+    if current and tonumber(ARGV[2]) < current then
+        return 0
+    end
+    redis.call('HSET', KEYS[4], ARGV[1], ARGV[2])
+    for i = 1, 3 do
+        if ARGV[3] == '1' then
+            redis.call('ZADD', KEYS[i], ARGV[3 + i], ARGV[1])
+        else
+            redis.call('ZREM', KEYS[i], ARGV[1])
+        end
+    end
+    return 1
+    """
+    _script = None
+
+    @classmethod
+    def get_client(cls) -> redis.Redis | None:
+        client = get_redis_client(decode_responses=True)
+        if client is not None and cls._script is None:
+            cls._script = client.register_script(cls.UPDATE_SCRIPT)
+        return client
+
+    @classmethod
+    def rebuild(cls) -> bool:
+        """Write the current points of all teams and drop unknown teams, newer concurrent updates are kept"""
+        client = cls.get_client()
+        if client is None:
+            return False
+
+        teams = cls._get_team_states()
+        try:
+            pipeline = client.pipeline(transaction=False)
+            for team_state in teams:
+                cls._write_team(pipeline, *team_state)
+            pipeline.execute()
+
+            known = {str(team_state[0]) for team_state in teams}
+            members = set(client.zrange(cls.KEY.format(cls.FIELDS[0]), 0, -1)) | set(client.hkeys(cls.VERSION_KEY))
+            for team_id in members - known:
+                cls._remove(client, team_id)
+            client.set(cls.READY_KEY, 1)
+            logger.info(f"Rebuilt rankings of {len(teams)} teams")
+            return True
+        except redis.RedisError as e:
+            logger.error(f"Failed to rebuild rankings: {e}")
+            return False
+
+    @classmethod
+    def update_team(cls, team_id: int):
+        """Store the committed points of the team, teams that are not in game are removed from the rankings"""
+        client = cls._get_ready_client()
+        if client is None:
+            return
+
+        teams = cls._get_team_states(pk=team_id)
+        try:
+            if not teams:
+                cls._remove(client, team_id)
+                return
+            cls._write_team(client, *teams[0])
+        except redis.RedisError as e:
+            logger.warning(f"Failed to update ranking of team {team_id}: {e}")
+            cls._invalidate(client)
+
+    @classmethod
+    def remove_team(cls, team_id: int):
+        client = cls._get_ready_client()
+        if client is None:
+            return
+
+        try:
+            cls._remove(client, team_id)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to remove team {team_id} from rankings: {e}")
+            cls._invalidate(client)
+
+    @classmethod
+    def get_rank(cls, team: Team, field: str = 'score') -> int | None:
+        """Get the rank of the team, 1 for the leading teams, None when the team is not in game"""
+        client = cls._get_ready_client()
+        if client is not None:
+            try:
+                value = client.zscore(cls.KEY.format(field), team.pk)
+                if value is None:
+                    return None
+                return client.zcount(cls.KEY.format(field), f"({value}", "+inf") + 1
+            except redis.RedisError as e:
+                logger.warning(f"Failed to read rank of team {team.name}: {e}")
+
+        if not team.is_in_game:
+            return None
+        return Team.objects.filter(is_in_game=True, **{f"{field}__gt": getattr(team, field)}).count() + 1
+
+    @classmethod
+    def get_percentile(cls, team: Team, field: str = 'score') -> float | None:
+        """Get the percentage of other in-game teams the team has more points than"""
+        client = cls._get_ready_client()
+        if client is not None:
+            try:
+                key = cls.KEY.format(field)
+                value = client.zscore(key, team.pk)
+                if value is None:
+                    return None
+                return cls._get_percentile(client.zcount(key, "-inf", f"({value}"), client.zcard(key))
+            except redis.RedisError as e:
+                logger.warning(f"Failed to read percentile of team {team.name}: {e}")
+
+        if not team.is_in_game:
+            return None
+        teams = Team.objects.filter(is_in_game=True)
+        return cls._get_percentile(teams.filter(**{f"{field}__lt": getattr(team, field)}).count(), teams.count())
+
+    @classmethod
+    def get_neighbours(cls, team: Team, field: str = 'score', count: int = 1) -> dict | None:
+        """Get up to `count` teams ranked directly above and below the team
+
+        Returns:
+            dict: {"above": [(team ID, points)], "below": [(team ID, points)]} ordered by rank
+        """
+        client = cls._get_ready_client()
+        if client is not None:
+            try:
+                key = cls.KEY.format(field)
+                position = client.zrevrank(key, team.pk)
+                if position is None:
+                    return None
+                above = client.zrevrange(key, max(position - count, 0), position - 1, withscores=True) \
+                    if position else []
+                below = client.zrevrange(key, position + 1, position + count, withscores=True)
+                return {
+                    "above": [(int(team_id), int(value)) for team_id, value in above],
+                    "below": [(int(team_id), int(value)) for team_id, value in below],
+                }
+            except redis.RedisError as e:
+                logger.warning(f"Failed to read neighbours of team {team.name}: {e}")
+
+        if not team.is_in_game:
+            return None
+        value = getattr(team, field)
+        teams = Team.objects.filter(is_in_game=True).exclude(pk=team.pk)
+        above = teams.filter(Q(**{f"{field}__gt": value}) | Q(**{field: value, 'name__lt': team.name})) \
+            .order_by(field, '-name').values_list('id', field)[:count]
+        below = teams.filter(Q(**{f"{field}__lt": value}) | Q(**{field: value, 'name__gte': team.name})) \
+            .order_by(f'-{field}', 'name').values_list('id', field)[:count]
+        return {"above": list(reversed(above)), "below": list(below)}
+
+    @classmethod
+    def get_leaders(cls, field: str = 'score') -> list[int]:
+        """Get IDs of all teams sharing the first rank"""
+        client = cls._get_ready_client()
+        if client is not None:
+            try:
+                key = cls.KEY.format(field)
+                top = client.zrevrange(key, 0, 0, withscores=True)
+                if not top:
+                    return []
+                return [int(team_id) for team_id in client.zrevrangebyscore(key, top[0][1], top[0][1])]
+            except redis.RedisError as e:
+                logger.warning(f"Failed to read leaders of {field} ranking: {e}")
+
+        teams = Team.objects.filter(is_in_game=True)
+        top = teams.aggregate(top=Max(field))['top']
+        if top is None:
+            return []
+        return list(teams.filter(**{field: top}).order_by('name').values_list('id', flat=True))
+
+    @classmethod
+    def get_ranking(cls, field: str = 'score') -> list[tuple[int, int, int]]:
+        """Get the full ranking as (team ID, points, rank) ordered from the first rank"""
+        entries = None
+        client = cls._get_ready_client()
+        if client is not None:
+            try:
+                entries = [(int(team_id), int(value))
+                           for team_id, value in client.zrevrange(cls.KEY.format(field), 0, -1, withscores=True)]
+            except redis.RedisError as e:
+                logger.warning(f"Failed to read {field} ranking: {e}")
+
+        if entries is None:
+            entries = list(Team.objects.filter(is_in_game=True).order_by(f'-{field}', 'name').values_list('id', field))
+
+        ranking = []
+        for position, (team_id, value) in enumerate(entries, start=1):
+            rank = ranking[-1][2] if ranking and ranking[-1][1] == value else position
+            ranking.append((team_id, value, rank))
+        return ranking
+
+    @classmethod
+    def sort_teams(cls, teams: list[Team], field: str = 'score') -> list[Team]:
+        """Order teams by their position in the ranking"""
+        positions = {team_id: position for position, (team_id, _, _) in enumerate(cls.get_ranking(field))}
+        return sorted(teams, key=lambda team: (positions.get(team.pk, len(positions)), team.name))
+
+    @classmethod
+    def _get_ready_client(cls) -> redis.Redis | None:
+        """Get the Redis client, rebuilding the rankings first if they are missing"""
+        client = cls.get_client()
+        if client is None:
+            return None
+
+        try:
+            if client.exists(cls.READY_KEY) or cls.rebuild():
+                return client
+        except redis.RedisError as e:
+            logger.warning(f"Rankings are unavailable: {e}")
+        return None
+
+    @classmethod
+    def _get_team_states(cls, **filters) -> list[tuple]:
+        """Get (team ID, version, is in game, points of every field) of the teams"""
+        return list(Team.objects.filter(**filters).order_by().annotate(
+            version=Coalesce(Max('score_history__id'), 0)
+        ).values_list('id', 'version', 'is_in_game', *cls.FIELDS))
+
+    @classmethod
+    def _write_team(cls, client, team_id: int, version: int, is_in_game: bool, *points):
+        """Store points of the team unless newer ones are stored, client may be a pipeline"""
+        keys = [cls.KEY.format(field) for field in cls.FIELDS] + [cls.VERSION_KEY]
+        cls._script(keys=keys, args=[team_id, version, int(is_in_game), *points], client=client)
+
+    @classmethod
+    def _remove(cls, client: redis.Redis, team_id):
+        pipeline = client.pipeline()
+        for field in cls.FIELDS:
+            pipeline.zrem(cls.KEY.format(field), team_id)
+        pipeline.hdel(cls.VERSION_KEY, team_id)
+        pipeline.execute()
+
+    @classmethod
+    def _invalidate(cls, client: redis.Redis):
+        """Mark the rankings as stale so they are rebuilt on the next access"""
+        try:
+            client.delete(cls.READY_KEY)
+        except redis.RedisError:
+            pass
+
+    @staticmethod
+    def _get_percentile(lower_count: int, total_count: int) -> float:
+        if total_count <= 1:
+            return 100.0
+        return round(100 * lower_count / (total_count - 1), 1)
@@ -0,0 +1,120 @@
+import logging
+import math
+
+import redis
+from django.core.cache import cache
+
+from ctf.models.settings import GlobalSettings
+from ctf.utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitService:
+    """Per-team and per-user token buckets for flag submissions and hint requests kept in Redis
+
+    Both buckets of a request are checked and consumed in one atomic script call. Limits come from
+    GlobalSettings, a limit of 0 disables the bucket. Requests are allowed when Redis is not configured
+    or unavailable.
+    """
+    FLAG_SUBMISSION = "flag"
+    HINT_REQUEST = "hint"
+    KEY = "ctf:rate-limit:{}:{}:{}"
+    LIMITS_CACHE_KEY = "rate-limits"
+    LIMITS_CACHE_TTL = 60
+    # Buckets hold (tokens, last refill) and refill continuously, a request takes a token from every bucket
+    # or from none of them. Returns whether the request is allowed and seconds until it would be. Time is
+    # read from the Redis clock so skewed clocks of app servers cannot refill buckets early.
+    TOKEN_BUCKET_SCRIPT = """
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+    local buckets = {}
+    local retry_after = 0
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[i * 2 - 1])
+        local rate = tonumber(ARGV[i * 2])
+        local state = redis.call('HMGET', key, 'tokens', 'updated')
+        local tokens = tonumber(state[1]) or capacity
+        local updated = tonumber(state[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+        if tokens < 1 then
+            retry_after = math.max(retry_after, (1 - tokens) / rate)
+        end
+        buckets[i] = {key, tokens, capacity, rate}
+    end
+    local allowed = retry_after == 0
+    for _, bucket in ipairs(buckets) do
+        local tokens = bucket[2]
+        if allowed then
+            tokens = tokens - 1
+        end
+        redis.call('HSET', bucket[1], 'tokens', tokens, 'updated', now)
+        redis.call('EXPIRE', bucket[1], math.ceil(bucket[3] / bucket[4]) + 1)
+    end
+    return {allowed and 1 or 0, tostring(retry_after)}
+    """
+    _script = None
+
+    @classmethod
+    def get_client(cls) -> redis.Redis | None:
+        client = get_redis_client()
+        if client is not None and cls._script is None:
+            cls._script = client.register_script(cls.TOKEN_BUCKET_SCRIPT)
+        return client
+
+    @classmethod
+    def check(cls, scope: str, user) -> int:
+        """Take a token from the team and user buckets of the scope
+
+        Returns:
+            int: 0 when the request is allowed, otherwise seconds to wait before retrying
+        """
+        client = cls.get_client()
+        if client is None:
+            return 0
+
+        limits = cls.get_limits()
+        keys, args = [], []
+        for subject, subject_id in (("team", user.team_id), ("user", user.pk)):
+            per_minute = limits[scope][subject]
+            if per_minute and subject_id:
+                keys.append(cls.KEY.format(scope, subject, subject_id))
+                args.extend([limits["burst"], per_minute / 60])
+
+        if not keys:
+            return 0
+
+        try:
+            allowed, retry_after = cls._script(keys=keys, args=args, client=client)
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter is unavailable, allowing request: {e}")
+            return 0
+
+        if allowed:
+            return 0
+        logger.info(f"Rate limited {scope} request of user {user.pk} from team {user.team_id}")
+        return max(1, math.ceil(float(retry_after)))
+
+    @classmethod
+    def get_limits(cls) -> dict:
+        """Get requests per minute of every scope and the burst size, cached to keep checks off the database"""
+        limits = cache.get(cls.LIMITS_CACHE_KEY)
+        if limits is None:
+            global_settings = GlobalSettings.get_settings()
+            limits = {
+                cls.FLAG_SUBMISSION: {
+                    "team": global_settings.flag_submissions_per_minute,
+                    "user": global_settings.flag_submissions_per_minute_per_user,
+                },
+                cls.HINT_REQUEST: {
+                    "team": global_settings.hint_requests_per_minute,
+                    "user": global_settings.hint_requests_per_minute_per_user,
+                },
+                "burst": max(1, global_settings.rate_limit_burst),
+            }
+            cache.set(cls.LIMITS_CACHE_KEY, limits, cls.LIMITS_CACHE_TTL)
+        return limits
+
+    @classmethod
+    def clear_limits_cache(cls):
+        cache.delete(cls.LIMITS_CACHE_KEY)
@@ -0,0 +1,126 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+from accounts.models import Team, TeamScoreHistory, TeamScoreRollup
+from ctf.models import Badge
+from ctf.services.ranking_service import RankingService
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreboardService:
+    """Builds cached scoreboard snapshots and streams score and badge changes as deltas
+
+    Every history entry ID is a cursor - a snapshot carries the last entry it contains and
+    clients apply only deltas with a higher cursor.
+    """
+    GROUP_NAME = "scoreboard"
+    SNAPSHOT_CACHE_KEY = "scoreboard-snapshot:{}"
+    SCORE_HISTORY = "score_history"
+    BADGE = "badge"
+    RESET = "reset"
+
+    @classmethod
+    def get_snapshot(cls, days: str = "7") -> dict:
+        """Get the scoreboard with score history of the time window, shared by all viewers for a short time"""
+        days = days if days == "all" or str(days).isdigit() else "7"
+        cache_key = cls.SNAPSHOT_CACHE_KEY.format(days)
+        snapshot = cache.get(cache_key)
+        if snapshot is None:
+            snapshot = cls._build_snapshot(days)
+            cache.set(cache_key, snapshot, settings.SCOREBOARD_SNAPSHOT_TTL)
+        return snapshot
+
+    @classmethod
+    def _build_snapshot(cls, days: str) -> dict:
+        # Take the cursor first - rollups may already include later entries, replaying them only updates buckets
+        cursor = TeamScoreHistory.objects.aggregate(cursor=Max('id'))['cursor'] or 0
+        ranking = RankingService.get_ranking()
+        teams_by_id = Team.objects.prefetch_related('badges').in_bulk([team_id for team_id, _, _ in ranking])
+        ranks = {team_id: rank for team_id, _, rank in ranking if team_id in teams_by_id}
+        teams = sorted((teams_by_id[team_id] for team_id in ranks), key=lambda team: (ranks[team.pk], team.name))
+        resolution, series = TeamScoreRollup.get_series([team.pk for team in teams], days)
+
+        snapshot = {
+            "cursor": cursor,
+            "days": days,
+            "resolution": TeamScoreRollup.RESOLUTION_SECONDS[resolution],
+            "teams": [],
+            "history": {},
+        }
+        for team in teams:
+            snapshot["teams"].append({
+                "uuid": str(team.uuid),
+                "name": team.name,
+                "rank": ranks[team.pk],
+                "score": team.score,
+                "blue_points": team.blue_points,
+                "red_points": team.red_points,
+                "badges": [cls._serialize_badge(badge) for badge in team.badges.all()],
+            })
+
+            if team.pk in series:
+                snapshot["history"][str(team.uuid)] = {"name": team.name, **series[team.pk]}
+        return snapshot
+
+    @classmethod
+    def get_deltas(cls, cursor: int, limit: int = None) -> list | None:
+        """Get score history deltas after the cursor, None when the client is too far behind to catch up"""
+        limit = limit or settings.SCOREBOARD_RESUME_LIMIT
+        entries = list(
+            TeamScoreHistory.objects.filter(id__gt=cursor, team__is_in_game=True)
+            .select_related('team').order_by('id')[:limit + 1]
+        )
+        if len(entries) > limit:
+            return None
+        return [cls._serialize_history_entry(entry) for entry in entries]
+
+    @classmethod
+    def publish_history_entry(cls, entry: TeamScoreHistory):
+        """Broadcast a new score history entry to all scoreboard viewers"""
+        if entry.team.is_in_game:
+            cls._send(cls._serialize_history_entry(entry))
+
+    @classmethod
+    def publish_badge(cls, badge: Badge):
+        """Broadcast the current holder of a badge to all scoreboard viewers"""
+        cls._send({"type": cls.BADGE, "badge": cls._serialize_badge(badge),
+                   "team": str(badge.team.uuid) if badge.team else None})
+
+    @classmethod
+    def _send(cls, message: dict):
+        transaction.on_commit(lambda: cls._group_send(message))
+
+    @classmethod
+    def _group_send(cls, message: dict):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        try:
+            async_to_sync(channel_layer.group_send)(cls.GROUP_NAME, {"type": "scoreboard.event", "data": message})
+        except Exception as e:
+            logger.warning(f"Failed to send {message['type']} scoreboard event: {e}")
+
+    @classmethod
+    def _serialize_history_entry(cls, entry: TeamScoreHistory) -> dict:
+        return {
+            "type": cls.SCORE_HISTORY,
+            "cursor": entry.pk,
+            "team": str(entry.team.uuid),
+            "name": entry.team.name,
+            "timestamp": entry.timestamp.isoformat(),
+            "score": entry.score,
+            "blue_points": entry.blue_points,
+            "red_points": entry.red_points,
+        }
+
+    @staticmethod
+    def _serialize_badge(badge: Badge) -> dict:
+        return {"id": badge.pk, "name": badge.name, "description": badge.description,
+                "icon_class": badge.icon_class}
@@ -0,0 +1,97 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from ctf.models import TeamAssignment
+from ctf.models.enums import GameSessionStatus
+
+logger = logging.getLogger(__name__)
+
+
+class TeamEventService:
+    """Pushes deployment status, time restriction and flag capture events to connected team members"""
+    GROUP_NAME = "team-{}"
+    DEPLOYMENT_STATUS = "deployment_status"
+    TIME_RESTRICTIONS = "time_restrictions"
+    FLAG_CAPTURED = "flag_captured"
+
+    @classmethod
+    def get_group_name(cls, team_id) -> str:
+        return cls.GROUP_NAME.format(team_id)
+
+    @classmethod
+    def send(cls, team_id, event: str, data: dict):
+        """Send an event to all sockets of the team once the current transaction commits"""
+        transaction.on_commit(lambda: cls._group_send(team_id, event, data))
+
+    @classmethod
+    def _group_send(cls, team_id, event: str, data: dict):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        try:
+            async_to_sync(channel_layer.group_send)(cls.get_group_name(team_id),
+                                                    {"type": "team.event", "event": event, "data": data})
+        except Exception as e:
+            logger.warning(f"Failed to send {event} event to team {team_id}: {e}")
+
+    @classmethod
+    def publish_deployment_status(cls, deployment):
+        """Send the current state of the deployment to all teams with an active assignment of it"""
+        from challenges.services import DeploymentService
+
+        assignments = cls._get_active_assignments(deployment).select_related('entrypoint_container')
+        if not assignments:
+            return
+
+        is_running = deployment.is_running()
+        is_starting = DeploymentService().is_start_pending(deployment)
+        for assignment in assignments:
+            entrypoint = assignment.entrypoint_container
+            cls.send(assignment.team_id, cls.DEPLOYMENT_STATUS, {
+                "challenge_uuid": str(assignment.uuid),
+                "is_running": is_running,
+                "is_starting": is_starting,
+                "connection_info": entrypoint.get_connection_string() if is_running and entrypoint else "",
+            })
+
+    @classmethod
+    def publish_time_restrictions(cls, deployment):
+        """Send remaining access time of the deployment to teams of time restricted sessions"""
+        from ctf.utils.view_helpers import get_session_time_restrictions
+
+        assignments = cls._get_active_assignments(deployment).filter(
+            session__enable_time_restrictions=True
+        ).select_related('team', 'session', 'deployment')
+        for assignment in assignments:
+            _, max_time, time_spent, remaining_time, time_exceeded = (
+                get_session_time_restrictions(assignment, assignment.team)
+            )
+            cls.send(assignment.team_id, cls.TIME_RESTRICTIONS, {
+                "challenge_uuid": str(assignment.uuid),
+                "max_time": max_time,
+                "time_spent": round(time_spent),
+                "remaining_time": round(max(remaining_time, 0)),
+                "time_exceeded": time_exceeded,
+            })
+
+    @classmethod
+    def publish_flag_capture(cls, flag, captured_by):
+        """Send a flag capture to the capturing team and to the team owning the flag"""
+        if not flag.container:
+            return
+
+        deployment = flag.container.deployment
+        assignments = cls._get_active_assignments(deployment).filter(team_id__in={captured_by.pk, flag.owner_id})
+        for assignment in assignments:
+            cls.send(assignment.team_id, cls.FLAG_CAPTURED, {
+                "challenge_uuid": str(assignment.uuid),
+                "captured_by": captured_by.name,
+                "points": flag.points,
+            })
+
+    @staticmethod
+    def _get_active_assignments(deployment):
+        return TeamAssignment.objects.filter(deployment=deployment, session__status=GameSessionStatus.ACTIVE)
@@ -11,6 +11,12 @@ function getHint(challengeUuid) {
             'X-Requested-With': 'XMLHttpRequest'
         }
     }).then(response => {
+        if (response.status === 429) {
+            return response.json().then(data => {
+                showToast(data.error, 'warning');
+                return {};
+            });
+        }
         if (!response.ok) {
             throw new Error(response.statusText);
         }
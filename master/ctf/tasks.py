@@ -1,15 +1,17 @@
 import logging
 
 from celery import shared_task
+from django.core.cache import cache
 from django.db import transaction
 from django.utils import timezone
 
 from accounts.models import Team
 from accounts.models.enums import TeamRole
+from challenges.services import ContainerService
 from ctf.models import GameSession, GamePhase
 from ctf.models.enums import GameSessionStatus, GamePhaseStatus
 from ctf.models.settings import GlobalSettings
-from ctf.services import MatchmakingService
+from ctf.services import BadgeService, FlagFilterService, FlagService, MatchmakingService, RankingService
 from ctf.utils.helpers import is_first_session_for_teams
 
 logger = logging.getLogger(__name__)
@@ -63,6 +65,7 @@ def process_sessions():
             error_msg = f"Error processing session {session.name}: {str(e)}"
             logger.error(error_msg)
             failed_sessions.append((session.name, error_msg))
+            matchmaking_service.cleanup_provisioned_deployments()
 
     if failed_sessions:
         error_details = "\n".join([f"- {name}: {error}" for name, error in failed_sessions])
@@ -169,3 +172,56 @@ def process_phases():
         raise Exception(f"Failed to process some phase transitions:\n{error_details}")
 
     logger.info("Successfully processed all phase transitions")
+
+
+@shared_task(bind=True)
+def teardown_session(self, session_id):
+    """Distribute points for uncaptured flags and stop containers of a completed session
+
+    Progress is reported in the task state as {"stage", "current", "total"}.
+    """
+    try:
+        session = GameSession.objects.get(pk=session_id)
+    except GameSession.DoesNotExist:
+        logger.warning(f"Session {session_id} no longer exists, skipping teardown")
+        return None
+
+    logger.info(f"Tearing down session {session.name}")
+
+    def report_progress(stage, current, total):
+        self.update_state(state="PROGRESS", meta={"stage": stage, "current": current, "total": total})
+
+    report_progress("scoring", 0, 1)
+    FlagService().distribute_uncaptured_flags_points(session)
+
+    containers_count = session.get_containers().count()
+    report_progress("stopping", 0, containers_count)
+    stopped = ContainerService().stop_session_containers(
+        session, progress_callback=lambda current, total: report_progress("stopping", current, total)
+    )
+
+    logger.info(f"Finished teardown of session {session.name}")
+    return {"stage": "done", "current": containers_count, "total": containers_count, "success": stopped}
+
+
+@shared_task
+def update_badges():
+    """Move ranking badges to the current leaders, scheduled by BadgeService after score changes"""
+    changed = BadgeService.update_badges()
+    logger.info(f"Updated badges, {len(changed)} changed holder")
+
+
+@shared_task
+def rebuild_rankings():
+    """Check team rankings against the database, repairing points lost while Redis was unavailable"""
+    if RankingService.rebuild():
+        BadgeService.schedule_update()
+
+
+@shared_task
+def rebuild_flag_filter():
+    """Rebuild the flag submission filter, dropping captured and deleted flags"""
+    try:
+        FlagFilterService.rebuild()
+    finally:
+        cache.delete(FlagFilterService.REBUILD_QUEUED_KEY)
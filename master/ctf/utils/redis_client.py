@@ -0,0 +1,13 @@
+import redis
+from django.conf import settings
+
+_clients = {}
+
+
+def get_redis_client(decode_responses: bool = False) -> redis.Redis | None:
+    """Get the shared Redis client of the platform services, None when CTF_REDIS_URL is not set"""
+    if not settings.CTF_REDIS_URL:
+        return None
+    if decode_responses not in _clients:
+        _clients[decode_responses] = redis.Redis.from_url(settings.CTF_REDIS_URL, decode_responses=decode_responses)
+    return _clients[decode_responses]
@@ -5,16 +5,17 @@ from django.views.generic import FormView
 from challenges.utils.view_helpers import get_user_challenges
 from ctf.forms.flag_forms import FlagSubmissionForm
 from ctf.models import TeamAssignment
-from ctf.services import FlagService
+from ctf.services import FlagService, RateLimitService
 from ctf.utils.view_helpers import get_session_time_restrictions
-from ctf.views.mixins import TeamRequiredMixin, TimeRestrictionMixin, AjaxResponseMixin
+from ctf.views.mixins import TeamRequiredMixin, TimeRestrictionMixin, RateLimitMixin, AjaxResponseMixin
 
 
-class FlagSubmissionView(TeamRequiredMixin, TimeRestrictionMixin, AjaxResponseMixin, FormView):
+class FlagSubmissionView(TeamRequiredMixin, TimeRestrictionMixin, RateLimitMixin, AjaxResponseMixin, FormView):
     """View for submitting flags."""
 
     form_class = FlagSubmissionForm
     template_name = 'challenges.html'
+    rate_limit_scope = RateLimitService.FLAG_SUBMISSION
     challenge = None
 
     def setup(self, request, *args, **kwargs):
@@ -38,6 +39,11 @@ class FlagSubmissionView(TeamRequiredMixin, TimeRestrictionMixin, AjaxResponseMi
             messages.error(request, "You can only submit flags in red team phase")
             return redirect('challenges')
 
+        if request.method == 'POST':
+            rate_limit_result = self.check_rate_limit(request.user)
+            if rate_limit_result:
+                return rate_limit_result
+
         time_check_result = self.check_time_restrictions(self.challenge, request.user.team)
         if time_check_result:
             return time_check_result
@@ -3,6 +3,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import JsonResponse
 from django.shortcuts import redirect
 
+from ctf.services import RateLimitService
 from ctf.utils.view_helpers import can_perform_time_restricted_action
 
 
@@ -30,6 +31,26 @@ class TimeRestrictionMixin:
         return None
 
 
+class RateLimitMixin:
+    """Mixin that limits how often a team and its members can make a request."""
+
+    rate_limit_scope = None
+
+    def check_rate_limit(self, user):
+        """Check if the user or their team has exceeded the request rate."""
+        retry_after = RateLimitService.check(self.rate_limit_scope, user)
+        if not retry_after:
+            return None
+
+        error = f"Too many attempts, try again in {retry_after} seconds"
+        if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            response = JsonResponse({'error': error}, status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
+        messages.error(self.request, error)
+        return redirect('challenges')
+
+
 class AjaxResponseMixin:
     """Mixin for handling AJAX requests differently from regular requests."""
 